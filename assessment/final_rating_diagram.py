@@ -1,9 +1,10 @@
 import pandas as pd
 import numpy as np
-from helpers import load_component_json, create_grouped_bar_chart, create_vertical_bar_chart, create_four_grouped_table, create_scatter, \
+from helpers import traced, load_component_json, create_grouped_bar_chart, create_vertical_bar_chart, create_four_grouped_table, create_scatter, \
     create_facetted_scatter, create_report_data_dirs
 
 
+@traced()
 def create_rating_diagram():
     '''
 
@@ -3,11 +3,40 @@ import re
 import pandas as pd
 from pathlib import Path
 from math import pow
-from helpers import reorder_dataframe, create_four_grouped_table, create_grouped_bar_chart, create_facetted_bar_chart, \
+from helpers import traced, reorder_dataframe, create_four_grouped_table, create_grouped_bar_chart, create_facetted_bar_chart, \
     load_component_json, pandas_convert_decimals, create_report_data_dirs
 import numpy as np
 
 
+def calculate_npv(space: pandas.Series, demand: pandas.Series, price: pandas.Series, discount_rate: float,
+                  annual_price_increase: float, years: int = 20) -> list[float]:
+    '''
+    Calculate the net present value of the energy costs of the archetypes.
+    :param space: net floor area of the archetypes in m²
+    :param demand: final energy demand of the archetypes in kWh/m²a
+    :param price: energy prices of the archetypes in €/kWh
+    :param discount_rate: discount rate, e.g. 0.015
+    :param annual_price_increase: annual increase of the energy prices, e.g. 0.05
+    :param years: period of the net present value in years
+    :return: list with the net present value of each archetype
+    '''
+    npv = []
+    # Pandas Dataframe with information on energy demand of different archetypes
+    frame = pd.DataFrame({'NGF': space, 'Energiebedarf': demand, 'Preis': price})
+    # Calculate energy costs for the whole building and append new column to dataframe
+    frame['Basisjahr'] = frame['NGF'] * frame['Energiebedarf'] * frame['Preis']
+    # Iterate through pandas Series (column with energy costs of the whole building)
+    for _, value in frame['Basisjahr'].items():
+        result = 0
+        # Assume interest rate of 1.5 % and annual price increase in energy costs 5 % from BNB Bewertungssystem
+        # Calculate NPV for a period of 20 years
+        for i in range(years):
+            result += value * pow(1 + annual_price_increase, i + 1) / pow(1 + discount_rate, i + 1)
+        npv.append(result)
+    return npv
+
+
+@traced()
 def analyse_life_cycle_costs():
     '''
     This function reads the output data from the life cycle inventory to calculate the net present value of the energy
@@ -64,22 +93,6 @@ def analyse_life_cycle_costs():
     discount_rate = energy_calc["discount_rate"]
     annual_price_increase = energy_calc["annual_price_increase"]
 
-    def calculate_npv(space: pandas.Series, demand: pandas.Series, price: pandas.Series) -> list[float]:
-        npv = []
-        # Pandas Dataframe with information on energy demand of different archetypes
-        frame = pd.DataFrame({'NGF': space, 'Energiebedarf': demand, 'Preis': price})
-        # Calculate energy costs for the whole building and append new column to dataframe
-        frame['Basisjahr'] = frame['NGF'] * frame['Energiebedarf'] * frame['Preis']
-        # Iterate through pandas Series (column with energy costs of the whole building)
-        for _, value in frame['Basisjahr'].items():
-            result = 0
-            # Assume interest rate of 1.5 % and annual price increase in energy costs 5 % from BNB Bewertungssystem
-            # Calculate NPV for a period of 20 years
-            for i in range(20):
-                result += value * pow(1 + annual_price_increase, i + 1) / pow(1 + discount_rate, i + 1)
-            npv.append(result)
-        return npv
-
     # Net Present Value of energy demand
     # Load information on energy demand of archetypes
     df_energy = pd.read_csv('report_data/life_cycle_inventory/Gebäudebetrieb.csv')
@@ -111,11 +124,11 @@ def analyse_life_cycle_costs():
     # Calculate NPV of energy costs fpr the different refurbishment scenarios and the existing scenario
     df_energy[f"Kapitalwert Bestand in €"] = \
         calculate_npv(df_energy['NFA in m²'], df_energy[f"Bestand Endenergie in kWh/m²a"],
-                      df_energy['Preis in €/kWh'])
+                      df_energy['Preis in €/kWh'], discount_rate, annual_price_increase)
     for refurb_scenario in refurb_scenarios:
         df_energy[f"Kapitalwert {refurb_scenario} in €"] = \
             calculate_npv(df_energy['NFA in m²'], df_energy[f"{refurb_scenario} Endenergie in kWh/m²a"],
-                          df_energy['Preis in €/kWh'])
+                          df_energy['Preis in €/kWh'], discount_rate, annual_price_increase)
         # Add a column for the difference between the costs in the existing scenario and in the rehabilitation scenario
         df_energy[f'{refurb_scenario} Einsparungen im Vergleich zum Bestandsszenario in €'] = \
             df_energy['Kapitalwert Bestand in €'] - df_energy[f'Kapitalwert {refurb_scenario} in €']
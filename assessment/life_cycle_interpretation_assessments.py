@@ -7,9 +7,10 @@ from os import path
 from glob import glob
 import numpy as np
 from helpers import reorder_dataframe, create_four_grouped_table, create_grouped_bar_chart, create_stacked_bar_chart, \
-    create_report_data_dirs
+    create_report_data_dirs, export_image, traced
 
 
+@traced()
 def interpret_lca():
     """
 
@@ -176,9 +177,8 @@ def interpret_lca():
             # Set font
             fig.update_layout(uniformtext=dict(minsize=10, mode='show'), font_family="Serif", font_color="black")
             # Save image as PDF for further data processing
-            fig.write_image(
-                f'report_data\\life_cycle_interpretation\\material_pie_charts\\{no_spaces_name}GWPKonstruktion.pdf',
-                engine='kaleido', height=500)
+            export_image(fig,
+                f'report_data\\life_cycle_interpretation\\material_pie_charts\\{no_spaces_name}GWPKonstruktion.pdf', height=500)
     print('Interpretation: Mehrstufige Kreisdiagramme zu GWP der Baustoffe und Bauteile wurden erstellt!')
 
     # Processing of the data frame for the comparison of the GWP for other
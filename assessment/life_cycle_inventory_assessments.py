@@ -2,21 +2,90 @@ import re
 import pandas as pd
 import numpy as np
 from difflib import SequenceMatcher
-from helpers import load_component_json, login, create_get_soup, create_post_soup, projects_dict, create_table, \
-    reorder_dataframe, diff_two_dataframes, create_report_data_dirs
+from helpers import ElcaClient, traced, load_component_json, create_table, \
+    diff_two_dataframes, create_report_data_dirs, registered_archetype_projects, registered_archetype_account, \
+    login_accounts, REFURB_VARIANTS, quarantine_project, release_project, cache_harvest, harvested_data, \
+    save_endpoint_latency, ProgressTracker
 
 
+@traced("project")
+def harvest_lci_project(client: ElcaClient, project_id: str, project_name: str) -> dict:
+    """
+    Read the life cycle inventory data of one project from eLCA: the final energy demand and the masses of the
+    building materials. Raise an error if the data of the project is incomplete.
+    Return a JSON serializable dictionary with the final energy demand and the table of the masses.
+    :param client: eLCA client of the account of the project
+    :param project_id: ID of the project in eLCA
+    :param project_name: name of the project
+    """
+    # Update session header
+    response_project_overview = client.open_project(project_id)
+
+    # Read final energy demand for each project
+    operation_soup = client.get_operation_report()
+    # Some energy sources cause errors and are not recognised in the balance sheet
+    # Raise an error if the energy sources are not balanced, the project is then put into the dead-letter queue
+    # Problem in the eLCA database
+    try:
+        final_energy = re.search(r"(.*) kWh", operation_soup.find('ul', attrs={'class': 'category final-energy'}).find('dd').text).group(1)
+    except AttributeError:
+        raise ValueError(f'ERROR: The final energy balance for the project {project_name} must be checked! '
+                         f'There is an error in the eLCA data set for the selected energy sources. '
+                         f'Please delete all data created so far by executing the function "delete_projects()". '
+                         f'Then start DisteLCA again and select another energy carrier or electricity source.')
+
+    # life_cycle_inventory for materials
+    # Read table ranking mass from eLCA and create dataframe
+    soup_LCI = client.get_top_assets_report({
+        # Allow to show up to 200 materials at the same time to read all
+        'limit': '200',
+        # Present the materials in descending order with respect to mass
+        'order': 'DESC',
+        'inTotal': '1'
+        })
+    # Retrieve table input
+    table_masses = soup_LCI.find('table', attrs={'class': 'report report-top-elements'})
+    # Retrieve table headers and append them to a list of headers used for the new pandas dataframe
+    titles = []
+    for i in table_masses.find('thead').find('tr').find_all('th'):
+        title = i.text
+        titles.append(title)
+    # Create pandas dataframe with table headers as columns
+    masses_df = pd.DataFrame(columns=titles)
+    # Create a for loop to fill mydata
+    for j in table_masses.find('tbody').find_all('tr'):
+        # fill dataframe row by row
+        row_data = j.find_all('td')
+        row = [i.text for i in row_data]
+        length = len(masses_df)
+        masses_df.loc[length] = row
+    # Ranking row is not needed
+    masses_df = masses_df.drop(columns=['#'])
+    # Change type to float for further processing
+    masses_df["Masse in kg"] = masses_df["Masse in kg"].str.replace(",", ".")
+    masses_df = masses_df.astype({'Masse in kg': float})
+    # Customise names of materials to indicate same materials throughout archetypes
+    masses_df["Bauteil"] = masses_df["Bauteil"].str.extract(r"(.*) \[")
+    masses_df["Bauteil"] = masses_df["Bauteil"].str.replace(" Sanierung", "")
+    # Return the masses as a dictionary of columns and rows, so that the data can be saved in the harvest cache
+    return {"final_energy": final_energy, "masses": masses_df.to_dict(orient="split")}
+
+
+@traced()
 def compile_lci():
     """
     This function is used for phase 2 of the LCA, the life cycle inventory.
     The life cycle inventory data of the created projects are
     retrieved from eLCA. From the information compiled by eLCA on the input and
     output flows of the building over the product life cycle, various tables are
-    created.
+    created. The data of each project is saved in the harvest cache of the projects registry. Projects that
+    cannot be read are put into the dead-letter queue, the other projects are evaluated anyway. The next
+    execution only reads the projects that have not been read yet.
 
     Input:
     1) archetypes.json: List of dictionaries, where each dictionary describes an archetype of the quarter.
-    2) eLCA Projects
+    2) projects_registry.sqlite: registry of the eLCA projects created for the archetypes
+    3) eLCA Projects
 
     Output:
     1)  For each archetype, a table is created on the masses of the building materials.
@@ -37,94 +106,74 @@ def compile_lci():
     archetypes: list[dict] = load_component_json("archetypes")
     # Create dictionary of all final energy demands and fill it later
     oper_dict = {}
-    session = login()
-    projects = projects_dict(session)
-    project_names = list(projects.values())
-    archetypes: list[dict] = load_component_json("archetypes")
+    # Log in to all eLCA accounts that contain projects of the archetypes
+    archetype_accounts = {archetype['archetype name']: registered_archetype_account(archetype['archetype name'])
+                          for archetype in archetypes}
+    clients = login_accounts(set(archetype_accounts.values()))
+    # The projects of the archetypes are looked up in the registry written during project creation
+    # Variants are sorted: Bestand, Außenwandsanierung, Dachsanierung, Fenstersanierung, Komplettsanierung
+    all_archetype_projects = {archetype_name: registered_archetype_projects(archetype_name)
+                              for archetype_name in archetype_accounts}
+    # Progress of the reading of the projects with throughput and remaining time
+    progress = ProgressTracker("Sachbilanz", sum(len(projects) for projects in all_archetype_projects.values()))
     for archetype in archetypes:
         archetype_name = archetype['archetype name']
+        client = clients[archetype_accounts[archetype_name]]
         # No spaces name is needed for file saving
         no_spaces_name = archetype_name.replace(' ', '')
         # Dictionary of final energy demands for each project of the archetype
         oper_one_arch = {}
-        # Dictionary for material masses for each project of the archetype
+        # Dictionary for material masses for each refurbishment variant of the archetype
         masses_frames_dict = {}
-        archetype_projects = {k:v for (k,v) in projects.items() if archetype_name in v.split(" ")[0]}
-        for project_id, project_name in archetype_projects.items():
-            # Identify the refurbishment scenario
-            refurb_variant = project_name.replace(f'{archetype_name} ', '')
-            # Update session header
-            response_project_overview = session.get("https://www.bauteileditor.de/projects/{}/".format(project_id))
-
-            # Read final energy demand for each project
-            operation_soup = create_get_soup(session, 'https://www.bauteileditor.de/project-report-effects/operation/', 'Elca\\View\\Report\\ElcaReportEffectsView')
-            # Some energy sources cause errors and are not recognised in the balance sheet
-            # Print error message if the energy sources are not balanced
-            # Problem in the eLCA database
-            try:
-                final_energy = re.search(r"(.*) kWh", operation_soup.find('ul', attrs={'class': 'category final-energy'}).find('dd').text).group(1)
-            except AttributeError:
-                final_energy = None
-                print(f'ERROR: The final energy balance for the project {project_name} must be checked! '
-                  f'There is an error in the eLCA data set for the selected energy sources. '
-                  f'Please delete all data created so far by executing the function "delete_projects()". '
-                  f'Then start DisteLCA again and select another energy carrier or electricity source.')
-            oper_one_arch.update({f'{refurb_variant} Endenergie in kWh/m²a': final_energy})
-
-            # life_cycle_inventory for materials
-            # Read table ranking mass from eLCA and create dataframe
-            soup_LCI = create_post_soup(session, 'https://www.bauteileditor.de/project-report-assets/topAssets/', 'Elca\\View\\Report\\ElcaReportAssetsView', data={
-                # Allow to show up to 200 materials at the same time to read all
-                'limit': '200',
-                # Present the materials in descending order with respect to mass
-                'order': 'DESC',
-                'inTotal': '1'
-                })
-            # Retrieve table input
-            table_masses = soup_LCI.find('table', attrs={'class': 'report report-top-elements'})
-            # Retrieve table headers and append them to a list of headers used for the new pandas dataframe
-            titles = []
-            for i in table_masses.find('thead').find('tr').find_all('th'):
-                title = i.text
-                titles.append(title)
-            # Create pandas dataframe with table headers as columns
-            masses_df = pd.DataFrame(columns=titles)
-            # Create a for loop to fill mydata
-            for j in table_masses.find('tbody').find_all('tr'):
-                # fill dataframe row by row
-                row_data = j.find_all('td')
-                row = [i.text for i in row_data]
-                length = len(masses_df)
-                masses_df.loc[length] = row
-            # Ranking row is not needed
-            masses_df = masses_df.drop(columns=['#'])
-            # Change type to float for further processing
-            masses_df["Masse in kg"] = masses_df["Masse in kg"].str.replace(",", ".")
-            masses_df = masses_df.astype({'Masse in kg': float})
-            # Customise names of materials to indicate same materials throughout archetypes
-            masses_df["Bauteil"] = masses_df["Bauteil"].str.extract(r"(.*) \[")
-            masses_df["Bauteil"] = masses_df["Bauteil"].str.replace(" Sanierung", "")
-            # Append dataframe to dictionary with project names as key and dataframe as value
-            masses_frames_dict[project_name] = masses_df
+        archetype_projects = all_archetype_projects[archetype_name]
+        for refurb_variant, project_id in archetype_projects.items():
+            project_name = f'{archetype_name} {refurb_variant}'
+            # After a cancellation no further project is read and no table is written, the projects read so far
+            # are in the harvest cache
+            progress.check_cancel()
+            # Projects that have already been read (e.g. before another project failed) are taken from the cache
+            lci_data = harvested_data("lci", project_id)
+            if lci_data is None:
+                # A failed project must not stop the inventory of the other projects, it is put into the
+                # dead-letter queue and read again by the next execution of compile_lci
+                try:
+                    lci_data = harvest_lci_project(client, project_id, project_name)
+                except Exception as error:
+                    quarantine_project("lci", archetype_name, refurb_variant, error)
+                    print(f'FEHLER: Die Sachbilanz des Projekts {project_name} konnte nicht gelesen werden ({error}). '
+                          f'Das Projekt wurde zurückgestellt.')
+                    progress.advance(failed=True)
+                    continue
+                cache_harvest("lci", project_id, lci_data)
+                release_project("lci", archetype_name, refurb_variant)
+            progress.advance()
+            oper_one_arch.update({f'{refurb_variant} Endenergie in kWh/m²a': lci_data["final_energy"]})
+            # Append dataframe to dictionary with refurbishment variants as key and dataframe as value
+            masses_frames_dict[refurb_variant] = pd.DataFrame(lci_data["masses"]["data"],
+                                                              columns=lci_data["masses"]["columns"])
         # Fill dictionary of all energy demands with archetype name as key and dictionary of energy
         # demand for all refurbishment alternatives as value
         # In total: dictionary of dictionaries
         oper_dict.update({archetype_name: oper_one_arch})
+        # Save the measured latencies of the eLCA endpoints for the estimation of the project creation
+        save_endpoint_latency()
+        # The table of the building materials compares all refurbishment variants of the archetype
+        missing_variants = [variant for variant in REFURB_VARIANTS if variant not in masses_frames_dict]
+        if missing_variants:
+            print(f'Die Tabelle zu Baustoffen von {archetype_name} wurde nicht erstellt, da die Projekte '
+                  f'{", ".join(missing_variants)} fehlen.')
+            continue
 
         # Customise masses_frames_dict to efficiently display all variants simultaneously
-        masses_frames_list = list(masses_frames_dict.values())
-        # Stock masses are defined by 1st item of frames
-        # Order follows the projects order in eLCA
-        # projects are sorted according to the alphabet in eLCA
-        # Alphabetic order: 0 Außenwandsanierung, 1 Bestand, 2 Dachsanierung, 3 Fenstersanierung, 4 Komplettsanierung
+        # Stock masses are defined by the frame of the variant "Bestand"
         # Dataframes only including the new materials in comparison to existing buidling
-        existing_df = masses_frames_list[1]
-        df_diff_wall = diff_two_dataframes(existing_df, masses_frames_list[0])
-        df_diff_roof = diff_two_dataframes(existing_df, masses_frames_list[2])
+        existing_df = masses_frames_dict['Bestand']
+        df_diff_wall = diff_two_dataframes(existing_df, masses_frames_dict['Außenwandsanierung'])
+        df_diff_roof = diff_two_dataframes(existing_df, masses_frames_dict['Dachsanierung'])
         # Stock windows are missing in refurbishment variant window refurbishment
         df_delete_windows = existing_df.drop(
             existing_df.loc[existing_df['Kostengruppe'] == '334 Außentüren und -fenster'].index)
-        df_diff_window = diff_two_dataframes(df_delete_windows, masses_frames_list[3])
+        df_diff_window = diff_two_dataframes(df_delete_windows, masses_frames_dict['Fenstersanierung'])
         # Change column name according to refurbishment variant
         existing_df.rename(columns={'Masse in kg': 'Masse in kg Bestand'}, inplace=True)
         df_diff_wall.rename(columns={'Masse in kg': 'Masse in kg Außenwandsanierung'}, inplace=True)
@@ -163,6 +212,7 @@ def compile_lci():
         # Create plotly table
         create_table(result_df, f'{archetype_name} Baustoffe', f'report_data\life_cycle_inventory\{no_spaces_name}Baustoffe', 2000)
         result_df = result_df[0:0]
+    progress.finish()
     print('Sachbilanz: Tabellen zu Massen der Baustoffe erstellt!')
 
     # Final energy demand life cycle inventory
@@ -174,9 +224,8 @@ def compile_lci():
     df_op.index = df_op['archetype name']
     # Add information on energy demand of refurbishment variants
     # Use dictionary from above
+    # The columns already follow the order of the variants in the registry (Bestand first)
     refurb_oper_df = pd.DataFrame.from_dict(oper_dict, orient='index')
-    # Reorder for better readability
-    refurb_oper_df = reorder_dataframe(refurb_oper_df, [1,0,2,3,4])
     # Merge stock and refurbishment information
     df_op_all = pd.merge(df_op, refurb_oper_df, left_index=True, right_index=True)
     # Change the decimal places from dot to comma for german notation and visualization
@@ -0,0 +1,72 @@
+from __future__ import annotations
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from benchmarks.harness import BASELINE_FILE, FIXTURES_DIR, RESULTS_FILE, compare_with_baseline, load_results, \
+    save_results
+from benchmarks.macro import REPO_DIR, prepare_workdir
+
+
+def run_macro_benchmark(latency: float = 0.0) -> dict[str, dict]:
+    """
+    Run the macro benchmark in a separate process with a temporary working directory (see benchmarks/macro.py)
+    and return its results. The stages that request eLCA use the stub server with the recorded eLCA responses in
+    benchmarks/fixtures and are skipped if there are no recordings.
+    :param latency: latency of the stub server in seconds
+    """
+    with tempfile.TemporaryDirectory() as folder:
+        workdir = Path(folder)
+        prepare_workdir(workdir)
+        output = workdir / "macro_results.json"
+        command = [sys.executable, "-m", "benchmarks.macro", "--output", str(output), "--latency", str(latency)]
+        if any(FIXTURES_DIR.glob("*.json")):
+            command += ["--recordings", str(FIXTURES_DIR)]
+        environment = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(REPO_DIR),
+                                                                                 os.environ.get("PYTHONPATH")])))
+        subprocess.run(command, cwd=workdir, env=environment, check=True)
+        with open(output, encoding="utf-8") as file:
+            return json.load(file)
+
+
+def main() -> int:
+    """
+    Run the benchmarks, save the results in benchmarks/results.json and compare them with the baseline in
+    benchmarks/baseline.json. Return 1 if a benchmark is slower than the baseline by more than the threshold.
+    """
+    parser = argparse.ArgumentParser(description="Benchmarks of eLCArefurb")
+    parser.add_argument("--only", choices=["micro", "macro", "imports"], default=None, help="run only one kind of benchmarks")
+    parser.add_argument("--filter", default="",
+                        help="run only the micro and import benchmarks whose name contains this text")
+    parser.add_argument("--repeat", type=int, default=5, help="repetitions of each micro benchmark")
+    parser.add_argument("--latency", type=float, default=0.0, help="latency of the stub server in seconds")
+    parser.add_argument("--threshold", type=float, default=0.2, help="accepted relative slowdown")
+    parser.add_argument("--save-baseline", action="store_true", help="save the results as new baseline")
+    arguments = parser.parse_args()
+
+    results = {}
+    if arguments.only in (None, "micro"):
+        from benchmarks.micro import run_micro_benchmarks
+        results.update(run_micro_benchmarks(arguments.repeat, arguments.filter))
+    if arguments.only in (None, "imports"):
+        from benchmarks.imports import run_import_benchmarks
+        results.update(run_import_benchmarks(arguments.repeat, arguments.filter))
+    if arguments.only in (None, "macro"):
+        results.update(run_macro_benchmark(arguments.latency))
+    save_results(results, RESULTS_FILE)
+    regressions = compare_with_baseline(results, load_results(BASELINE_FILE), arguments.threshold)
+    if arguments.save_baseline:
+        save_results(results, BASELINE_FILE)
+        print(f"Baseline gespeichert: {BASELINE_FILE}")
+        return 0
+    if regressions:
+        print(f'{len(regressions)} Benchmarks sind langsamer als die Baseline: {", ".join(regressions)}')
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,203 @@
+from __future__ import annotations
+import argparse
+import hashlib
+import os
+from pathlib import Path
+import numpy as np
+from helpers import load_component_json, save_component_json
+from creation.components_collection import save_template_files
+from creation.projects_data import load_savings, lookup_savings
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+# Share of the building age classes in the German residential building stock (approximation of the census data)
+AGE_CLASS_SHARES = {"until 1859": 0.03, "1860-1918": 0.09, "1919-1948": 0.10, "1949-1957": 0.08,
+                    "1958-1968": 0.15, "1969-1978": 0.14, "1979-1983": 0.07, "1984-1994": 0.10,
+                    "1995-2001": 0.09, "2002-2009": 0.07, "2010-2015": 0.05, "as of 2016": 0.03}
+# Typical final energy demand for heating of the building age classes in kWh/m²a (TABULA building typology)
+AGE_CLASS_HEATING = {"until 1859": 200, "1860-1918": 190, "1919-1948": 185, "1949-1957": 180, "1958-1968": 175,
+                     "1969-1978": 165, "1979-1983": 145, "1984-1994": 130, "1995-2001": 110, "2002-2009": 95,
+                     "2010-2015": 70, "as of 2016": 50}
+# Share of the energy carriers of the heating systems, the keys are the names of the energy carriers in
+# assessment/EnergieKosten.json, which have to be part of the names of the energy carriers in eLCA
+ENERGY_CARRIER_SHARES = {"Gas": 0.50, "Öl": 0.25, "Fernwärme": 0.08, "Strom": 0.08, "ellet": 0.06,
+                         "Hackschnitzel": 0.03}
+# Components of the synthetic template catalog: component group, cost group, name and U-values of the
+# existing and the refurbished components
+SYNTHETIC_COMPONENTS = [("outer_walls", "330", "Außenwand", (0.6, 1.6), (0.14, 0.24)),
+                        ("windows", "334", "1,88 m² Fenster", (1.6, 2.8), (0.7, 0.95)),
+                        ("roofs", "360", "Dach", (0.5, 1.4), (0.12, 0.2))]
+
+
+def synthetic_template_catalog(templates_per_group: int, rng: np.random.Generator) -> dict[str, dict]:
+    """
+    Return a synthetic template catalog in the format of temp_data/template_catalog.json (see collect_templates)
+    with the given number of existing components per cost group, each with a refurbishment component named
+    according to the naming convention "Name Sanierung".
+    :param templates_per_group: number of existing components per cost group
+    :param rng: random number generator
+    """
+    catalog = {}
+    element_id = 9000000
+    for component, cost_group, name, stock_u_values, refurb_u_values in SYNTHETIC_COMPONENTS:
+        for number in range(templates_per_group):
+            template_name = f"{name} synthetisch {number + 1}"
+            for suffix, u_values in (("", stock_u_values), (" Sanierung", refurb_u_values)):
+                element_id += 1
+                catalog[str(element_id)] = {
+                    "component": component,
+                    "signature": hashlib.sha256((template_name + suffix).encode("utf-8")).hexdigest(),
+                    "template": {"template_name": template_name + suffix, "CG_DIN_276": cost_group,
+                                 "UUID": str(element_id), "description": "synthetische Bauteilvorlage",
+                                 "public": False, "U-Value": f"{rng.uniform(*u_values):.3f}".replace(".", ","),
+                                 "window assistant": False}}
+    return catalog
+
+
+def energy_carrier_templates(energy_sources: dict[str, str], savings_dict: dict[str, dict[str, dict]],
+                             age_class: str) -> dict[str, list[str]]:
+    """
+    Return the energy carriers of eLCA that can be used by the archetypes of a building age class, grouped by the
+    names of the energy carriers of ENERGY_CARRIER_SHARES. Only energy carriers for which prepare_projects_data
+    finds energy saving potentials of the building age class in savings.csv are used.
+    :param energy_sources: dictionary with names of energy sources as keys and corresponding IDs as values
+    :param savings_dict: energy saving potentials of load_savings
+    :param age_class: building age class
+    """
+    carriers = {}
+    for carrier in ENERGY_CARRIER_SHARES:
+        carriers[carrier] = []
+        for name in energy_sources:
+            if carrier not in name:
+                continue
+            try:
+                lookup_savings(savings_dict, age_class, name)
+            except KeyError:
+                continue
+            carriers[carrier].append(name)
+    return carriers
+
+
+def generate_archetypes(count: int, stock_templates: list[dict], energy_sources: dict[str, str],
+                        savings_dict: dict[str, dict[str, dict]], age_classes: list[str],
+                        rng: np.random.Generator) -> list[dict]:
+    """
+    Return a synthetic district of archetypes in the format of archetypes.json. The building age classes and the
+    energy carriers are sampled according to their shares in the German building stock, the areas from a
+    log-normal distribution of single and multi-family houses and the final energy demand for heating from the
+    typical demand of the building age class.
+    :param count: number of archetypes
+    :param stock_templates: existing components with refurbishment alternative (see stock_templates.json)
+    :param energy_sources: dictionary with names of energy sources as keys and corresponding IDs as values
+    :param savings_dict: energy saving potentials of load_savings
+    :param age_classes: building age classes of savings.csv
+    :param rng: random number generator
+    """
+    shares = np.array([AGE_CLASS_SHARES.get(age_class, 0.01) for age_class in age_classes])
+    ages = rng.choice(age_classes, size=count, p=shares / shares.sum())
+    # Energy carriers sampled for the archetypes of each building age class
+    energy_carriers = np.empty(count, dtype=object)
+    for age_class in set(ages):
+        in_class = ages == age_class
+        carriers = energy_carrier_templates(energy_sources, savings_dict, age_class)
+        carrier_names = [carrier for carrier in ENERGY_CARRIER_SHARES if carriers[carrier]]
+        carrier_shares = np.array([ENERGY_CARRIER_SHARES[carrier] for carrier in carrier_names])
+        carrier_choices = rng.choice(carrier_names, size=in_class.sum(), p=carrier_shares / carrier_shares.sum())
+        energy_carriers[in_class] = [carriers[carrier][rng.integers(len(carriers[carrier]))]
+                                     for carrier in carrier_choices]
+    # Gross floor area and number of storeys
+    gfa = np.clip(rng.lognormal(mean=np.log(180), sigma=0.6, size=count), 60, 5000)
+    storeys = np.clip(np.round(gfa / 120), 1, 8)
+    nfa = gfa * rng.uniform(0.78, 0.88, size=count)
+    # Roof area from the footprint and wall area from the perimeter of a square footprint
+    footprint = gfa / storeys
+    roof_area = footprint * rng.uniform(1.0, 1.3, size=count)
+    wall_area = 4 * np.sqrt(footprint) * 2.8 * storeys * rng.uniform(0.8, 0.9, size=count)
+    windows = np.maximum(np.round(wall_area * rng.uniform(0.15, 0.25, size=count) / 1.88), 2).astype(int)
+    heating = np.array([AGE_CLASS_HEATING.get(age, 150) for age in ages]) * rng.uniform(0.8, 1.2, size=count)
+    hot_water = rng.uniform(12.5, 20, size=count)
+    templates = {cost_group: [template for template in stock_templates if template["CG_DIN_276"] == cost_group]
+                 for cost_group in ("330", "334", "360")}
+    components = {cost_group: rng.integers(len(group), size=count) for cost_group, group in templates.items()}
+
+    archetypes = []
+    for index in range(count):
+        energy_carrier = energy_carriers[index]
+        wall = templates["330"][components["330"][index]]
+        window = templates["334"][components["334"][index]]
+        roof = templates["360"][components["360"][index]]
+        archetypes.append({
+            'archetype name': f'S{index + 1:05d}',
+            'GFA in m²': round(float(gfa[index]), 2),
+            'NFA in m²': round(float(nfa[index]), 2),
+            'final energy heating in kWh/m²a': round(float(heating[index]), 1),
+            'final energy hot water in kWh/m²a': round(float(hot_water[index]), 1),
+            'exterior walls area in m²': round(float(wall_area[index]), 2),
+            'roof area in m²': round(float(roof_area[index]), 2),
+            'number of windows': int(windows[index]),
+            'number of heating supply systems': 1,
+            'energy carrier template': energy_carrier,
+            'energy carrier ID': energy_sources[energy_carrier],
+            'exterior walls template': wall["template_name"],
+            'window template': window["template_name"],
+            'roof template': roof["template_name"],
+            'exterior walls ID': wall["UUID"],
+            'window ID': window["UUID"],
+            'roof ID': roof["UUID"],
+            'building age class': str(ages[index])
+        })
+    return archetypes
+
+
+def generate_district(count: int, folder: str = "temp_data", templates_per_group: int = None,
+                      seed: int = 0) -> list[dict]:
+    """
+    Generate a synthetic district for scale tests of the stages of eLCArefurb and save archetypes.json and
+    the matching template files (template_catalog.json, stock_templates.json, refurb_templates.json,
+    refurb_alternatives.json, templates.json and templates.csv) in the folder. If templates_per_group is not
+    given, the template files already in the folder (e.g. from collect_templates) are used, so that the district
+    can be created in eLCA. Otherwise a synthetic template catalog is generated, which can only be used with
+    the stub server of helpers/stub_server.py.
+
+    :param count: number of archetypes, e.g. from 10 up to 50000
+    :param folder: Name of the folder where the files are saved
+    :param templates_per_group: number of synthetic existing components per cost group
+    :param seed: seed of the random number generator, the same seed generates the same district
+
+    Input:
+    1) creation/construction_age_classes.txt, creation/savings.csv: building age classes
+    2) creation/energy_sources.json: energy carriers of eLCA
+    3) stock_templates.json in the folder, if no synthetic templates are generated
+
+    Output:
+    1) archetypes.json: List of dictionaries, where each dictionary describes an archetype of the district.
+    2) template files of the synthetic template catalog, if templates_per_group is given
+
+    """
+    rng = np.random.default_rng(seed)
+    os.makedirs(folder, exist_ok=True)
+    if templates_per_group is not None:
+        catalog = synthetic_template_catalog(templates_per_group, rng)
+        save_component_json({"account": "synthetic", "templates": catalog}, "template_catalog", folder)
+        save_template_files(catalog, folder)
+    stock_templates: list[dict] = load_component_json("stock_templates", folder)
+    energy_sources: dict[str, str] = load_component_json("energy_sources", str(REPO_DIR / "creation"))
+    # Only the building age classes of the GUI with energy saving potentials in savings.csv are sampled
+    with open(REPO_DIR / "creation" / "construction_age_classes.txt", encoding="utf-8") as file:
+        gui_age_classes = [line.strip().rstrip(",") for line in file if line.strip()]
+    savings_dict = load_savings(REPO_DIR / "creation" / "savings.csv")
+    age_classes = [age_class for age_class in gui_age_classes if age_class in savings_dict]
+    archetypes = generate_archetypes(count, stock_templates, energy_sources, savings_dict, age_classes, rng)
+    save_component_json(archetypes, "archetypes", folder)
+    print(f'Ein synthetisches Quartier mit {count} Archetypen wurde in {folder} gespeichert.')
+    return archetypes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Synthetic districts for scale tests of eLCArefurb")
+    parser.add_argument("--archetypes", type=int, required=True, help="number of archetypes")
+    parser.add_argument("--folder", default="temp_data", help="folder of archetypes.json and the template files")
+    parser.add_argument("--templates-per-group", type=int, default=None,
+                        help="generate a synthetic template catalog with this number of components per cost group")
+    parser.add_argument("--seed", type=int, default=0)
+    arguments = parser.parse_args()
+    generate_district(arguments.archetypes, arguments.folder, arguments.templates_per_group, arguments.seed)
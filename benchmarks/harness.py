@@ -0,0 +1,79 @@
+from __future__ import annotations
+import json
+import statistics
+import time
+from pathlib import Path
+from typing import Callable
+
+# Folder of the benchmarks with the results, the baseline and the recorded eLCA responses
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+RESULTS_FILE = BENCHMARKS_DIR / "results.json"
+BASELINE_FILE = BENCHMARKS_DIR / "baseline.json"
+FIXTURES_DIR = BENCHMARKS_DIR / "fixtures"
+# Example district with the archetypes A - D
+EXAMPLE_DIR = BENCHMARKS_DIR.parent / "additional_material_example_buildings" / "model_buildings"
+
+
+def measure(function: Callable[[], object], repeat: int = 5, number: int = 1) -> dict[str, float]:
+    """
+    Measure the runtime of a function and return the median, minimum and maximum of the repetitions in seconds
+    per call.
+    :param function: function without arguments
+    :param repeat: number of repetitions
+    :param number: number of calls of the function per repetition
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        times.append((time.perf_counter() - start) / number)
+    return {"median": statistics.median(times), "min": min(times), "max": max(times), "repeat": repeat}
+
+
+def load_results(results_file: Path) -> dict[str, dict]:
+    """
+    Load the results of benchmarks, return an empty dictionary if there are no results.
+    :param results_file: JSON file with the benchmark names as keys and the measurements as values
+    """
+    if not results_file.exists():
+        return {}
+    with open(results_file, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def save_results(results: dict[str, dict], results_file: Path) -> None:
+    """
+    Save the results of benchmarks in a JSON file.
+    :param results: dictionary with the benchmark names as keys and the measurements as values
+    :param results_file: JSON file of the results
+    """
+    with open(results_file, "w", encoding="utf-8") as file:
+        json.dump(results, file, indent=4, ensure_ascii=False)
+
+
+def compare_with_baseline(results: dict[str, dict], baseline: dict[str, dict],
+                          threshold: float = 0.2) -> list[str]:
+    """
+    Print the change of the median runtime of each benchmark compared to the baseline and return the names of
+    the benchmarks that are slower than the baseline by more than the threshold.
+    :param results: results of the current run
+    :param baseline: results of the baseline
+    :param threshold: accepted relative slowdown, e.g. 0.2 for 20 %
+    """
+    regressions = []
+    for name, result in results.items():
+        if "median" not in result:
+            print(f'{name:55s} {result.get("skipped", "")}')
+            continue
+        reference = baseline.get(name, {}).get("median")
+        if not reference:
+            print(f'{name:55s} {result["median"] * 1000:12.3f} ms   (keine Baseline)')
+            continue
+        change = result["median"] / reference - 1
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f'{name:55s} {result["median"] * 1000:12.3f} ms {change:+8.1%}{flag}')
+    return regressions
@@ -0,0 +1,52 @@
+from __future__ import annotations
+import os
+import statistics
+import subprocess
+import sys
+from benchmarks.harness import BENCHMARKS_DIR
+
+REPO_DIR = BENCHMARKS_DIR.parent
+# Imports measured by the import benchmarks: the entry point, the helpers, the login GUI and the stage modules
+IMPORTS = {
+    "import.main": "import main",
+    "import.helpers": "import helpers",
+    "import.login_gui": "from gui.login_credentials import create_login_gui",
+    "import.preflight": "from creation.preflight import preflight_projects",
+    "import.stages": "import creation.projects_creation, assessment.life_cycle_interpretation_assessments, "
+                     "assessment.final_rating_diagram",
+}
+
+
+def import_time(statement: str) -> float:
+    """
+    Return the time in seconds needed to run an import statement in a new Python process (cold start without
+    already imported modules). The start of the interpreter itself is not included.
+    :param statement: import statement, e.g. import main
+    """
+    code = f"import time; start = time.perf_counter(); {statement}; print(time.perf_counter() - start)"
+    environment = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(REPO_DIR),
+                                                                             os.environ.get("PYTHONPATH")])))
+    completed = subprocess.run([sys.executable, "-c", code], cwd=REPO_DIR, env=environment, check=True,
+                               capture_output=True, text=True)
+    return float(completed.stdout.strip().splitlines()[-1])
+
+
+def run_import_benchmarks(repeat: int = 5, name_filter: str = "") -> dict[str, dict]:
+    """
+    Run the import benchmarks and return their results. Each repetition imports the modules in a new process.
+    Slow imports can be found with python -X importtime -c "<import statement>".
+    :param repeat: number of repetitions of each benchmark
+    :param name_filter: only run the benchmarks whose name contains this text
+    """
+    results = {}
+    for name, statement in IMPORTS.items():
+        if name_filter not in name:
+            continue
+        try:
+            times = [import_time(statement) for _ in range(repeat)]
+        except subprocess.CalledProcessError as error:
+            results[name] = {"skipped": f"Fehler: {error.stderr.strip().splitlines()[-1]}"}
+            continue
+        results[name] = {"median": statistics.median(times), "min": min(times), "max": max(times),
+                         "repeat": repeat}
+    return results
@@ -0,0 +1,91 @@
+from __future__ import annotations
+import argparse
+import json
+import os
+import shutil
+import socket
+import time
+import traceback
+from pathlib import Path
+
+# Macro benchmark of the whole pipeline from prepare_projects_data to create_rating_diagram for the example
+# district (archetypes A - D). The benchmark is started by python -m benchmarks in a separate process with a
+# temporary working directory, because the stages read and write relative paths and the eLCA base URL is read
+# from ELCA_BASE_URL when helpers is imported.
+REPO_DIR = Path(__file__).resolve().parent.parent
+EXAMPLE_DIR = REPO_DIR / "additional_material_example_buildings" / "model_buildings"
+# Stages that request eLCA and are only run with recorded eLCA responses
+ELCA_STAGES = ["create_elca_projects", "compile_lci", "calculate_lcia"]
+
+
+def prepare_workdir(workdir: Path) -> None:
+    """
+    Copy the input data of the example district and the data files of the stages into the working directory.
+    The report data of the example district is copied as well, so that the evaluation stages can run without
+    eLCA.
+    :param workdir: temporary working directory
+    """
+    shutil.copytree(EXAMPLE_DIR / "temp_data", workdir / "temp_data")
+    shutil.copytree(EXAMPLE_DIR / "report_data", workdir / "report_data")
+    (workdir / "creation").mkdir()
+    shutil.copy(REPO_DIR / "creation" / "savings.csv", workdir / "creation")
+    (workdir / "assessment").mkdir()
+    for data_file in list((REPO_DIR / "assessment").glob("*.json")) + list((REPO_DIR / "assessment").glob("*.csv")):
+        shutil.copy(data_file, workdir / "assessment")
+
+
+def run_pipeline(recordings: str = None, latency: float = 0.0) -> dict[str, dict]:
+    """
+    Run the stages of the pipeline in the current working directory and return the runtime of each stage.
+    :param recordings: folder with recorded eLCA responses for the stub server, without recordings the stages
+            that request eLCA are skipped
+    :param latency: latency of the stub server in seconds
+    """
+    server = None
+    if recordings:
+        # The base URL has to be set before helpers is imported
+        with socket.socket() as free_socket:
+            free_socket.bind(("127.0.0.1", 0))
+            port = free_socket.getsockname()[1]
+        os.environ["ELCA_BASE_URL"] = f"http://127.0.0.1:{port}"
+        from helpers.stub_server import start_stub_server
+        server = start_stub_server(recordings=recordings, port=port, latency=latency)
+    from creation.projects_data import prepare_projects_data
+    from creation.projects_creation import create_elca_projects
+    from assessment.life_cycle_inventory_assessments import compile_lci
+    from assessment.life_cycle_impact_assessments import calculate_lcia
+    from assessment.life_cycle_interpretation_assessments import interpret_lca
+    from assessment.life_cycle_costing_assessments import analyse_life_cycle_costs
+    from assessment.final_rating_diagram import create_rating_diagram
+
+    results = {}
+    for stage in [prepare_projects_data, create_elca_projects, compile_lci, calculate_lcia, interpret_lca,
+                  analyse_life_cycle_costs, create_rating_diagram]:
+        name = f"macro.{stage.__name__}"
+        if server is None and stage.__name__ in ELCA_STAGES:
+            results[name] = {"skipped": "keine aufgezeichneten eLCA-Antworten in benchmarks/fixtures"}
+            continue
+        start = time.perf_counter()
+        try:
+            stage()
+        except Exception as error:
+            results[name] = {"skipped": f"Fehler: {error!r}",
+                             "traceback": "".join(traceback.format_exception(type(error), error,
+                                                                             error.__traceback__))}
+            continue
+        duration = time.perf_counter() - start
+        results[name] = {"median": duration, "min": duration, "max": duration, "repeat": 1}
+    if server is not None:
+        server.shutdown()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Macro benchmark of the eLCArefurb pipeline")
+    parser.add_argument("--output", required=True, help="JSON file for the results")
+    parser.add_argument("--recordings", default=None)
+    parser.add_argument("--latency", type=float, default=0.0)
+    arguments = parser.parse_args()
+    pipeline_results = run_pipeline(arguments.recordings, arguments.latency)
+    with open(arguments.output, "w", encoding="utf-8") as output_file:
+        json.dump(pipeline_results, output_file, indent=4, ensure_ascii=False)
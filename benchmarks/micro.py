@@ -0,0 +1,152 @@
+from __future__ import annotations
+import json
+import tempfile
+from pathlib import Path
+from typing import Callable
+import numpy as np
+import pandas as pd
+from helpers import ElcaClient, diff_two_dataframes, pandas_convert_decimals, create_table, \
+    create_five_grouped_table, create_four_grouped_table, create_grouped_bar_chart, create_stacked_bar_chart, \
+    create_facetted_bar_chart, create_vertical_bar_chart, create_scatter, create_facetted_scatter, TemplateCatalog
+from creation.projects_data import load_savings, lookup_savings
+from assessment.life_cycle_costing_assessments import calculate_npv
+from assessment.life_cycle_inventory_assessments import harvest_lci_project
+from assessment.life_cycle_impact_assessments import harvest_lcia_project
+from benchmarks.district_generator import synthetic_template_catalog
+from benchmarks.harness import EXAMPLE_DIR, FIXTURES_DIR, measure
+from benchmarks.replay import ReplaySession
+
+REPORT_DIR = EXAMPLE_DIR / "report_data"
+ARCHETYPES = ["A", "B", "C", "D"]
+VARIANTS = ["Bestand", "Außenwandsanierung", "Dachsanierung", "Fenstersanierung", "Komplettsanierung"]
+
+
+def example_masses(archetype: str) -> dict[str, pd.DataFrame]:
+    """
+    Return the masses of the building materials of the projects of an example archetype in the format of
+    harvest_lci_project, read from the life cycle inventory of the example district.
+    :param archetype: name of the example archetype
+    """
+    df_materials = pd.read_csv(REPORT_DIR / "life_cycle_inventory" / f"{archetype}Baustoffe.csv")
+    masses = {}
+    for variant in VARIANTS:
+        df_variant = pandas_convert_decimals(df_materials.copy(), f"Masse in kg {variant}")
+        df_variant = df_variant[df_variant[f"Masse in kg {variant}"] > 0]
+        masses[variant] = df_variant[["Prozess", "Bauteil", f"Masse in kg {variant}"]].rename(
+            columns={f"Masse in kg {variant}": "Masse in kg"}).reset_index(drop=True)
+    return masses
+
+
+def example_variants() -> pd.DataFrame:
+    """
+    Return the GWP of the projects of the example district as tidy dataframe for the chart benchmarks.
+    """
+    rows = []
+    for archetype in ARCHETYPES:
+        df_impact = pd.read_csv(REPORT_DIR / "life_cycle_impact" / f"{archetype}Wirkungsanalyse.csv")
+        df_impact = df_impact.set_index("Wirkungsanalyse")
+        for variant in VARIANTS:
+            for module in ["GWP pro Gebäude", "Modul B6", "Konstruktion (KGR 300)"]:
+                value = float(str(df_impact.loc[module, f"{archetype} {variant}"]).replace(",", "."))
+                rows.append({"Archetyp": archetype, "Variante": variant, "Modul": module, "GWP in kg/m²a": value})
+    return pd.DataFrame(rows)
+
+
+def micro_benchmarks(folder: Path) -> dict[str, Callable[[], object]]:
+    """
+    Return the micro benchmarks as dictionary with the benchmark names as keys and functions without
+    arguments as values.
+    :param folder: temporary folder for the files written by the chart and table helpers
+    """
+    benchmarks = {}
+
+    # Data frame helpers
+    masses = example_masses("A")
+    benchmarks["micro.diff_two_dataframes"] = \
+        lambda: diff_two_dataframes(masses["Bestand"], masses["Komplettsanierung"])
+
+    # Net present value of the energy costs of a large district (1000 archetypes)
+    df_energy = pd.read_csv(REPORT_DIR / "life_cycle_inventory" / "Gebäudebetrieb.csv")
+    for column in ["NFA in m²", "Bestand Endenergie in kWh/m²a"]:
+        df_energy = pandas_convert_decimals(df_energy, column)
+    df_energy = pd.concat([df_energy] * 250, ignore_index=True)
+    prices = pd.Series(0.06, index=df_energy.index)
+    benchmarks["micro.calculate_npv"] = lambda: calculate_npv(
+        df_energy["NFA in m²"], df_energy["Bestand Endenergie in kWh/m²a"], prices, 0.015, 0.05)
+
+    # Savings lookup of savings.csv for a large district
+    with open(EXAMPLE_DIR / "temp_data" / "archetypes.json", encoding="utf-8") as file:
+        archetypes = json.load(file) * 250
+    savings_file = Path(__file__).resolve().parent.parent / "creation" / "savings.csv"
+    savings_dict = load_savings(savings_file)
+    benchmarks["micro.load_savings"] = lambda: load_savings(savings_file)
+    benchmarks["micro.lookup_savings"] = lambda: [
+        lookup_savings(savings_dict, archetype["building age class"], archetype["energy carrier template"])
+        for archetype in archetypes]
+
+    # Template catalog of the GUIs with a large template library (2000 templates per cost group): building the
+    # indexes, the search while typing in a template combo box and the U-value lookups
+    catalog_templates = [entry["template"] for entry in
+                         synthetic_template_catalog(2000, np.random.default_rng(0)).values()]
+    stock_templates = [template for template in catalog_templates if "Sanierung" not in template["template_name"]]
+    refurb_templates = [template for template in catalog_templates if "Sanierung" in template["template_name"]]
+    refurb_alternatives = {template["UUID"]: str(int(template["UUID"]) + 1) for template in stock_templates}
+    catalog = TemplateCatalog(stock_templates, refurb_templates, refurb_alternatives)
+    benchmarks["micro.template_catalog"] = \
+        lambda: TemplateCatalog(stock_templates, refurb_templates, refurb_alternatives)
+    search_text = "Außenwand synthetisch 1234"
+    benchmarks["micro.template_search"] = lambda: [catalog.search(search_text[:length], "330", 50)
+                                                   for length in range(1, len(search_text) + 1)]
+    benchmarks["micro.template_u_values"] = lambda: [catalog.refurbishment_u_value(template["UUID"])
+                                                     for template in stock_templates]
+
+    # Extractors of the eLCA responses, only with recorded responses
+    if any(FIXTURES_DIR.glob("*.json")):
+        client = ElcaClient(ReplaySession(FIXTURES_DIR))
+        benchmarks["micro.harvest_lci_project"] = lambda: harvest_lci_project(client, "0", "A Bestand")
+        benchmarks["micro.harvest_lcia_project"] = lambda: harvest_lcia_project(client, "0", "A Bestand")
+
+    # Chart and table helpers
+    df_variants = example_variants()
+    df_gwp = df_variants[df_variants["Modul"] == "GWP pro Gebäude"][["Archetyp", "Variante", "GWP in kg/m²a"]]
+    df_modules = df_variants[["Archetyp", "Variante", "Modul", "GWP in kg/m²a"]]
+    df_table = df_variants.pivot_table(index=["Archetyp", "Variante"], columns="Modul",
+                                       values="GWP in kg/m²a").reset_index()
+    directory = str(folder)
+    benchmarks["micro.create_table"] = lambda: create_table(df_table, "Tabelle", f"{directory}/Tabelle", 1000)
+    benchmarks["micro.create_five_grouped_table"] = \
+        lambda: create_five_grouped_table(df_table, "Tabelle", f"{directory}/FuenferTabelle", 1000)
+    benchmarks["micro.create_four_grouped_table"] = \
+        lambda: create_four_grouped_table(df_table, "Tabelle", f"{directory}/ViererTabelle", 1000)
+    benchmarks["micro.create_grouped_bar_chart"] = \
+        lambda: create_grouped_bar_chart(df_gwp, "GWP", "GWP in kg/m²a", directory)
+    benchmarks["micro.create_stacked_bar_chart"] = \
+        lambda: create_stacked_bar_chart(df_modules, "Module", "GWP in kg/m²a", directory)
+    benchmarks["micro.create_facetted_bar_chart"] = lambda: create_facetted_bar_chart(
+        df_modules, "Modul", list(df_modules["Modul"].unique()), f"{directory}/Facetten.pdf", "GWP in kg/m²a")
+    benchmarks["micro.create_vertical_bar_chart"] = \
+        lambda: create_vertical_bar_chart(df_gwp, "Vertikal", "GWP in kg/m²a", "Archetyp", directory)
+    benchmarks["micro.create_scatter"] = lambda: create_scatter(
+        df_table, "GWP pro Gebäude", "Modul B6", "Punkte", f"{directory}/Punkte.pdf")
+    benchmarks["micro.create_facetted_scatter"] = lambda: create_facetted_scatter(
+        df_modules, "GWP in kg/m²a", "Archetyp", "Modul", "Punkte", f"{directory}/FacettenPunkte.pdf")
+    return benchmarks
+
+
+def run_micro_benchmarks(repeat: int = 5, name_filter: str = "") -> dict[str, dict]:
+    """
+    Run the micro benchmarks and return their results. Benchmarks of the eLCA extractors are skipped if there
+    are no recorded eLCA responses in benchmarks/fixtures.
+    :param repeat: number of repetitions of each benchmark
+    :param name_filter: only run the benchmarks whose name contains this text
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as folder:
+        benchmarks = micro_benchmarks(Path(folder))
+        for name, function in benchmarks.items():
+            if name_filter in name:
+                results[name] = measure(function, repeat)
+    if not any(FIXTURES_DIR.glob("*.json")):
+        for name in ["micro.harvest_lci_project", "micro.harvest_lcia_project"]:
+            results[name] = {"skipped": "keine aufgezeichneten eLCA-Antworten in benchmarks/fixtures"}
+    return results
@@ -0,0 +1,52 @@
+from __future__ import annotations
+from pathlib import Path
+import requests
+from helpers import BASE_URL
+from helpers.elca_recordings import find_recording, load_recordings
+
+
+class ReplaySession:
+    """
+    Stand-in for the login session of ElcaClient that answers the requests with recorded responses of eLCA
+    (see ELCA_RECORD_DIR) without any network, so that the benchmarks measure only the processing of the
+    responses. Requests that were not recorded are answered with a recorded response of the same endpoint.
+    """
+
+    def __init__(self, recordings: str | Path):
+        """
+        :param recordings: folder with the recorded responses of eLCA
+        """
+        self.by_request, self.by_endpoint = load_recordings(recordings)
+        self.headers = {}
+        self.cookies = requests.cookies.RequestsCookieJar()
+
+    def mount(self, prefix: str, adapter) -> None:
+        # There are no connections to eLCA
+        pass
+
+    def request(self, method: str, url: str, params=None, **kwargs) -> requests.Response:
+        """
+        Return the recorded response to a request as requests.Response.
+        :param method: HTTP method of the request
+        :param url: URL of the request
+        :param params: params of the request, which are part of the recorded request
+        """
+        prepared = requests.Request(method, url, params=params).prepare()
+        recording = find_recording(self.by_request, self.by_endpoint, method, prepared.path_url)
+        response = requests.Response()
+        response.request = prepared
+        response.url = prepared.url
+        response.encoding = "utf-8"
+        if recording is None:
+            response.status_code = 404
+            response._content = f"No recording of {method} {url[len(BASE_URL):]}".encode("utf-8")
+        else:
+            response.status_code = recording["status"]
+            response._content = recording["body"].encode("utf-8")
+        return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
@@ -0,0 +1,215 @@
+from __future__ import annotations
+import argparse
+from pathlib import Path
+import pandas as pd
+from helpers import traced, load_component_json, save_component_json
+from creation.preflight import COMPONENTS, POSITIVE_COLUMNS, validate_archetypes
+
+# Columns of the archetype files, named as in archetypes.json. The IDs of the templates and of the energy carrier
+# are optional, they are looked up from the names
+NAME_COLUMNS = ['archetype name', 'energy carrier template', 'exterior walls template', 'window template',
+                'roof template', 'building age class']
+NUMBER_COLUMNS = ['GFA in m²', 'NFA in m²', 'final energy heating in kWh/m²a', 'final energy hot water in kWh/m²a',
+                  'exterior walls area in m²', 'roof area in m²', 'number of windows']
+# Maximum number of problems printed, all problems are returned
+MAX_PRINTED_PROBLEMS = 50
+
+
+def read_archetypes_file(archetypes_file: str | Path) -> pd.DataFrame:
+    """
+    Read the archetypes of a district from a CSV, XLSX or JSON file with one row per archetype. CSV files may be
+    separated by commas or semicolons and use decimal commas (e.g. exported by Excel with German settings).
+    :param archetypes_file: path of the file, the format is given by the file extension
+    """
+    suffix = Path(archetypes_file).suffix.lower()
+    if suffix == '.csv':
+        # Separator detected from the file, all values are read as text and converted below
+        df = pd.read_csv(archetypes_file, sep=None, engine='python', dtype=str, encoding='utf-8-sig')
+    elif suffix in ('.xlsx', '.xlsm'):
+        df = pd.read_excel(archetypes_file, dtype=str, engine='openpyxl')
+    elif suffix == '.json':
+        df = pd.DataFrame(load_component_json(Path(archetypes_file).stem, str(Path(archetypes_file).parent)))
+    else:
+        raise ValueError(f'Das Format der Datei {archetypes_file} wird nicht unterstützt (CSV, XLSX oder JSON).')
+    # Surrounding spaces of the column names and texts are removed, empty rows are ignored
+    df.columns = [str(column).strip() for column in df.columns]
+    df = df.dropna(how='all').reset_index(drop=True)
+    for column in df.columns:
+        if df[column].dtype == object:
+            df[column] = df[column].str.strip() if df[column].map(type).eq(str).all() else df[column]
+    return df
+
+
+def resolve_archetypes(df_archetypes: pd.DataFrame, stock_templates: list[dict],
+                       energy_sources: dict[str, str], age_classes: list[str]) -> tuple[pd.DataFrame, list[str]]:
+    """
+    Complete the archetypes with the IDs of their templates and energy carriers and convert the quantities to
+    numbers, all archetypes at once. The template names are looked up in the templates of the cost group of the
+    component, the energy carrier names in the energy sources of eLCA. Names are compared without regard to
+    upper and lower case. Return the completed archetypes and a list with a description of each mistake
+    (empty if all names and numbers are valid).
+    :param df_archetypes: DataFrame with one row per archetype (see read_archetypes_file)
+    :param stock_templates: existing components with refurbishment alternative (see stock_templates.json)
+    :param energy_sources: dictionary with names of energy sources as keys and corresponding IDs as values
+    :param age_classes: building age classes of eLCArefurb (see construction_age_classes.txt)
+    """
+    df = df_archetypes.copy()
+    missing_columns = [column for column in NAME_COLUMNS + NUMBER_COLUMNS if column not in df.columns]
+    if missing_columns:
+        return df, [f'In der Datei fehlen die Spalten: {", ".join(missing_columns)}']
+    problems = []
+    names = df['archetype name'].astype(str)
+
+    def report(mask: pd.Series, message: str) -> None:
+        # Add one problem for every archetype of the mask
+        problems.extend(f'Archetyp {name}: {message}' for name in names[mask])
+
+    # Quantities, also with decimal commas
+    for column in NUMBER_COLUMNS:
+        text = df[column].astype(str).str.replace(',', '.', regex=False)
+        values = pd.to_numeric(text, errors='coerce')
+        report(values.isna(), f'"{column}" ist keine Zahl.')
+        df[column] = values
+    if 'number of heating supply systems' not in df.columns:
+        df['number of heating supply systems'] = 1
+    for column in ['number of windows', 'number of heating supply systems']:
+        values = pd.to_numeric(df[column], errors='coerce')
+        report(values.isna() | (values != values.round()), f'"{column}" muss eine ganze Zahl sein.')
+        df[column] = values
+
+    # Templates by name in the cost group of the component, names that are used by several templates of the
+    # cost group cannot be resolved
+    df_templates = pd.DataFrame(stock_templates, columns=['template_name', 'CG_DIN_276', 'UUID'])
+    df_templates['key'] = df_templates['template_name'].str.casefold()
+    for template_column, id_column, cost_group in COMPONENTS:
+        group = df_templates[df_templates['CG_DIN_276'].astype(str) == str(cost_group)]
+        ambiguous = set(group.loc[group['key'].duplicated(), 'key'])
+        lookup = group.drop_duplicates('key').set_index('key')
+        keys = df[template_column].astype(str).str.casefold()
+        if id_column in df.columns:
+            # Given IDs are kept, the name is only looked up for archetypes without ID
+            given = df[id_column].notna() & (df[id_column].astype(str).str.strip() != '')
+        else:
+            given = pd.Series(False, index=df.index)
+        found = keys.isin(lookup.index)
+        report(~given & ~found, f'Die Bauteilvorlage "{template_column}" ist unbekannt.')
+        report(~given & keys.isin(ambiguous), f'Der Name der Bauteilvorlage "{template_column}" ist mehrdeutig, '
+                                              f'bitte die ID in "{id_column}" angeben.')
+        ids = keys.map(lookup['UUID'])
+        df[id_column] = df[id_column].where(given, ids) if id_column in df.columns else ids
+        df[template_column] = df[template_column].where(~found, keys.map(lookup['template_name']))
+        df[id_column] = df[id_column].astype(str)
+
+    # Energy carriers by name
+    carriers = pd.Series(energy_sources)
+    carrier_lookup = pd.Series(carriers.index, index=carriers.index.str.casefold())
+    carrier_keys = df['energy carrier template'].astype(str).str.casefold()
+    found = carrier_keys.isin(carrier_lookup.index)
+    report(~found, 'Der Energieträger ist in energy_sources.json unbekannt.')
+    df['energy carrier template'] = df['energy carrier template'].where(~found, carrier_keys.map(carrier_lookup))
+    df['energy carrier ID'] = df['energy carrier template'].map(carriers).astype(str)
+
+    report(~df['building age class'].isin(age_classes), 'Die Baualtersklasse ist unbekannt.')
+    return df, problems
+
+
+def load_age_classes() -> list[str]:
+    """
+    Return the building age classes of eLCArefurb from creation/construction_age_classes.txt.
+    """
+    with open(Path('creation') / 'construction_age_classes.txt', encoding="utf-8") as file:
+        return [line.strip().rstrip(',') for line in file if line.strip()]
+
+
+def load_archetype_references(folder: str = "temp_data") -> dict:
+    """
+    Load the data the archetypes are checked against: the templates read by collect_templates, the energy
+    sources, the building age classes and the energy savings of savings.csv.
+    :param folder: Name of the folder of the template files
+    """
+    return {'stock_templates': load_component_json("stock_templates", folder),
+            'refurb_alternatives': load_component_json("refurb_alternatives", folder),
+            'refurb_templates': load_component_json("refurb_templates", folder),
+            'energy_sources': load_component_json("energy_sources", "creation"),
+            'age_classes': load_age_classes(),
+            'savings': pd.read_csv(Path('creation') / 'savings.csv', encoding="utf-8")}
+
+
+def check_archetypes(df_archetypes: pd.DataFrame, references: dict) -> tuple[pd.DataFrame, list[str]]:
+    """
+    Complete the archetypes with the IDs of their templates and energy carriers (see resolve_archetypes) and
+    validate them with the checks of preflight_projects. Return the completed archetypes and the list of
+    problems, which is empty if all archetypes are valid.
+    :param df_archetypes: DataFrame with one row per archetype
+    :param references: data the archetypes are checked against (see load_archetype_references)
+    """
+    df_archetypes, problems = resolve_archetypes(df_archetypes, references['stock_templates'],
+                                                 references['energy_sources'], references['age_classes'])
+    if not problems:
+        problems = validate_archetypes(df_archetypes, references['refurb_alternatives'], references['savings'])
+    return df_archetypes, problems
+
+
+def archetype_records(df_archetypes: pd.DataFrame) -> list[dict]:
+    """
+    Return valid archetypes as list of dictionaries with the types of archetypes.json as written by the GUI.
+    :param df_archetypes: archetypes completed by check_archetypes
+    """
+    df = df_archetypes.copy()
+    df['number of windows'] = df['number of windows'].astype(int)
+    df['number of heating supply systems'] = df['number of heating supply systems'].astype(int)
+    for column in POSITIVE_COLUMNS + ['final energy hot water in kWh/m²a']:
+        if column != 'number of windows':
+            df[column] = df[column].astype(float)
+    return df.to_dict(orient='records')
+
+
+@traced()
+def import_archetypes(archetypes_file: str | Path, folder: str = "temp_data") -> list[dict]:
+    """
+    Import the archetypes of a district from a CSV, XLSX or JSON file instead of entering them one by one in the
+    GUI of create_buildings_gui, e.g. from a district database. Each row of the file describes an archetype with
+    the columns of archetypes.json: the names of the templates and of the energy carrier are sufficient, their
+    IDs are looked up. All archetypes are validated at once, including the checks of preflight_projects, and
+    archetypes.json is only written if all archetypes are valid. Return the imported archetypes.
+
+    :param archetypes_file: path of the file with the archetypes
+    :param folder: Name of the folder where the JSON files are saved
+
+    Input:
+    1) File with one row per archetype and the columns archetype name, GFA in m², NFA in m²,
+       final energy heating in kWh/m²a, final energy hot water in kWh/m²a, exterior walls area in m²,
+       roof area in m², number of windows, energy carrier template, exterior walls template, window template,
+       roof template and building age class. Optional: number of heating supply systems (default 1) and the IDs
+       of the templates (exterior walls ID, window ID, roof ID).
+    2) stock_templates.json and refurb_alternatives.json: templates read by collect_templates
+    3) creation/energy_sources.json, creation/construction_age_classes.txt, creation/savings.csv
+
+    Output:
+    1) archetypes.json: List of dictionaries, where each dictionary describes an archetype of the district.
+    2) ValueError if an archetype is invalid, archetypes.json is not changed in this case
+
+    """
+    df_archetypes = read_archetypes_file(archetypes_file)
+    references = load_archetype_references(folder)
+    df_archetypes, problems = check_archetypes(df_archetypes, references)
+    if problems:
+        for problem in problems[:MAX_PRINTED_PROBLEMS]:
+            print(problem)
+        if len(problems) > MAX_PRINTED_PROBLEMS:
+            print(f'... und {len(problems) - MAX_PRINTED_PROBLEMS} weitere Fehler')
+        raise ValueError(f'In {archetypes_file} wurden {len(problems)} Fehler gefunden, die Archetypen wurden '
+                         f'nicht importiert.')
+
+    archetypes = archetype_records(df_archetypes)
+    save_component_json(archetypes, "archetypes", folder)
+    print(f'{len(archetypes)} Archetypen wurden aus {archetypes_file} importiert.')
+    return archetypes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import the archetypes of a district from a CSV, XLSX or JSON file")
+    parser.add_argument("archetypes_file", help="file with one row per archetype")
+    parser.add_argument("--folder", default="temp_data", help="folder of archetypes.json and the template files")
+    arguments = parser.parse_args()
+    import_archetypes(arguments.archetypes_file, arguments.folder)
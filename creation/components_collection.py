@@ -1,11 +1,205 @@
 from __future__ import annotations
+import hashlib
 import json
 import re
-from bs4 import BeautifulSoup
-from helpers import login, create_post_soup, load_component_json, save_component_json, save_elca_csv
+from concurrent.futures import ThreadPoolExecutor
+from itertools import count
+from pathlib import Path
+from helpers import ElcaClient, get_client, load_login_credentials, load_component_json, save_component_json, \
+    save_elca_csv, save_endpoint_latency, parse_soup, traced
 
+# These elements are excluded in eLCArefurb, as they do not allow independent modelling of window and wall
+WRONG_ELEMENTS = [
+    "2016_AW_mit_Fenster_Beispiel",
+    "m²_Fenster / Isoglas 2-Scheiben / Alurahmen",
+    "Stück_Fenster_1,6m² / Isoglas 2-Scheiben / Alurahmen",
+    "Außenwand / einschaliges Mauerwerk / WDVS mit Fenster"
+]
 
-def collect_templates():
+# Component groups read from eLCA with their cost group IDs
+COMPONENT_GROUPS: list[tuple[str, str]] = [("outer_walls", "246"), ("roofs", "269"), ("windows", "250")]
+
+
+def find_all_element_ids(response_text: str,
+                         filter_names: list[str] = None) -> dict[str, str]:
+    """
+    Read the IDs of the components on a page of the eLCA template list. For each component a signature
+    of its entry in the list is created. If the signature of a component is unchanged since the last
+    execution, the component has not been changed in eLCA and does not have to be read again.
+    Return a dictionary with the element IDs as keys and the signatures as values.
+    :param response_text: JSON response of the template list
+    :param filter_names: names of components that are not read in
+    """
+    elements_view = json.loads(response_text)["Elca\\View\\ElcaElementsView"]
+    elements_soup = parse_soup(elements_view)
+    id_expr = re.compile(r"elca-sheet-(\d+)")
+    name_expr = re.compile(r"(.+) \[\d+]")
+    ids = {}
+    for element in list(elements_soup.find_all(name="div", attrs={"class": "elca-element-sheet"})):
+        element_name_import = name_expr.search(element.find(name="h2", attrs={"class": "headline"}).text).group(1)
+        element_name = element_name_import.replace(" (Importiert)", "")
+        # if the element name matches with any of the names of the defined wrong_elements, stop and don't append
+        # this element id
+        if filter_names and any(wrong_element == element_name for wrong_element in filter_names):
+            continue
+
+        signature = hashlib.sha256(str(element).encode("utf-8")).hexdigest()
+        ids[re.search(id_expr, element.attrs["id"]).group(1)] = signature
+    return ids
+
+
+def list_element_ids(client: ElcaClient, component_no: str, executor: ThreadPoolExecutor,
+                     page_window: int = 4) -> dict[str, str]:
+    """
+    Read the IDs and signatures of all private component templates of a cost group from the template list
+    in eLCA (see find_all_element_ids). The following pages of the list are requested in parallel in windows
+    of several pages, until a window contains an empty page.
+    :param client: eLCA client
+    :param component_no: ID of the cost group in eLCA
+    :param executor: thread pool the pages are requested with
+    :param page_window: number of pages that are requested at the same time
+    """
+    first_page_response = client.list_elements(data={
+        #  Each component category has an ID, see COMPONENT_GROUPS
+        't': component_no,
+        'search': '',
+        'constrCatalogId': '',
+        'constrDesignId': '',
+        # "53" is Ökobaudat 2021 II ID, but there are errors in this database,
+        # that's why Ökobaudat 2016 is chosen with the ID "45".
+        'processDbId': '45',
+        # Only private components should be read in, since only these
+        # can ensure that they meet the requirements for modeling in
+        # eLCArefurb. Public component templates are subject to change
+        # over time that could generate an error output in eLCArefurb
+        'scope': 'private'
+    })
+    # The components defined above, which can not be eco-balanced via eLCArefurb, are not
+    # read in, this is ensured by the parameter filter_names
+    element_ids = find_all_element_ids(first_page_response.text, filter_names=WRONG_ELEMENTS)
+
+    def read_page(i: int) -> dict[str, str]:
+        next_page_response = client.list_elements(component_no=component_no, page=i)
+        return find_all_element_ids(next_page_response.text, filter_names=WRONG_ELEMENTS)
+
+    # The display of the part templates can take up several pages in eLCA.
+    # Therefore, all pages are read starting from page 1, several pages at the same time.
+    # As soon as a page is empty the reading of parts is interrupted, the pages after the empty page are ignored.
+    for first_page in count(1, page_window):
+        # map returns the pages in their order, so the element IDs are always merged in the order of the list
+        for new_element_ids in executor.map(read_page, range(first_page, first_page + page_window)):
+            if not new_element_ids:
+                return element_ids
+            # Append to the List of element IDS
+            element_ids.update(new_element_ids)
+
+
+@traced("template")
+def read_element_details(client: ElcaClient, component: str, element_id: str) -> dict:
+    """
+    Read the information on a component template from its page in eLCA.
+    Return a dictionary with the name, cost group, ID, description, publicity and U-value of the template and
+    whether the template is a window created with the window wizard.
+    :param client: eLCA client
+    :param component: component group of the template (outer_walls, roofs or windows)
+    :param element_id: ID of the template in eLCA
+    """
+    # Enter the template page in eLCA
+    element_response = client.get_element_details(element_id)
+    # Windows have a different website structure in eLCA than exterior walls and roofs,
+    # therefore the information on Windows is retrieved differently than the information
+    # about the other components, which is expressed here by "if" and "else".
+    if component == "windows":
+        # The JSON response has several sections, including: ElcaOsitView and ElcaElementView
+        # For windows: the ElcaOsitView section contains the information on the cost group and the template name
+        # ElcaElementView contains information on the description
+        first_section_element_html = json.loads(element_response.text)["Elca\\View\\ElcaOsitView"]
+        component_soup = parse_soup(first_section_element_html)
+        # Retrieve cost group of the template component
+        cost_group = re.search(r"(\d{3})", component_soup.find(name='a', attrs={'class': 'page'}).text).group(1)
+        # Retrieve template name
+        template_name_import = re.search(r"(.*) \[", component_soup.find(name='li', attrs={'class': 'library active'}).span.text).group(1)
+        template_name = template_name_import.replace(" (Importiert)", "")
+        try:
+            # Windows created via the window wizard in eLCA are represented by two different tabs.
+            # Through the second_window_tab_response the second tab is accessed
+            # The description of the window can only be accessed through this second tab
+            second_window_tab_response = client.get_element_general_tab(element_id)
+            second_window_tab_html = json.loads(second_window_tab_response.text)["Elca\\View\\ElcaElementView"]
+            soup_second_window_tab = parse_soup(second_window_tab_html)
+            # Description of the template
+            description = soup_second_window_tab.textarea.text
+            template_u_value = soup_second_window_tab.find(name='input', attrs={'name': 'attr[elca.uValue]'}).attrs['value']
+            window_assistant = True
+        # Windows that are not created using the window wizard
+        # (some windows of the public component templates, for example) have only one tab.
+        # So if there is no second tab, an attribute or key error occurs and the description
+        # of the window can be read in the original first tab
+        except (AttributeError, KeyError):
+            # JSON section ElcaElementView contains information on the description
+            second_section_element_html = json.loads(element_response.text)["Elca\\View\\ElcaElementView"]
+            description_soup = parse_soup(second_section_element_html)
+            description = description_soup.textarea.text
+            template_u_value = \
+            description_soup.find(name='input', attrs={'name': 'attr[elca.uValue]'}).attrs['value']
+            window_assistant = False
+        # At the beginning of the development of eLCArefurb, public templates were still included,
+        # therefore the information about the publicity of the templates is
+        # recorded in the dictionary for each component. In the further course of the software development,
+        # the decision was made to include only private components.
+        # All elements are private (see above)
+        public = False
+    else:
+        # This section is for roofs and outer walls
+        # Roofs and walls all have only one tab
+        first_section_element_html = json.loads(element_response.text)["Elca\\View\\ElcaElementView"]
+        soup_element_information = parse_soup(first_section_element_html)
+        template_name_item = soup_element_information.find(name='input', attrs={'name': 'name'})
+        # Full name of the component template
+        template_name_import = template_name_item.attrs['value']
+        template_name = template_name_import.replace(" (Importiert)", "")
+        # The public templates cannot be overwritten.
+        # This can be used to determine whether the templates are public or private (see comment above)
+        public = "readonly" in template_name_item.attrs
+        window_assistant = False
+        # Retrieve description
+        description = soup_element_information.textarea.text  # Beschreibung der Bauteilvorlage
+        template_u_value = soup_element_information.find(name='input', attrs={'name': 'attr[elca.uValue]'}).attrs['value']
+        # Second section of the JSON response contains the cost group
+        second_element_html = json.loads(element_response.text)['Elca\\View\\ElcaOsitView']
+        soup_element_cost_group_information = parse_soup(second_element_html)
+        cost_group = re.search(r"(\d{3})", soup_element_cost_group_information.find(name='a', attrs={'class': 'page'}).text).group(1)
+    # Append all information to dictionary
+    # This information is necessary to create projects in eLCA through CSV-Import
+    # only the information on publicity is not necessary
+    if template_u_value == "":
+        template_u_value = "no information in eLCA"
+    if description == "":
+        description = "no information in eLCA"
+    return {"template_name": template_name, "CG_DIN_276": cost_group, "UUID": element_id,
+            "description": description, "public": public, "U-Value": template_u_value,
+            "window assistant": window_assistant}
+
+
+def load_template_catalog(account: str, folder: str = "temp_data") -> dict[str, dict]:
+    """
+    Load the template catalog saved by the last execution of collect_templates. The catalog is a dictionary
+    with the element IDs as keys and dictionaries with the component group, the signature of the list entry
+    and the template information as values. An empty catalog is returned if there is no catalog yet or if it
+    was read from another eLCA account.
+    :param account: user name of the eLCA account the templates are read from
+    :param folder: Name of the folder where the catalog is saved
+    """
+    if not (Path(folder) / "template_catalog.json").exists():
+        return {}
+    catalog = load_component_json("template_catalog", folder)
+    if catalog.get("account") != account:
+        return {}
+    return catalog["templates"]
+
+
+@traced()
+def collect_templates(full_refresh: bool = False, max_workers: int = 8):
     """
     This function reads the energy sources, outer walls, windows and roofs from eLCA,
     which can be chosen by the user in the GUI dropdown-box from the next eLCArefurb function.
@@ -15,6 +209,9 @@ def collect_templates():
     they can be created in the indicated account via the eLCA Bauteileditor and in the
     "Vorlagen Erstellung" project.
     The components must then be saved as component templates.
+    The templates read from eLCA are saved in the template catalog temp_data/template_catalog.json. In further
+    executions only the template list is requested from eLCA and only templates that are new or have changed
+    since the last execution are read again.
     For each newly created existing component, a renovation component must be created,
     otherwise the components will not be read by eLCArefurb.
     The naming of the two matching components must comply with the following naming convention:
@@ -25,6 +222,9 @@ def collect_templates():
     and for refurbishment components some are not. Window refurbishment components are completely new, as they are
     replaced as a whole.
 
+    :param full_refresh: if True, all templates are read again from eLCA regardless of the template catalog
+    :param max_workers: number of parallel requests to read the template list and the templates
+
     Input:
     1) Components in eLCA account
     2) Energy carriers from elCA account
@@ -42,13 +242,60 @@ def collect_templates():
     6) templates.json: List of dictionaries, where each list element defines a component as a dictionary with
                         information on the component such as name, ID and cost group. This file contains both as-built
                         components and refurbishment components
+    7) template_catalog.json: Template catalog with the information on all templates and the signatures of their
+                        entries in the eLCA template list
 
     """
     # Note that the program has started
     print("Das Programm eLCArefurb wurde gestartet. Die Bauteilvorlagen aus eLCA werden eingelesen. In wenigen Sekunden wird die grafische Benutzeroberfläche angezeigt.")
-    session = login()
+    # Allow as many open connections as there are parallel requests
+    client = get_client(pool_maxsize=max_workers)
     # Selection of final energy source Category 8.06 Use (the broadest selection)
 
+    # Load the template catalog of the last execution, only new or changed templates are read from eLCA
+    account = load_login_credentials()[0]["User name"]
+    catalog = {} if full_refresh else load_template_catalog(account)
+    synced_catalog: dict[str, dict] = {}
+    # New or changed templates as tuples of component group, element ID and signature
+    stale_elements: list[tuple[str, str, str]] = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # The component groups are listed one after the other, as the list request sets the cost group
+        # in the eLCA session
+        for component, component_no in COMPONENT_GROUPS:
+            # The template list contains an entry for each template, which changes if the template is changed
+            for element_id, signature in list_element_ids(client, component_no, executor).items():
+                cached = catalog.get(element_id)
+                if cached and cached["component"] == component and cached["signature"] == signature:
+                    synced_catalog[element_id] = cached
+                else:
+                    # Placeholder to keep the order of the template list
+                    synced_catalog[element_id] = None
+                    stale_elements.append((component, element_id, signature))
+        # Get more information about new or changed component templates in parallel
+        element_dicts = executor.map(lambda element: read_element_details(client, element[0], element[1]),
+                                     stale_elements)
+        for (component, element_id, signature), element_dict in zip(stale_elements, element_dicts):
+            synced_catalog[element_id] = {"component": component, "signature": signature, "template": element_dict}
+    fetched = len(stale_elements)
+    # Templates that are no longer in the template list have been deleted in eLCA and are removed from the catalog
+    print(f'{fetched} Bauteilvorlagen wurden neu eingelesen, {len(synced_catalog) - fetched} Bauteilvorlagen '
+          f'wurden aus dem Katalog übernommen, {len(catalog.keys() - synced_catalog.keys())} Bauteilvorlagen '
+          f'wurden entfernt.')
+    save_component_json({"account": account, "templates": synced_catalog}, "template_catalog")
+    save_endpoint_latency()
+    # Assign the refurbishment alternatives and save the files of the templates
+    save_template_files(synced_catalog)
+    print('Alle in dem Account eLCArefurb hinterlegten Bauteilvorlagen wurden ausgelesen! Bestandsbauteile wurden Sanierungsalternativen zugeteilt!')
+
+
+def save_template_files(catalog_templates: dict[str, dict], folder: str = "temp_data") -> None:
+    """
+    Divide the templates of the template catalog into existing and refurbishment components, assign the
+    refurbishment alternatives to the existing components using the naming convention and save the files
+    used by the GUI and the project creation.
+    :param catalog_templates: templates of the template catalog with the element IDs as keys
+    :param folder: Name of the folder where the files are saved
+    """
     # List of all templates for testing reasons
     templates: list[dict] = []
     # List for the components to be available for selection in the gui
@@ -56,181 +303,43 @@ def collect_templates():
     # List of components that are available as refurbishment alternatives have the same name as the
     # Existing building components with "Sanierung" appendix
     refurb_templates: list[dict] = []
-    # Dictionary in which the refurbishment alternative is assigned to each existing building component
-    refurb_alternatives: dict = {}
-    # These elements are excluded in eLCArefurb, as they do not allow independent modelling of window and wall
-    wrong_elements = [
-        "2016_AW_mit_Fenster_Beispiel",
-        "m²_Fenster / Isoglas 2-Scheiben / Alurahmen",
-        "Stück_Fenster_1,6m² / Isoglas 2-Scheiben / Alurahmen",
-        "Außenwand / einschaliges Mauerwerk / WDVS mit Fenster"
-    ]
-
-    component_groups: list[tuple[str, str]] = [("outer_walls", "246"), ("roofs", "269"), ("windows", "250")]
-    for component, component_no in component_groups:
-        # Create a function to read the names and IDs of the components in the eLCA templates
-        def find_all_element_ids(response_text: str,
-                                 filter_names: list[str] = None) -> list[int]:
-            elements_view = json.loads(response_text)["Elca\\View\\ElcaElementsView"]
-            elements_soup = BeautifulSoup(elements_view, "lxml")
-            id_expr = re.compile(r"elca-sheet-(\d+)")
-            name_expr = re.compile(r"(.+) \[\d+]")
-            ids = []
-            for element in list(elements_soup.find_all(name="div", attrs={"class": "elca-element-sheet"})):
-                element_name_import = name_expr.search(element.find(name="h2", attrs={"class": "headline"}).text).group(1)
-                element_name = element_name_import.replace(" (Importiert)", "")
-                # if the element name matches with any of the names of the defined wrong_elements, stop and don't append
-                # this element id
-                if filter_names and any(wrong_element == element_name for wrong_element in wrong_elements):
-                    continue
-
-                ids.append(re.search(id_expr, element.attrs["id"]).group(1))
-            return ids
-
-        first_page_response = session.post('https://www.bauteileditor.de/elements/list/', data={
-            #  Each component category has an ID, see line 93 "component groups".
-            't': component_no,
-            'search': '',
-            'constrCatalogId': '',
-            'constrDesignId': '',
-            # "53" is Ökobaudat 2021 II ID, but there are errors in this database,
-            # that's why Ökobaudat 2016 is chosen with the ID "45".
-            'processDbId': '45',
-            # Only private components should be read in, since only these
-            # can ensure that they meet the requirements for modeling in
-            # eLCArefurb. Public component templates are subject to change
-            # over time that could generate an error output in eLCArefurb
-            'scope': 'private'
-        })
-        # The components defined above, which can not be eco-balanced via eLCArefurb, are not
-        # read in, this is ensured by the parameter filter_names
-        element_ids = find_all_element_ids(first_page_response.text, filter_names=wrong_elements)
-        # The display of the part templates can take up several pages in eLCA.
-        # Therefore, all pages are read starting from page 1.
-        # As soon as the "next_page_response" is no longer given (FALSE) the reading of parts is also interrupted.
-        i = 1
-        while True:
-            next_page_response = session.get(
-                f'https://www.bauteileditor.de/elements/list/?t={component_no}&page={i}',
-                data={'t': component_no, 'page': i}
-            )
-            new_element_ids = find_all_element_ids(next_page_response.text, filter_names=wrong_elements)
-
-            if not new_element_ids:
-                break
-            # Append to the List of element IDS
-            element_ids.extend(new_element_ids)
-            # Go to next page
-            i += 1
-        # Get more information about the component templates
-        # Iterate through all components using their IDs
-        for element_id in element_ids:
-            # Enter the template page in eLCA
-            element_response = session.get(f'https://www.bauteileditor.de/elements/{element_id}/')
-            # Windows have a different website structure in eLCA than exterior walls and roofs,
-            # therefore the information on Windows is retrieved differently than the information
-            # about the other components, which is expressed here by "if" and "else".
-            if component == "windows":
-                # The JSON response has several sections, including: ElcaOsitView and ElcaElementView
-                # For windows: the ElcaOsitView section contains the information on the cost group and the template name
-                # ElcaElementView contains information on the description
-                first_section_element_html = json.loads(element_response.text)["Elca\\View\\ElcaOsitView"]
-                component_soup = BeautifulSoup(first_section_element_html, 'lxml')
-                # Retrieve cost group of the template component
-                cost_group = re.search(r"(\d{3})", component_soup.find(name='a', attrs={'class': 'page'}).text).group(1)
-                # Retrieve template name
-                template_name_import = re.search(r"(.*) \[", component_soup.find(name='li', attrs={'class': 'library active'}).span.text).group(1)
-                template_name = template_name_import.replace(" (Importiert)", "")
-                try:
-                    # Windows created via the window wizard in eLCA are represented by two different tabs.
-                    # Through the second_window_tab_response the second tab is accessed
-                    # The description of the window can only be accessed through this second tab
-                    second_window_tab_response = session.get(f'https://www.bauteileditor.de/elements/general/?e={element_id}&tab=general')
-                    second_window_tab_html = json.loads(second_window_tab_response.text)["Elca\\View\\ElcaElementView"]
-                    soup_second_window_tab = BeautifulSoup(second_window_tab_html, 'lxml')
-                    # Description of the template
-                    description = soup_second_window_tab.textarea.text
-                    template_u_value = soup_second_window_tab.find(name='input', attrs={'name': 'attr[elca.uValue]'}).attrs['value']
-                # Windows that are not created using the window wizard
-                # (some windows of the public component templates, for example) have only one tab.
-                # So if there is no second tab, an attribute or key error occurs and the description
-                # of the window can be read in the original first tab
-                except AttributeError or KeyError:
-                    # JSON section ElcaElementView contains information on the description
-                    second_section_element_html = json.loads(element_response.text)["Elca\\View\\ElcaElementView"]
-                    description_soup = BeautifulSoup(second_section_element_html, 'lxml')
-                    description = description_soup.textarea.text
-                    template_u_value = \
-                    soup_second_window_tab.find(name='input', attrs={'name': 'attr[elca.uValue]'}).attrs['value']
-                # At the beginning of the development of eLCArefurb, public templates were still included,
-                # therefore the information about the publicity of the templates is
-                # recorded in the dictionary for each component. In the further course of the software development,
-                # the decision was made to include only private components.
-                # All elements are private (see above)
-                public = False
-            else:
-                # This section is for roofs and outer walls
-                # Roofs and walls all have only one tab
-                first_section_element_html = json.loads(element_response.text)["Elca\\View\\ElcaElementView"]
-                soup_element_information = BeautifulSoup(first_section_element_html, 'lxml')
-                template_name_item = soup_element_information.find(name='input', attrs={'name': 'name'})
-                # Full name of the component template
-                template_name_import = template_name_item.attrs['value']
-                template_name = template_name_import.replace(" (Importiert)", "")
-                # The public templates cannot be overwritten.
-                # This can be used to determine whether the templates are public or private (see comment above)
-                public = "readonly" in template_name_item.attrs
-                # Retrieve description
-                description = soup_element_information.textarea.text  # Beschreibung der Bauteilvorlage
-                template_u_value = soup_element_information.find(name='input', attrs={'name': 'attr[elca.uValue]'}).attrs['value']
-                # Second section of the JSON response contains the cost group
-                second_element_html = json.loads(element_response.text)['Elca\\View\\ElcaOsitView']
-                soup_element_cost_group_information = BeautifulSoup(second_element_html, 'lxml')
-                cost_group = re.search(r"(\d{3})", soup_element_cost_group_information.find(name='a', attrs={'class': 'page'}).text).group(1)
-            # Append all information to dictionary
-            # This information is necessary to create projects in eLCA through CSV-Import
-            # only the information on publicity is not necessary
-            if template_u_value == "":
-                template_u_value = "no information in eLCA"
-            if description == "":
-                description = "no information in eLCA"
-            element_dict = {"template_name": template_name, "CG_DIN_276": cost_group, "UUID": element_id,
-                            "description": description, "public": public, "U-Value": template_u_value}
-            # Create a csv file to use component templates in other accounts if needed
-            # To create projects through csv import the reference unit must be specified
-            # Windows are specified in pieces and roofs and walls in m²
-            if 'Fenster' in template_name:
-                reference_unit = 'Stück'
-            else:
-                reference_unit = 'm²'
-            # Append information to dictionary. The dictionary has the form that would be necessary for the csv import.
-            elca_csv_dict = {'Name': template_name, 'KG DIN 276': cost_group, 'Fläche': 1, 'Bezugsgröße': reference_unit, 'eLCA BT ID': element_id}
-            # "Templates" is a list of all dictionries with information on the components
-            templates.append(elca_csv_dict)
-            # Divide the component templates into existing and refurbishment components using the naming convention
-            if 'Sanierung' in template_name:
-                refurb_templates.append(element_dict)
-            else:
-                stock_templates.append(element_dict)
+    for entry in catalog_templates.values():
+        element_dict = entry["template"]
+        template_name = element_dict["template_name"]
+        # Create a csv file to use component templates in other accounts if needed
+        # To create projects through csv import the reference unit must be specified
+        # Windows are specified in pieces and roofs and walls in m²
+        if 'Fenster' in template_name:
+            reference_unit = 'Stück'
+        else:
+            reference_unit = 'm²'
+        # Append information to dictionary. The dictionary has the form that would be necessary for the csv import.
+        elca_csv_dict = {'Name': template_name, 'KG DIN 276': element_dict["CG_DIN_276"], 'Fläche': 1,
+                         'Bezugsgröße': reference_unit, 'eLCA BT ID': element_dict["UUID"]}
+        # "Templates" is a list of all dictionries with information on the components
+        templates.append(elca_csv_dict)
+        # Divide the component templates into existing and refurbishment components using the naming convention
+        if 'Sanierung' in template_name:
+            refurb_templates.append(element_dict)
+        else:
+            stock_templates.append(element_dict)
 
     # Allocation of the existing components to the matching refurbishment alternatives using the naming convention.
-    # Sort the IDs to each other
+    # The refurbishment components are indexed by name, so that each existing component is looked up directly
+    refurb_ids_by_name = {x["template_name"]: x["UUID"] for x in refurb_templates}
+    # Dictionary in which the refurbishment alternative is assigned to each existing building component
+    refurb_alternatives: dict = {}
     for i in stock_templates:
-        for x in refurb_templates:
-            if x["template_name"] == i["template_name"] + ' Sanierung':
-                refurb_alternatives[i["UUID"]] = x["UUID"]
-            else:
-                continue
+        refurb_id = refurb_ids_by_name.get(i["template_name"] + ' Sanierung')
+        if refurb_id is not None:
+            refurb_alternatives[i["UUID"]] = refurb_id
 
     stock_templates[:] = [d for d in stock_templates if d.get('UUID') in refurb_alternatives.keys()]
 
     # Saving the data as JSON files for further use in the tool
-    save_component_json(refurb_alternatives, "refurb_alternatives")
-    save_component_json(refurb_templates, "refurb_templates")
-    save_component_json(stock_templates, "stock_templates")
-    save_component_json(templates, "templates")
-    templates_file: list[dict] = load_component_json("templates")
+    save_component_json(refurb_alternatives, "refurb_alternatives", folder)
+    save_component_json(refurb_templates, "refurb_templates", folder)
+    save_component_json(stock_templates, "stock_templates", folder)
+    save_component_json(templates, "templates", folder)
     # Save csv file
-    save_elca_csv(templates, 'templates')
-
-    print('Alle in dem Account eLCArefurb hinterlegten Bauteilvorlagen wurden ausgelesen! Bestandsbauteile wurden Sanierungsalternativen zugeteilt!')
\ No newline at end of file
+    save_elca_csv(templates, 'templates', folder)
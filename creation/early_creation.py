@@ -0,0 +1,169 @@
+from __future__ import annotations
+import queue
+import shutil
+import threading
+from pathlib import Path
+from helpers import load_component_json, load_login_credentials, shard_archetypes, account_credentials, get_client, \
+    registered_archetype_projects, registered_archetype_account, unregister_project, release_project, \
+    endpoint_latency, save_endpoint_latency, ProgressTracker, StageCancelled, cancel_requested, REFURB_VARIANTS
+from creation.projects_data import load_savings, prepare_archetype_projects
+from creation.projects_creation import create_account_projects
+from creation.project_costs import load_window_assistants
+
+# Name of the stage in the progress status (see helpers/progress.py)
+EARLY_CREATION_STAGE = "Vorab-Projekterstellung"
+# First session slot of the workers: eLCA saves the current project and filters per login session, slot 0 is left
+# to collect_templates, which refreshes the template catalog in the background of the buildings GUI at the same time
+FIRST_SESSION_SLOT = 1
+
+
+class EarlyProjectCreator:
+    """
+    Creation of the eLCA projects of the archetypes while the user is still entering further archetypes in the
+    buildings GUI (producer-consumer): each archetype confirmed in the GUI is put into the queue of its eLCA
+    account, and a background thread per account prepares the 5 project files of the archetype (see
+    prepare_archetype_projects) and creates the projects (see create_account_projects). This way the time the
+    user needs to enter the district overlaps with the time eLCA needs to create the projects.
+    The projects are registered in the projects registry as usual, so that create_elca_projects afterwards only
+    creates the projects that are still missing or whose archetype was changed after it was confirmed.
+    """
+
+    def __init__(self, workers_per_account: int = 3):
+        """
+        :param workers_per_account: number of projects created at the same time in each account
+        """
+        self.workers_per_account = workers_per_account
+        self.accounts = load_login_credentials()
+        # Accounts of the confirmed archetypes with the archetype names as keys
+        self.assigned: dict[str, str] = {}
+        # Confirmed archetypes whose projects were registered before their confirmation
+        self.registered_before: set[str] = set()
+        # Queue and background thread of each account with the user names as keys
+        self.queues: dict[str, queue.Queue] = {}
+        self.threads: dict[str, threading.Thread] = {}
+        self._lock = threading.Lock()
+        # Latencies of the eLCA endpoints and window types to estimate the time needed for each project
+        self.latency = endpoint_latency()
+        self.window_assistants = load_window_assistants()
+        self.savings = load_savings()
+        # The number of planned projects grows with each confirmed archetype
+        self.progress = ProgressTracker(EARLY_CREATION_STAGE, 0)
+
+    def submit(self, archetype: dict) -> bool:
+        """
+        Put a confirmed archetype into the queue of its account. An archetype confirmed again after a change is
+        put into the queue again, its changed projects are replaced. Return False if the archetype does not fit
+        into the project limits of the accounts, its projects are then created by create_elca_projects.
+        :param archetype: validated archetype as described in archetypes.json
+        """
+        archetype_name = archetype['archetype name']
+        with self._lock:
+            if archetype_name not in self.assigned:
+                try:
+                    shards = shard_archetypes(list(self.assigned) + [archetype_name], self.accounts,
+                                              assigned=self.assigned)
+                except ValueError as error:
+                    print(f'Die Projekte des Archetyps {archetype_name} werden erst nach der Eingabe erstellt: '
+                          f'{error}')
+                    return False
+                self.assigned[archetype_name] = next(user_name for user_name, shard in shards.items()
+                                                     if archetype_name in shard)
+                if registered_archetype_account(archetype_name) is not None:
+                    self.registered_before.add(archetype_name)
+            user_name = self.assigned[archetype_name]
+            if user_name not in self.queues:
+                self.queues[user_name] = queue.Queue()
+                self.threads[user_name] = threading.Thread(target=self._create, args=(user_name,),
+                                                           name=f"EarlyCreation-{user_name}", daemon=True)
+                self.threads[user_name].start()
+            self.progress.planned += len(REFURB_VARIANTS)
+        self.queues[user_name].put(dict(archetype))
+        return True
+
+    def _create(self, user_name: str) -> None:
+        """
+        Create the projects of the archetypes in the queue of an account one archetype after the other, until
+        the queue is closed by finish.
+        :param user_name: user name of the eLCA account
+        """
+        credentials = account_credentials(user_name)
+        # The component templates are provided in further accounts before their first project
+        templates_required = user_name != self.accounts[0]["User name"]
+        archetypes = self.queues[user_name]
+        while True:
+            archetype = archetypes.get()
+            if archetype is None:
+                return
+            archetype_name = archetype['archetype name']
+            # A failed archetype must not stop the queue, its projects are created again by create_elca_projects
+            try:
+                # refurb_alternatives.json can be refreshed by collect_templates while the archetypes are entered
+                variants = prepare_archetype_projects(archetype, self.savings,
+                                                      load_component_json("refurb_alternatives"))
+                create_account_projects(credentials, {archetype_name: variants}, templates_required,
+                                        self.workers_per_account, self.latency, self.window_assistants,
+                                        self.progress, FIRST_SESSION_SLOT)
+                templates_required = False
+            except StageCancelled:
+                print(f'Die Projekte des Archetyps {archetype_name} werden nach dem Abbruch nicht vorab erstellt.')
+            except Exception as error:
+                print(f'FEHLER: Die Projekte des Archetyps {archetype_name} konnten nicht vorab erstellt werden '
+                      f'({error!r}), sie werden nach der Eingabe erstellt.')
+
+    def _stop(self) -> None:
+        """
+        Close the queues and wait until the background threads have created the projects of the queued archetypes.
+        """
+        for archetypes in self.queues.values():
+            archetypes.put(None)
+        for thread in self.threads.values():
+            thread.join()
+        self.progress.finish()
+        # Save the measured latencies for the estimation of the further projects
+        save_endpoint_latency()
+
+    def _delete_archetypes(self, archetype_names: set[str]) -> None:
+        """
+        Delete the projects of confirmed archetypes in eLCA together with their project files and dead letters, so
+        that create_elca_projects does not create them again. Archetypes that were registered before they were
+        confirmed (e.g. by an earlier execution) are kept.
+        :param archetype_names: names of the archetypes
+        """
+        for archetype_name in archetype_names - self.registered_before:
+            account = registered_archetype_account(archetype_name)
+            for project_id in registered_archetype_projects(archetype_name).values():
+                get_client(account).delete_project(project_id, missing_ok=True)
+                unregister_project(project_id)
+            # Failed projects of the archetype are removed from the dead-letter queue
+            for refurb_variant in REFURB_VARIANTS:
+                release_project("creation", archetype_name, refurb_variant)
+            shutil.rmtree(Path("temp_data") / archetype_name, ignore_errors=True)
+            print(f'Die vorab erstellten Projekte des Archetyps {archetype_name} wurden gelöscht.')
+
+    def finish(self, archetypes: list[dict]) -> None:
+        """
+        Wait until the projects of all confirmed archetypes have been created. The projects of archetypes that
+        were confirmed but are not among the saved archetypes (removed or renamed in the GUI) are deleted.
+        Raise StageCancelled if the creation was cancelled (see request_cancel).
+        :param archetypes: archetypes saved in the buildings GUI
+        """
+        self._stop()
+        self._delete_archetypes(set(self.assigned) - {archetype['archetype name'] for archetype in archetypes})
+        if cancel_requested():
+            raise StageCancelled(f'{EARLY_CREATION_STAGE} wurde abgebrochen.')
+
+    def cancel(self) -> None:
+        """
+        Discard the creation during the input, e.g. if the buildings GUI was closed without saving the archetypes:
+        the queued archetypes are not created, the archetypes being created are completed, and then the projects
+        created during the input are deleted.
+        """
+        print('Die Archetypen wurden nicht gespeichert, die vorab erstellten Projekte werden verworfen.')
+        for archetypes in self.queues.values():
+            while True:
+                try:
+                    archetypes.get_nowait()
+                except queue.Empty:
+                    break
+        self._stop()
+        self._delete_archetypes(set(self.assigned))
@@ -0,0 +1,183 @@
+from __future__ import annotations
+from collections import Counter
+from pathlib import Path
+import pandas as pd
+from helpers import traced, load_component_json, load_login_credentials, credentials_available, shard_archetypes, \
+    registered_projects, endpoint_latency, endpoint_name
+from creation.project_costs import load_window_assistants, project_requests, requests_cost
+
+# Columns of archetypes.json, that are needed to create the projects
+REQUIRED_COLUMNS = ['archetype name', 'GFA in m²', 'NFA in m²', 'final energy heating in kWh/m²a',
+                    'final energy hot water in kWh/m²a', 'exterior walls area in m²', 'roof area in m²',
+                    'number of windows', 'energy carrier template', 'energy carrier ID', 'exterior walls template',
+                    'window template', 'roof template', 'exterior walls ID', 'window ID', 'roof ID',
+                    'building age class']
+# Quantities of the archetypes, that have to be positive numbers
+POSITIVE_COLUMNS = ['GFA in m²', 'NFA in m²', 'final energy heating in kWh/m²a', 'exterior walls area in m²',
+                    'roof area in m²', 'number of windows']
+# Components of the archetypes as tuples of template column, ID column and cost group
+COMPONENTS = [('exterior walls template', 'exterior walls ID', 330), ('window template', 'window ID', 334),
+              ('roof template', 'roof ID', 360)]
+# Refurbished components of the refurbishment variants
+VARIANT_COMPONENTS = {'Bestand': [], 'Außenwandsanierung': ['exterior walls ID'], 'Fenstersanierung': ['window ID'],
+                      'Dachsanierung': ['roof ID'], 'Komplettsanierung': ['exterior walls ID', 'window ID', 'roof ID']}
+OUT_OF_SCOPE = "Outside the scope of the study"
+
+
+def validate_archetypes(df_archetypes: pd.DataFrame, refurb_alternatives: dict[str, str],
+                        df_savings: pd.DataFrame) -> list[str]:
+    """
+    Check all archetypes at once for the mistakes that would stop prepare_projects_data or create_elca_projects
+    and return a list with a description of each mistake (empty if all archetypes are valid).
+    :param df_archetypes: DataFrame with one row per archetype from archetypes.json
+    :param refurb_alternatives: dictionary with IDs of stock templates as keys and IDs of corresponding
+            refurbishment components as values
+    :param df_savings: energy saving potentials from savings.csv
+    """
+    missing_columns = [column for column in REQUIRED_COLUMNS if column not in df_archetypes.columns]
+    if missing_columns:
+        return [f'In archetypes.json fehlen die Angaben: {", ".join(missing_columns)}']
+    problems = []
+    names = df_archetypes['archetype name'].astype(str)
+
+    def report(mask: pd.Series, message: str) -> None:
+        # Add one problem for every archetype of the mask
+        problems.extend(f'Archetyp {name}: {message}' for name in names[mask])
+
+    report(names.str.strip() == '', 'Der Name des Archetyps ist leer.')
+    report(names.duplicated(), 'Der Name des Archetyps ist mehrfach vergeben.')
+    for column in POSITIVE_COLUMNS:
+        values = pd.to_numeric(df_archetypes[column], errors='coerce')
+        report(~(values > 0), f'"{column}" muss eine positive Zahl sein.')
+
+    # Every component in the scope of the study needs a refurbishment alternative
+    for template_column, id_column, _ in COMPONENTS:
+        in_scope = df_archetypes[template_column] != OUT_OF_SCOPE
+        known = df_archetypes[id_column].astype(str).isin(refurb_alternatives.keys())
+        report(in_scope & ~known, f'Für "{template_column}" gibt es keine Sanierungsvariante in '
+                                  f'refurb_alternatives.json.')
+
+    # Every archetype needs a row in savings.csv for its building age class and the energy carrier found by
+    # prepare_projects_data (see lookup_savings), which searches the energy carriers of the building age class in
+    # the name of the energy carrier of the archetype and uses gas if none is found
+    savings_keys = pd.MultiIndex.from_frame(df_savings[['Baualtersklasse', 'Energieträger']])
+    energy_search = pd.Series('Gas', index=df_archetypes.index)
+    for energy_carrier in df_savings['Energieträger'].unique():
+        carrier_keys = pd.MultiIndex.from_arrays([df_archetypes['building age class'],
+                                                  pd.Series(energy_carrier, index=df_archetypes.index)])
+        found = df_archetypes['energy carrier template'].astype(str).str.contains(energy_carrier, regex=False)
+        energy_search[found & carrier_keys.isin(savings_keys)] = energy_carrier
+    archetype_keys = pd.MultiIndex.from_arrays([df_archetypes['building age class'], energy_search])
+    report(~df_archetypes['building age class'].isin(df_savings['Baualtersklasse']),
+           'Die Baualtersklasse fehlt in savings.csv.')
+    report(df_archetypes['building age class'].isin(df_savings['Baualtersklasse']) &
+           ~archetype_keys.isin(savings_keys),
+           'Für die Baualtersklasse und den Energieträger gibt es keine Zeile in savings.csv.')
+    return problems
+
+
+def archetype_requests(archetype: dict, refurb_alternatives: dict[str, str],
+                       window_assistants: dict[str, bool]) -> dict[str, list[tuple[str, str]]]:
+    """
+    Return the requests to eLCA needed to create the 5 projects of an archetype with the project names as keys.
+    :param archetype: dictionary of the archetype from archetypes.json
+    :param refurb_alternatives: dictionary with IDs of stock templates as keys and IDs of corresponding
+            refurbishment components as values
+    :param window_assistants: window templates created with the window wizard (see load_window_assistants)
+    """
+    projects = {}
+    for variant, refurbished in VARIANT_COMPONENTS.items():
+        # Rows of the CSV file of the project, see prepare_projects_data
+        components = [{'KG DIN 276': cost_group,
+                       'eLCA BT ID': refurb_alternatives.get(str(archetype[id_column]), archetype[id_column])
+                       if id_column in refurbished else archetype[id_column]}
+                      for template_column, id_column, cost_group in COMPONENTS
+                      if archetype[template_column] != OUT_OF_SCOPE]
+        projects[f"{archetype['archetype name']} {variant}"] = project_requests(components, window_assistants)
+    return projects
+
+
+@traced()
+def preflight_projects(workers_per_account: int = 3, folder: str = "temp_data") -> dict:
+    """
+    Plan the creation of the eLCA projects before prepare_projects_data and create_elca_projects are executed,
+    without any request to eLCA. All archetypes are validated at once against refurb_alternatives.json and
+    savings.csv, the requests to eLCA are counted per endpoint and the runtime of create_elca_projects is estimated
+    from the latencies of the endpoints measured in earlier executions. Moreover, the archetypes are distributed
+    over the eLCA accounts to check the project limits of the accounts. The plan is printed and returned.
+    As projects with unchanged data are not created again, the requests and the runtime are upper bounds.
+
+    :param workers_per_account: number of projects created at the same time in each account
+            (see create_elca_projects)
+    :param folder: Name of the folder where the JSON files are saved
+
+    Input:
+    1) archetypes.json: List of dictionaries, where each dictionary describes an archetype of the quarter.
+    2) refurb_alternatives.json: dictionary with IDs of stock templates as keys and IDs of corresponding
+        refurbishment components as values
+    3) savings.csv: The final energy demand reduction potential for the renovation scenarios
+    4) endpoint_latency.json, template_catalog.json and login_credentials.json, if available
+
+    Output:
+    1) dictionary with the number of projects, the requests per endpoint, the estimated runtime in seconds per
+       account and the distribution of the archetypes over the accounts
+    2) ValueError if an archetype is invalid, no login credentials are saved or the project limits of the accounts
+       are exceeded, after all problems found have been printed
+
+    """
+    archetypes: list[dict] = load_component_json("archetypes", folder)
+    refurb_alternatives: dict[str, str] = load_component_json("refurb_alternatives", folder)
+    df_savings = pd.read_csv(Path('creation') / 'savings.csv', encoding="utf-8")
+    problems = validate_archetypes(pd.DataFrame(archetypes), refurb_alternatives, df_savings)
+
+    # Requests of every project, counted per endpoint
+    window_assistants = load_window_assistants(folder)
+    all_requests = {} if problems else {
+        archetype['archetype name']: archetype_requests(archetype, refurb_alternatives, window_assistants)
+        for archetype in archetypes}
+    endpoint_counts = Counter(endpoint_name(method, path) for projects in all_requests.values()
+                              for requests in projects.values() for method, path in requests)
+
+    # Distribution over the accounts and check of the project limits
+    shards = {}
+    if credentials_available():
+        accounts = load_login_credentials()
+        try:
+            shards = shard_archetypes(list(all_requests), accounts)
+        except ValueError as error:
+            problems.append(str(error))
+    else:
+        accounts = []
+        problems.append('Es wurden noch keine Zugangsdaten für eLCA in login_credentials.json gespeichert.')
+
+    # Estimated runtime of each account: the projects are distributed over the workers, longest first,
+    # so the runtime is at least the longest project
+    latency = endpoint_latency(folder)
+    runtimes = {}
+    for user_name, shard in shards.items():
+        costs = [requests_cost(requests, latency) for archetype_name in shard
+                 for requests in all_requests[archetype_name].values()]
+        runtimes[user_name] = max(sum(costs) / workers_per_account, max(costs, default=0))
+
+    # Print the plan
+    print(f'Planung: {len(all_requests)} Archetypen, {len(all_requests) * len(VARIANT_COMPONENTS)} Projekte, '
+          f'{sum(endpoint_counts.values())} Anfragen an eLCA')
+    for endpoint, count in sorted(endpoint_counts.items(), key=lambda item: item[1], reverse=True):
+        print(f'    {count:6d}  {endpoint}')
+    registry = registered_projects()
+    for account in accounts:
+        user_name = account["User name"]
+        planned = len(shards.get(user_name, [])) * len(VARIANT_COMPONENTS)
+        foreign = len([project for project in registry if project["account"] == user_name
+                       and project["archetype"] not in all_requests])
+        limit = account.get("Project limit", "unbegrenzt")
+        print(f'Konto {user_name}: {planned} geplante und {foreign} weitere Projekte bei einem Limit von {limit}, '
+              f'geschätzte Dauer {runtimes.get(user_name, 0) / 60:.1f} min')
+    print(f'Geschätzte Dauer der Projekterstellung: {max(runtimes.values(), default=0) / 60:.1f} min')
+
+    if problems:
+        for problem in problems:
+            print(problem)
+        raise ValueError(f'Die Planung hat {len(problems)} Fehler gefunden, die Projekte werden nicht erstellt.')
+    return {"projects": len(all_requests) * len(VARIANT_COMPONENTS),
+            "requests": dict(endpoint_counts), "runtimes": runtimes, "shards": shards}
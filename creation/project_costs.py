@@ -0,0 +1,76 @@
+from __future__ import annotations
+import csv
+from pathlib import Path
+from helpers import DEFAULT_LATENCY, endpoint_name, load_component_json
+
+# Requests to create a project, which are independent of the components of the project
+PROJECT_REQUESTS: list[tuple[str, str]] = [
+    # CSV import
+    ("POST", "/project-csv/validate/"), ("GET", "/project-csv/preview/"), ("POST", "/project-csv/preview/"),
+    # Enter the project and save the master data
+    ("GET", "/projects/1/"), ("GET", "/project-data/general/"), ("POST", "/project-data/save/"),
+    # Lists of outer walls, windows and roofs
+    ("GET", "/project-elements/list/"), ("GET", "/project-elements/list/"), ("GET", "/project-elements/list/"),
+    # Final energy demand
+    ("GET", "/project-data/enEv/"), ("POST", "/project-data/saveEnEv/"),
+    ("POST", "/project-data/selectProcessConfig/"), ("POST", "/project-data/saveEnEv/"),
+]
+# Requests to save a component
+ELEMENT_REQUESTS: list[tuple[str, str]] = [("GET", "/project-elements/1/"), ("POST", "/project-elements/save/")]
+# Requests to save a window created with the window wizard: the component view is requested first and then
+# the window wizard view
+WINDOW_ASSISTANT_REQUESTS: list[tuple[str, str]] = [("GET", "/project-elements/1/"), ("GET", "/project-elements/1/"),
+                                                    ("POST", "/assistant/window/save/")]
+
+
+def load_window_assistants(folder: str = "temp_data") -> dict[str, bool]:
+    """
+    Return a dictionary with the IDs of the window templates as keys and whether the window was created
+    with the window wizard as values, read from the template catalog of collect_templates.
+    :param folder: Name of the folder where the template catalog is saved
+    """
+    if not (Path(folder) / "template_catalog.json").exists():
+        return {}
+    catalog = load_component_json("template_catalog", folder)["templates"]
+    return {element_id: entry["template"]["window assistant"] for element_id, entry in catalog.items()
+            if "window assistant" in entry["template"]}
+
+
+def project_requests(components: list[dict], window_assistants: dict[str, bool]) -> list[tuple[str, str]]:
+    """
+    Return the requests to eLCA needed to create a project as tuples of HTTP method and path.
+    :param components: rows of the CSV file of the project with the keys 'KG DIN 276' and 'eLCA BT ID'
+    :param window_assistants: dictionary of window templates created with the window wizard
+            (see load_window_assistants), windows without information are assumed to be created with the wizard
+    """
+    requests = list(PROJECT_REQUESTS)
+    for component in components:
+        # Windows (cost group 334) created with the window wizard need more requests than other components
+        if str(component['KG DIN 276']) == '334' and window_assistants.get(str(component['eLCA BT ID']), True):
+            requests.extend(WINDOW_ASSISTANT_REQUESTS)
+        else:
+            requests.extend(ELEMENT_REQUESTS)
+    return requests
+
+
+def requests_cost(requests: list[tuple[str, str]], latency: dict[str, float]) -> float:
+    """
+    Return the estimated time of a list of requests in seconds.
+    :param requests: requests as tuples of HTTP method and path
+    :param latency: mean latencies of the endpoints in seconds (see endpoint_latency)
+    """
+    return sum(latency.get(endpoint_name(method, path), DEFAULT_LATENCY) for method, path in requests)
+
+
+def estimate_project_cost(csv_file: str | Path, latency: dict[str, float], window_assistants: dict[str, bool]) -> float:
+    """
+    Estimate the time needed to create a project in seconds from the components in the CSV file of the project
+    and the mean latencies of the eLCA endpoints measured in earlier executions.
+    :param csv_file: path of the CSV file of the project
+    :param latency: mean latencies of the endpoints in seconds (see endpoint_latency)
+    :param window_assistants: dictionary of window templates created with the window wizard
+            (see load_window_assistants), windows without information are assumed to be created with the wizard
+    """
+    with open(csv_file, newline='', encoding='utf-8') as file:
+        components = list(csv.DictReader(file, delimiter=';'))
+    return requests_cost(project_requests(components, window_assistants), latency)
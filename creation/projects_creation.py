@@ -1,12 +1,18 @@
-import os
 import json
+import queue
 import re
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from glob import glob
-from helpers import login, create_get_soup
+from pathlib import Path
+from helpers import ElcaClient, traced, get_client, client_pool, project_input_hash, register_project, registered_project, \
+    unregister_project, load_login_credentials, shard_archetypes, account_credentials, quarantine_project, \
+    release_project, quarantined_projects, endpoint_latency, save_endpoint_latency, ProgressTracker
+from creation.project_costs import estimate_project_cost, load_window_assistants
 
 
-def create_elca_projects():
+@traced()
+def create_elca_projects(only_quarantined: bool = False, workers_per_account: int = 3):
     """
 
     This function creates the projects in eLCA through the CSV import feature.
@@ -15,7 +21,19 @@ def create_elca_projects():
     for the renovation scenarios. In addition, the floor areas
     and the energy source used with the corresponding final energy demand
     for heating and hot water are specified. The CSV files and json files created in projects_data
-    are read for each project. Each archetype is mapped into a separate eLCA account.
+    are read for each project. If several eLCA accounts are defined in login_credentials.json, the archetypes
+    are distributed over the accounts according to the project limits of the accounts and the projects of the
+    accounts are created in parallel. All projects of one archetype are created in the same account.
+    If the creation of a project fails, the project is put into the dead-letter queue of the projects registry
+    and the other projects are still created. The failed projects can be created later with
+    only_quarantined=True.
+    In each account several workers with separate login sessions create the projects at the same time. The
+    time needed for each project is estimated from its components and the latencies of the eLCA endpoints
+    measured in earlier executions, and the most expensive projects are created first, so that no long project
+    is left at the end of the creation.
+
+    :param only_quarantined: if True, only the projects in the dead-letter queue of the creation are created
+    :param workers_per_account: number of projects created at the same time in each account
 
     Input:
     1) JSON file for each archetype - refurbishment scenario combination
@@ -24,6 +42,10 @@ def create_elca_projects():
 
     Output:
     1) 5 eLCA projects per archetype
+    2) projects_registry.sqlite: registry of the created projects with archetype, refurbishment variant,
+                                 project ID, variant ID and a hash of the project data. Projects that are
+                                 already registered with unchanged data are not created again.
+    3) Dead-letter queue in projects_registry.sqlite with the projects that could not be created
 
     """
 
@@ -35,7 +57,7 @@ def create_elca_projects():
     for archetype_folder in all_archetype_folders:
         # Last part of the all_archetypes_folders entry is the archetype name
         # e.g. temp_data \\ ARCHETYP_NAME \\
-        archetype_name = archetype_folder.split("\\")[1]
+        archetype_name = Path(archetype_folder).name
         # Each Archetype has 5 projects: Existing building, External Wall Refurbishment, Roof Refurbishment,
         # Window Refurbishment and Complete Refurbishment
         # Every project is defined by information from a JSON file
@@ -48,433 +70,476 @@ def create_elca_projects():
             with open(archetype_project, encoding="utf-8") as file:
                 all_projects[archetype_name].append(json.load(file))
 
-    session = login()
-    # Iterate through dictionary with archetype names as keys and list of projects data
-    # as values to create all projects of one archetype in a certain eLCA account
-    for i, (key, value) in enumerate(all_projects.items()):
-        # LOGIN to eLCA user account of the Archetype number (up to 8 archetypes) to create the projects in eLCA
+    # Only retry the projects that failed during the last creation
+    if only_quarantined:
+        quarantined_names = {f'{project["archetype"]} {project["variant"]}'
+                             for project in quarantined_projects("creation")}
+        all_projects = {archetype_name: [variant for variant in variants if variant['projectname'] in quarantined_names]
+                        for archetype_name, variants in all_projects.items()}
+        all_projects = {archetype_name: variants for archetype_name, variants in all_projects.items() if variants}
 
-        # Iterate through refurbishment variants (in total 5 projects) in the values of the dictionary
-        # The values consist of lists with all projects of the archetype
-        for variant in value:
-            # open CSV of the project to create project
-            filename = f"temp_data/{key}/{variant['projectname']}.csv"
-            # Set parameter to import CSV file in eLCA
-            files = {
-                'importFile': (os.path.basename(filename), open(filename, 'rb'), "text/csv"),
-            }
-            # Data for CSV import project creation
-            # Post data to eLCA server through post response with requests
-            response_validate = session.post('https://www.bauteileditor.de/project-csv/validate/',
-                                             files=files,
-                                             data={
-                                                 'name': variant['projectname'],
-                                                 # private construction measure
-                                                 'constrMeasure': "1",
-                                                 # generic postcode
-                                                 'postcode': "12345",
-                                                 # single family homes
-                                                 'constrClassId': "210",
-                                                 # At this point a BNB Benchmark System has to be set
-                                                 # to create the project
-                                                 # Later, the benchmark system is deselected,
-                                                 # so that no benchmark system
-                                                 # is selected, since no evaluation according to BNB is to take place
-                                                 # See further below
-                                                 # Benchmark system BNB-BN_2015 has the Version ID "6"
-                                                 'benchmarkVersionId': "6",
-                                                 # net floor space
-                                                 'netFloorSpace': variant['net_floor_area'],
-                                                 # gross floor space
-                                                 'grossFloorSpace': variant['gross_floor_area'],
-                                                 'upload': "Absenden"
-                                             })
+    # Distribute the archetypes over the eLCA accounts
+    accounts = load_login_credentials()
+    shards = shard_archetypes(list(all_projects.keys()), accounts)
+    # Latencies of the eLCA endpoints and window types to estimate the time needed for each project
+    latency = endpoint_latency()
+    window_assistants = load_window_assistants()
+    # Progress of the creation of all accounts with throughput and remaining time
+    progress = ProgressTracker("Projekterstellung", sum(len(variants) for variants in all_projects.values()))
+    # Create the projects of every account in parallel, each account with its own eLCA clients
+    with ThreadPoolExecutor(max_workers=max(len(shards), 1)) as executor:
+        futures = [executor.submit(create_account_projects, account_credentials(user_name),
+                                   {archetype_name: all_projects[archetype_name] for archetype_name in shard},
+                                   user_name != accounts[0]["User name"], workers_per_account, latency,
+                                   window_assistants, progress)
+                   for user_name, shard in shards.items()]
+        # Raise errors of the accounts
+        for future in futures:
+            future.result()
+    progress.finish()
+    # Save the measured latencies for the estimation of the next execution
+    save_endpoint_latency()
 
-            # Create dictionary for POST data to confirm component collection from CSV
-            element_data = {}
-            # Load preview of the components to create the project to retrieve data from the source code
-            preview_soup = create_get_soup(session, 'https://www.bauteileditor.de/project-csv/preview/',
-                                           'Elca\\View\\Import\\Csv\\ProjectImportPreviewView')
-            for item in preview_soup.find_all('li', {"class": "element"}):
-                item_name = item.find('span').text
-                # Reading the KGR 2. level of the cost group (e.g. 330)
-                item_cg_two = re.search(r"option selected=\"\" value=\"(\d{3})\">",
-                                        str(item('select')[0].contents)).group(1)
-                # Reading the KGR 3. level of the cost group, if available (e.g. 334)
-                try:
-                    examine_third_level = re.search(r"option selected=\"\" value=\"(\d{3})\">",
-                                                    str(item('select')[1].contents)).group(1)
-                    item_cg_three = examine_third_level
-                    # if Attribute Error occurs there is no third level
-                except AttributeError:
-                    item_cg_three = ""
-                # Reading element quantity and unit (m2/ Stück)
-                item_quantity = item.input.attrs["value"]
-                item_unit = re.search(r"option selected=\"\" value=\"(.*?)\">", str(item('select')[2].contents)).group(
-                    1)
-                # Reading the rel_id of the elements (long element ID)
-                rel_id = re.search(r"relId=(.{8}-.{4}-.{4}-.{4}-.{12})", item.a.attrs["href"]).group(1)
-                # Reading the short element ID of each element
-                tpl_element_id = item('input')[1].attrs["value"]
-                # Reading the description of each element
-                designation = item.a.attrs["title"]
-                # Fill POST data dictionary with the information read about elements
-                element_data.update({
-                    'dinCode2[{}]'.format(rel_id): item_cg_two,
-                    'dinCode3[{}]'.format(rel_id): item_cg_three,
-                    'quantity[{}]'.format(rel_id): item_quantity,
-                    'unit[{}]'.format(rel_id): item_unit,
-                    # short ID
-                    'tplElementId[{}]'.format(rel_id): tpl_element_id
-                })
-            # Post data dictionary to confirm project creation requires this at the end
-            element_data.update({'createProject': 'Projekt erstellen'})
-            # Create projects by confirming the components with the element_data
-            # Project creation through POST request
-            generation_response = session.post('https://www.bauteileditor.de/project-csv/preview/', data=element_data)
-            # Project is now created!
-            # Editing created project
-            project_id_text = json.loads(generation_response.text)["Elca\\View\\ElcaModalProcessingView"]
-            # Read the project ID
-            project_id = re.search(r"data-action=\"/project-data/lcaProcessing/\?id=(\d{1,7})&amp",
-                                   project_id_text).group(
-                1)
-            # Get request to update session headers and enter the project just created
-            document = session.get(f'https://www.bauteileditor.de/projects/{project_id}/')
+    failed_projects = quarantined_projects("creation")
+    if failed_projects:
+        failed_names = ", ".join(f'{project["archetype"]} {project["variant"]}' for project in failed_projects)
+        print(f'{len(failed_projects)} Projekte konnten nicht erstellt werden und wurden zurückgestellt: '
+              f'{failed_names}. Mit create_elca_projects(only_quarantined=True) werden sie erneut erstellt.')
+    print("Alle Projekte wurden erstellt")
 
-            # At each section of the project, the "Save" button must also be selected automatically
-            # after creation so that the information is included in the life cycle assessment.
-            # Read variant ID to make POST request on saving master data - general
-            general_soup = create_get_soup(session, 'https://www.bauteileditor.de/project-data/general/',
-                                           'Elca\\View\\ElcaProjectDataGeneralView')
-            # Variant ID indicates planning phase - eLCArefurb only uses variant "preliminary planning"
-            current_variant_id = \
-            general_soup.find('div', {'class': 'form-section HtmlSelectbox-section currentVariantId'}).find('option',
-                                                                                                            text="-- Bitte wählen --").find_next_sibling(
-                name='option').attrs["value"]
-            # Save and specify "existing building" project master data - general
-            # and specify it as "existing building" to be able to tick the "Bestand" boxes
-            general_save_data = {
-                'name': variant['projectname'],
-                'projectNr': '',
-                # private constrcution measure
-                'constrMeasure': '1',
-                # Evaluation period 50 years
-                'lifeTime': '50',
-                # Building classification: single-family houses for residential purposes only
-                'constrClassId': '210',
-                # specify "existing building"
-                'isExtantBuilding': 'true',
-                'description': '',
-                'street': '',
-                # generic postcode
-                'postcode': '12345',
-                'city': '',
-                'editor': '',
-                'bnbNr': '',
-                'eGisNr': '',
-                # Deselect the BNB system evaluation (see above)
-                'benchmarkVersionId': '',
-                # 53 is Ökobaudat 2021 II but there are errors in this database,
-                # that's why Ökobaudat 2016 is chosen with the ID 45
-                'processDbId': '45',
-                'currentVariantId': current_variant_id,
-                'constrCatalogId': '',
-                'constrDesignId': '',
-                'livingSpace': '',
-                'netFloorSpace': variant['net_floor_area'],
-                'grossFloorSpace': variant['gross_floor_area'],
-                'floorSpace': '',
-                'propertySize': '',
-                'pw': '',
-                'pwRepeat': '',
-                'save': 'Speichern'
-            }
-            # Save master dta - general through post request
-            response_save = session.post('https://www.bauteileditor.de/project-data/save/', data=general_save_data)
 
-            # Create function to save all components
-            # from eLCArefurb templates
-            # Outer walls have the code 246
-            # Windows have the code 250
-            # Roofs have the code 269
-            def save_components(eLCA_component_category_id: int):
-                # enter list of components of the project just created in this URL through get request
-                components_soup = create_get_soup(session,
-                                                  f'https://www.bauteileditor.de/project-elements/list/?t={eLCA_component_category_id}',
-                                                  'Elca\\View\\ElcaProjectElementsView')
-                # Make list of all components of the certain category (walls, roofs or windows)
-                components = []
-                for item in components_soup.find_all(name='h2', attrs={'class': 'headline'}):
-                    # Read the ID of the component
-                    component_id = re.search(r"(\d{7})", item.text).group(1)
-                    # Append the ID to the list
-                    components.append(component_id)
-                # Iterate through list of components to save all components
-                for component in components:
-                    # POST request for saving requires name, quantity, description and U-Value
-                    # The eLCArefurb window templates created through the window wizard have a
-                    # different saving data structure than the other components (see under except)
-                    # All windows created without the window wizard and all roofs and outer
-                    # walls have the code structure to be saved with the code in "try section"
-                    try:
-                        # This is the code for  windows created without the
-                        # window wizard and all roofs and outer walls
-                        # Enter the component
-                        component_soup = create_get_soup(session,
-                                                         f'https://www.bauteileditor.de/project-elements/{component}/',
-                                                         'Elca\\View\\ElcaElementView')
-                        # Retrieve component name
-                        component_name = component_soup.find(name='input', attrs={'name': 'name'}).attrs['value']
-                        # Retrieve component quantity
-                        component_quantity = component_soup.find(name='input', attrs={'name': 'quantity'})[
-                            'value']
-                        # Retrieve component description
-                        component_description = component_soup.textarea.text
-                        # Retrieve component U-Value
-                        component_uvalue = component_soup.find(name='input', attrs={'name': 'attr[elca.uValue]'}).attrs[
-                            'value']
-                        # Windows (ID=250) have the unit "Stück" while other components have the unit "m2"
-                        if eLCA_component_category_id == 250:
-                            component_unit = 'Stück'
-                        else:
-                            component_unit = 'm2'
-                        # Create dictionary for the data that has to be send to the eLCA server to
-                        # save the components through post request
-                        component_save_data = {
-                            # Variant ID indicates planning phase - eLCArefurb only uses variant "preliminary planning"
-                            'projectVariantId': current_variant_id,
-                            'elementId': component,
-                            'name': component_name,
-                            'attr[elca.oz]': '',
-                            'description': component_description,
-                            'quantity': component_quantity,
-                            'refUnit': component_unit,
-                            'attr[elca.uValue]': component_uvalue,
-                            # R-Value could be specified, but it's not necessary
-                            'attr[elca.rW]': '',
-                            # Dismantling (Rückbau), separation (Trennung) and recycling
-                            # (Verwertung) factors can be specified
-                            # to evaluate the Dismantling, separation and recycling criterion of the BNB System.
-                            # This is not used in eLCArefurb
-                            'attr[elca.bnb.eol]': '',
-                            'attr[elca.bnb.separation]': '',
-                            'attr[elca.bnb.recycling]': '',
-                            'saveElement': 'Speichern'
-                        }
-                        # Save component of the project
-                        save_component_response = session.post('https://www.bauteileditor.de/project-elements/save/',
+def create_account_projects(credentials: dict, account_projects: dict[str, list[dict]],
+                            templates_required: bool = False, workers: int = 1, latency: dict[str, float] = None,
+                            window_assistants: dict[str, bool] = None, progress: ProgressTracker = None,
+                            first_slot: int = 0) -> None:
+    """
+    Create the projects of several archetypes in one eLCA account. The projects are created by several workers,
+    each with its own login session, as eLCA saves the current project in the session. The projects are
+    dispatched to the workers in the order of their estimated time, longest first.
+    :param credentials: dictionary with the login credentials of the account
+    :param account_projects: dictionary with archetype names as keys and lists of projects data as values
+    :param templates_required: True if the component templates have to be provided in the account first,
+            the templates are read from the first account, so they only have to be provided in further accounts
+    :param workers: number of projects created at the same time
+    :param latency: mean latencies of the eLCA endpoints (see endpoint_latency)
+    :param window_assistants: window templates created with the window wizard (see load_window_assistants)
+    :param progress: progress of the creation, advanced after each project
+    :param first_slot: session slot of the first worker (see client_pool)
+    """
+    # LOGIN to eLCA user account to create the projects in eLCA, one login session per worker
+    clients = client_pool(credentials["User name"], workers, first_slot=first_slot)
+    if templates_required:
+        provision_templates(clients[0])
+    # List of all projects of the account as tuples of archetype name and projects data
+    jobs = [(key, variant) for key, value in account_projects.items() for variant in value]
+    # Longest job first: the most expensive projects are created first
+    costs = {variant['projectname']: estimate_project_cost(f"temp_data/{key}/{variant['projectname']}.csv",
+                                                           latency or {}, window_assistants or {})
+             for key, variant in jobs}
+    jobs.sort(key=lambda job: costs[job[1]['projectname']], reverse=True)
+    # Clients that are not used by a worker at the moment
+    idle_clients = queue.Queue()
+    for client in clients:
+        idle_clients.put(client)
 
-                                                               data=component_save_data)
-                    except KeyError:
-                        # Windows created with the window wizard
-                        # Retrieve information through Beautiful Soup
-                        # Windows created through the window wizard can contain a lot of information about
-                        # frames, gaskets, fittings, etc., all of which must be retrieved and saved in the next step.
-                        window_soup = create_get_soup(session,
-                                                      f'https://www.bauteileditor.de/project-elements/{component}/',
-                                                      'Elca\\View\\Assistant\\WindowAssistantView')
-                        # Information on the window name
-                        window_name = window_soup.find(name='input', attrs={'name': 'name'}).attrs['value']
-                        # Window width
-                        window_width = window_soup.find(name='input', attrs={'name': 'width'}).attrs['value']
-                        # Window height
-                        window_height = window_soup.find(name='input', attrs={'name': 'height'}).attrs['value']
-                        # Sealing (Abdichtung)
-                        window_sealing_width = window_soup.find(name='input', attrs={'name': 'sealingWidth'}).attrs[
-                            'value']
-                        # More data on the specific window
-                        # Blind frame width
-                        fixedFrameWidth = window_soup.find(name='input', attrs={'name': 'fixedFrameWidth'}).attrs[
-                            'value']
-                        # Sash width
-                        sashFrameWidth = window_soup.find(name='input', attrs={'name': 'sashFrameWidth'}).attrs['value']
-                        # Mullions and transoms
-                        numberOfMullions = window_soup.find(name='input', attrs={'name': 'numberOfMullions'}).attrs[
-                            'value']
-                        numberOfTransoms = window_soup.find(name='input', attrs={'name': 'numberOfTransoms'}).attrs[
-                            'value']
-                        # ID of blind frame material
-                        processConfigId_fixedFrame = \
-                            window_soup.find(name='input', attrs={'name': 'processConfigId[fixedFrame]'}).attrs['value']
-                        # ID of sash frame material
-                        processConfigId_sashFrame = \
-                            window_soup.find(name='input', attrs={'name': 'processConfigId[sashFrame]'}).attrs['value']
-                        # ID of glass type
-                        processConfigId_glass = \
-                            window_soup.find(name='input', attrs={'name': 'processConfigId[glass]'}).attrs[
-                                'value']
-                        # ID of sealing material
-                        processConfigId_sealing = \
-                            window_soup.find(name='input', attrs={'name': 'processConfigId[sealing]'}).attrs[
-                                'value']
-                        # ID of fittings
-                        processConfigId_fittings = \
-                            window_soup.find(name='input', attrs={'name': 'processConfigId[fittings]'}).attrs[
-                                'value']
-                        # Name of fittings
-                        fittings = window_soup.find(name='input', attrs={'name': 'fittings'}).attrs['value']
-                        # ID of handles
-                        processConfigId_handles = \
-                            window_soup.find(name='input', attrs={'name': 'processConfigId[handles]'}).attrs[
-                                'value']
-                        # Name of handles
-                        handles = window_soup.find(name='input', attrs={'name': 'handles'}).attrs['value']
-                        # ID of sun shade
-                        processConfigId_sunscreenOutdoor = \
-                            window_soup.find(name='input', attrs={'name': 'processConfigId[sunscreenOutdoor]'}).attrs[
-                                'value']
-                        # ID of glare shield
-                        processConfigId_sunscreenIndoor = \
-                            window_soup.find(name='input', attrs={'name': 'processConfigId[sunscreenIndoor]'}).attrs[
-                                'value']
-                        # ID of interior windowsill
-                        processConfigId_sillIndoor = \
-                            window_soup.find(name='input', attrs={'name': 'processConfigId[sillIndoor]'}).attrs['value']
-                        # Size of interior windowsill
-                        sillIndoorSize = window_soup.find(name='input', attrs={'name': 'sillIndoorSize'}).attrs['value']
-                        # Depth of interior windowsill
-                        sillIndoorDepth = window_soup.find(name='input', attrs={'name': 'sillIndoorDepth'}).attrs[
-                            'value']
-                        # ID of interior window soffit
-                        processConfigId_soffitIndoor = \
-                            window_soup.find(name='input', attrs={'name': 'processConfigId[soffitIndoor]'}).attrs[
-                                'value']
-                        # Size of interior window soffit
-                        soffitIndoorSize = window_soup.find(name='input', attrs={'name': 'soffitIndoorSize'}).attrs[
-                            'value']
-                        # Depth of interior window soffit
-                        soffitIndoorDepth = window_soup.find(name='input', attrs={'name': 'soffitIndoorDepth'}).attrs[
-                            'value']
-                        # ID of exterior windowsill
-                        processConfigId_sillOutdoor = \
-                            window_soup.find(name='input', attrs={'name': 'processConfigId[sillOutdoor]'}).attrs[
-                                'value']
-                        # Size of exterior windowsill
-                        sillOutdoorSize = window_soup.find(name='input', attrs={'name': 'sillOutdoorSize'}).attrs[
-                            'value']
-                        # Depth of exterior windowsill
-                        sillOutdoorDepth = window_soup.find(name='input', attrs={'name': 'sillOutdoorDepth'}).attrs[
-                            'value']
-                        # ID of exterior window soffit
-                        processConfigId_soffitOutdoor = \
-                            window_soup.find(name='input', attrs={'name': 'processConfigId[soffitOutdoor]'}).attrs[
-                                'value']
-                        # Size of exterior window soffit
-                        soffitOutdoorSize = window_soup.find(name='input', attrs={'name': 'soffitOutdoorSize'}).attrs[
-                            'value']
-                        # Depth of exterior window soffit
-                        soffitOutdoorDepth = window_soup.find(name='input', attrs={'name': 'soffitOutdoorDepth'}).attrs[
-                            'value']
+    def create_job(job: tuple[str, dict]) -> None:
+        key, variant = job
+        refurb_variant = variant['projectname'].replace(f"{key} ", "", 1)
+        # After a cancellation the waiting projects are not created, the projects being created are completed
+        if progress is not None:
+            progress.check_cancel()
+        client = idle_clients.get()
+        # A failed project must not stop the creation of the other projects, it is put into the
+        # dead-letter queue and can be created again later
+        failed = False
+        try:
+            create_project(client, key, variant, credentials["User name"])
+            release_project("creation", key, refurb_variant)
+        except Exception as error:
+            failed = True
+            quarantine_project("creation", key, refurb_variant, error)
+            print(f"FEHLER: Projekt {variant['projectname']} konnte nicht erstellt werden ({error!r}). "
+                  f"Das Projekt wurde zurückgestellt.")
+        finally:
+            idle_clients.put(client)
+            if progress is not None:
+                progress.advance(failed=failed)
 
-                        # create dictionary with all the window data
-                        window_save_data = {
-                            'context': 'project-elements',
-                            'projectVariantId': current_variant_id,
-                            'e': component,
-                            'name': window_name,
-                            'width': window_width,
-                            'height': window_height,
-                            'sealingWidth': window_sealing_width,
-                            'fixedFrameWidth': fixedFrameWidth,
-                            'sashFrameWidth': sashFrameWidth,
-                            'numberOfMullions': numberOfMullions,
-                            'numberOfTransoms': numberOfTransoms,
-                            'processConfigId[fixedFrame]': processConfigId_fixedFrame,
-                            'processConfigId[sashFrame]': processConfigId_sashFrame,
-                            'processConfigId[glass]': processConfigId_glass,
-                            'processConfigId[sealing]': processConfigId_sealing,
-                            'processConfigId[fittings]': processConfigId_fittings,
-                            'fittings': fittings,
-                            'processConfigId[handles]': processConfigId_handles,
-                            'handles': handles,
-                            'processConfigId[sunscreenOutdoor]': processConfigId_sunscreenOutdoor,
-                            'processConfigId[sunscreenIndoor]': processConfigId_sunscreenIndoor,
-                            'processConfigId[sillIndoor]': processConfigId_sillIndoor,
-                            'sillIndoorSize': sillIndoorSize,
-                            'sillIndoorDepth': sillIndoorDepth,
-                            'processConfigId[soffitIndoor]': processConfigId_soffitIndoor,
-                            'soffitIndoorSize': soffitIndoorSize,
-                            'soffitIndoorDepth': soffitIndoorDepth,
-                            'processConfigId[sillOutdoor]': processConfigId_sillOutdoor,
-                            'sillOutdoorSize': sillOutdoorSize,
-                            'sillOutdoorDepth': sillOutdoorDepth,
-                            'processConfigId[soffitOutdoor]': processConfigId_soffitOutdoor,
-                            'soffitOutdoorSize': soffitOutdoorSize,
-                            'soffitOutdoorDepth': soffitOutdoorDepth,
-                            'saveElement': 'Speichern'
-                        }
-                        # save the windows with the data from the dictionary
-                        response_save_window = session.post('https://www.bauteileditor.de/assistant/window/save/',
-                                                            data=window_save_data)
+    # The executor dispatches the projects in the order of the list
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(create_job, jobs))
 
-            # Save components
-            # Outer walls have the code 246 in eLCA
-            save_components(246)
-            # Windows have the code 250 in eLCA
-            save_components(250)
-            # Roofs have the code 269 in eLCA
-            save_components(269)
+    print(f"Alle Projekte des Accounts {credentials['User name']} wurden erstellt")
 
-            # Add final energy audit
-            # Update headers to enter final energy input page
-            enev_response = session.get('https://www.bauteileditor.de/project-data/enEv/')
-            # Save the energy demand and specify net floor area according to EnEV
-            ngf_enev_response = session.post('https://www.bauteileditor.de/project-data/saveEnEv/', data={
-                'projectVariantId': current_variant_id,
-                'addDemand': '',
-                'addEnergyDemand': 'Bedarf hinzufügen',
-                # Specify net floor area according to EnEV
-                'ngf': variant['net_floor_area_enev'],
-                'enEvVersion': ''
-            })
-            # Specify energy source and save
-            energy_source_response = session.post('https://www.bauteileditor.de/project-data/selectProcessConfig/',
-                                                  data={
-                                                      'relId': 'newDemand',
-                                                      'projectVariantId': current_variant_id,
-                                                      'ngf': variant['net_floor_area_enev'],
-                                                      'enEvVersion': '',
-                                                      'headline': 'Baustoff suchen und wählen',
-                                                      'p': '',
-                                                      'sp': '',
-                                                      # 53 is Ökobaudat 2021 II but there are errors in this database,
-                                                      # that's why Ökobaudat 2016 is chosen with the ID 45
-                                                      'db': '45',
-                                                      'filterByProjectVariantId': '',
-                                                      'tpl': '',
-                                                      'b': 'operation',
-                                                      'u': 'kWh',
-                                                      'search': '',
-                                                      # Category 8.06 Usage: Selections from this only.
-                                                      'processCategoryNodeId': '679',
-                                                      # retrive energy carrier ID chosen by user in GUI
-                                                      'id': variant['energy_source'],
-                                                      'select': 'Übernehmen'
-                                                  })
-            # Specify end energy for heating and warm water
-            end_energy_response = session.post('https://www.bauteileditor.de/project-data/saveEnEv/', data={
-                'projectVariantId': current_variant_id,
-                # only one energy carrier in eLCArefurb
-                'addDemand': '1',
-                # energy carrier from JSON data
-                'processConfigId[newDemand]': variant['energy_source'],
-                # energy need for heating from JSON data
-                'heating[newDemand]': variant['energy_heating'],
-                # energy need for hot water from JSON data
-                'water[newDemand]': variant['energy_water'],
-                'lighting[newDemand]': '',
-                'ventilation[newDemand]': '',
-                'cooling[newDemand]': '',
-                'isKwk[newDemand]': '',
-                'saveEnergyDemand': 'Speichern',
-                # Net floor area
-                'ngf': variant['net_floor_area_enev'],
-                'enEvVersion': ''
-            })
 
-            print(f"Projekt {variant['projectname']} erstellt!")
+def provision_templates(client: ElcaClient) -> None:
+    """
+    Provide the component templates read by collect_templates in a further eLCA account. The templates.csv file
+    exported by collect_templates is imported as the project "Template creation", unless the account already
+    contains this project.
+    :param client: eLCA client of the account
+    """
+    if "Template creation" in client.list_projects(include_templates=True).values():
+        return
+    client.import_csv_project("Template creation", "temp_data/templates.csv", 1, 1)
+    print("Die Bauteilvorlagen wurden in den Account importiert!")
 
-        print("Alle Projekte des Archetyps wurden erstellt")
 
-    print("Alle Projekte wurden erstellt")
+@traced("project")
+def create_project(client: ElcaClient, key: str, variant: dict, account: str) -> None:
+    """
+    Create one project of an archetype in eLCA, save the components and the final energy demand
+    and register the project in the projects registry.
+    :param client: eLCA client of the account
+    :param key: name of the archetype
+    :param variant: project data from the JSON file of the project
+    :param account: user name of the account
+    """
+    # open CSV of the project to create project
+    filename = f"temp_data/{key}/{variant['projectname']}.csv"
+    # Project names are always "archetype name + refurbishment variant"
+    refurb_variant = variant['projectname'].replace(f"{key} ", "", 1)
+    # Skip projects that were already created from the same data
+    input_hash = project_input_hash(variant, filename)
+    registry_entry = registered_project(key, refurb_variant)
+    if registry_entry and registry_entry["input_hash"] == input_hash:
+        print(f"Projekt {variant['projectname']} ist bereits vorhanden!")
+        return
+    # A project created from other data or not completely created (e.g. in a failed attempt) is replaced
+    # (a project that was deleted manually in eLCA only has to be removed from the registry)
+    if registry_entry:
+        get_client(registry_entry["account"]).delete_project(registry_entry["project_id"], missing_ok=True)
+        unregister_project(registry_entry["project_id"])
+    # Create the project through the CSV import
+    project_id = client.import_csv_project(variant['projectname'], filename,
+                                           variant['net_floor_area'], variant['gross_floor_area'])
+    # Register the project without hash until it is completely created, so that a failed project
+    # is replaced by the next attempt
+    register_project(key, refurb_variant, project_id, "", "", account)
+    # Get request to update session headers and enter the project just created
+    document = client.open_project(project_id)
+
+    # At each section of the project, the "Save" button must also be selected automatically
+    # after creation so that the information is included in the life cycle assessment.
+    # Read variant ID to make POST request on saving master data - general
+    general_soup = client.get_project_general()
+    # Variant ID indicates planning phase - eLCArefurb only uses variant "preliminary planning"
+    current_variant_id = \
+    general_soup.find('div', {'class': 'form-section HtmlSelectbox-section currentVariantId'}).find('option',
+                                                                                                    text="-- Bitte wählen --").find_next_sibling(
+        name='option').attrs["value"]
+    # Save and specify "existing building" project master data - general
+    # and specify it as "existing building" to be able to tick the "Bestand" boxes
+    general_save_data = {
+        'name': variant['projectname'],
+        'projectNr': '',
+        # private constrcution measure
+        'constrMeasure': '1',
+        # Evaluation period 50 years
+        'lifeTime': '50',
+        # Building classification: single-family houses for residential purposes only
+        'constrClassId': '210',
+        # specify "existing building"
+        'isExtantBuilding': 'true',
+        'description': '',
+        'street': '',
+        # generic postcode
+        'postcode': '12345',
+        'city': '',
+        'editor': '',
+        'bnbNr': '',
+        'eGisNr': '',
+        # Deselect the BNB system evaluation (see above)
+        'benchmarkVersionId': '',
+        # 53 is Ökobaudat 2021 II but there are errors in this database,
+        # that's why Ökobaudat 2016 is chosen with the ID 45
+        'processDbId': '45',
+        'currentVariantId': current_variant_id,
+        'constrCatalogId': '',
+        'constrDesignId': '',
+        'livingSpace': '',
+        'netFloorSpace': variant['net_floor_area'],
+        'grossFloorSpace': variant['gross_floor_area'],
+        'floorSpace': '',
+        'propertySize': '',
+        'pw': '',
+        'pwRepeat': '',
+        'save': 'Speichern'
+    }
+    # Save master dta - general through post request
+    response_save = client.save_project_general(general_save_data)
+
+    # Create function to save all components
+    # from eLCArefurb templates
+    # Outer walls have the code 246
+    # Windows have the code 250
+    # Roofs have the code 269
+    def save_components(eLCA_component_category_id: int):
+        # enter list of components of the project just created in this URL through get request
+        components_soup = client.list_project_elements(eLCA_component_category_id)
+        # Make list of all components of the certain category (walls, roofs or windows)
+        components = []
+        for item in components_soup.find_all(name='h2', attrs={'class': 'headline'}):
+            # Read the ID of the component
+            component_id = re.search(r"(\d{7})", item.text).group(1)
+            # Append the ID to the list
+            components.append(component_id)
+        # Iterate through list of components to save all components
+        for component in components:
+            # POST request for saving requires name, quantity, description and U-Value
+            # The eLCArefurb window templates created through the window wizard have a
+            # different saving data structure than the other components (see under except)
+            # All windows created without the window wizard and all roofs and outer
+            # walls have the code structure to be saved with the code in "try section"
+            try:
+                # This is the code for  windows created without the
+                # window wizard and all roofs and outer walls
+                # Enter the component
+                component_soup = client.get_project_element(component)
+                # Retrieve component name
+                component_name = component_soup.find(name='input', attrs={'name': 'name'}).attrs['value']
+                # Retrieve component quantity
+                component_quantity = component_soup.find(name='input', attrs={'name': 'quantity'})[
+                    'value']
+                # Retrieve component description
+                component_description = component_soup.textarea.text
+                # Retrieve component U-Value
+                component_uvalue = component_soup.find(name='input', attrs={'name': 'attr[elca.uValue]'}).attrs[
+                    'value']
+                # Windows (ID=250) have the unit "Stück" while other components have the unit "m2"
+                if eLCA_component_category_id == 250:
+                    component_unit = 'Stück'
+                else:
+                    component_unit = 'm2'
+                # Create dictionary for the data that has to be send to the eLCA server to
+                # save the components through post request
+                component_save_data = {
+                    # Variant ID indicates planning phase - eLCArefurb only uses variant "preliminary planning"
+                    'projectVariantId': current_variant_id,
+                    'elementId': component,
+                    'name': component_name,
+                    'attr[elca.oz]': '',
+                    'description': component_description,
+                    'quantity': component_quantity,
+                    'refUnit': component_unit,
+                    'attr[elca.uValue]': component_uvalue,
+                    # R-Value could be specified, but it's not necessary
+                    'attr[elca.rW]': '',
+                    # Dismantling (Rückbau), separation (Trennung) and recycling
+                    # (Verwertung) factors can be specified
+                    # to evaluate the Dismantling, separation and recycling criterion of the BNB System.
+                    # This is not used in eLCArefurb
+                    'attr[elca.bnb.eol]': '',
+                    'attr[elca.bnb.separation]': '',
+                    'attr[elca.bnb.recycling]': '',
+                    'saveElement': 'Speichern'
+                }
+                # Save component of the project
+                save_component_response = client.save_element(component_save_data)
+            except KeyError:
+                # Windows created with the window wizard
+                # Retrieve information through Beautiful Soup
+                # Windows created through the window wizard can contain a lot of information about
+                # frames, gaskets, fittings, etc., all of which must be retrieved and saved in the next step.
+                window_soup = client.get_project_element(component, 'Elca\\View\\Assistant\\WindowAssistantView')
+                # Information on the window name
+                window_name = window_soup.find(name='input', attrs={'name': 'name'}).attrs['value']
+                # Window width
+                window_width = window_soup.find(name='input', attrs={'name': 'width'}).attrs['value']
+                # Window height
+                window_height = window_soup.find(name='input', attrs={'name': 'height'}).attrs['value']
+                # Sealing (Abdichtung)
+                window_sealing_width = window_soup.find(name='input', attrs={'name': 'sealingWidth'}).attrs[
+                    'value']
+                # More data on the specific window
+                # Blind frame width
+                fixedFrameWidth = window_soup.find(name='input', attrs={'name': 'fixedFrameWidth'}).attrs[
+                    'value']
+                # Sash width
+                sashFrameWidth = window_soup.find(name='input', attrs={'name': 'sashFrameWidth'}).attrs['value']
+                # Mullions and transoms
+                numberOfMullions = window_soup.find(name='input', attrs={'name': 'numberOfMullions'}).attrs[
+                    'value']
+                numberOfTransoms = window_soup.find(name='input', attrs={'name': 'numberOfTransoms'}).attrs[
+                    'value']
+                # ID of blind frame material
+                processConfigId_fixedFrame = \
+                    window_soup.find(name='input', attrs={'name': 'processConfigId[fixedFrame]'}).attrs['value']
+                # ID of sash frame material
+                processConfigId_sashFrame = \
+                    window_soup.find(name='input', attrs={'name': 'processConfigId[sashFrame]'}).attrs['value']
+                # ID of glass type
+                processConfigId_glass = \
+                    window_soup.find(name='input', attrs={'name': 'processConfigId[glass]'}).attrs[
+                        'value']
+                # ID of sealing material
+                processConfigId_sealing = \
+                    window_soup.find(name='input', attrs={'name': 'processConfigId[sealing]'}).attrs[
+                        'value']
+                # ID of fittings
+                processConfigId_fittings = \
+                    window_soup.find(name='input', attrs={'name': 'processConfigId[fittings]'}).attrs[
+                        'value']
+                # Name of fittings
+                fittings = window_soup.find(name='input', attrs={'name': 'fittings'}).attrs['value']
+                # ID of handles
+                processConfigId_handles = \
+                    window_soup.find(name='input', attrs={'name': 'processConfigId[handles]'}).attrs[
+                        'value']
+                # Name of handles
+                handles = window_soup.find(name='input', attrs={'name': 'handles'}).attrs['value']
+                # ID of sun shade
+                processConfigId_sunscreenOutdoor = \
+                    window_soup.find(name='input', attrs={'name': 'processConfigId[sunscreenOutdoor]'}).attrs[
+                        'value']
+                # ID of glare shield
+                processConfigId_sunscreenIndoor = \
+                    window_soup.find(name='input', attrs={'name': 'processConfigId[sunscreenIndoor]'}).attrs[
+                        'value']
+                # ID of interior windowsill
+                processConfigId_sillIndoor = \
+                    window_soup.find(name='input', attrs={'name': 'processConfigId[sillIndoor]'}).attrs['value']
+                # Size of interior windowsill
+                sillIndoorSize = window_soup.find(name='input', attrs={'name': 'sillIndoorSize'}).attrs['value']
+                # Depth of interior windowsill
+                sillIndoorDepth = window_soup.find(name='input', attrs={'name': 'sillIndoorDepth'}).attrs[
+                    'value']
+                # ID of interior window soffit
+                processConfigId_soffitIndoor = \
+                    window_soup.find(name='input', attrs={'name': 'processConfigId[soffitIndoor]'}).attrs[
+                        'value']
+                # Size of interior window soffit
+                soffitIndoorSize = window_soup.find(name='input', attrs={'name': 'soffitIndoorSize'}).attrs[
+                    'value']
+                # Depth of interior window soffit
+                soffitIndoorDepth = window_soup.find(name='input', attrs={'name': 'soffitIndoorDepth'}).attrs[
+                    'value']
+                # ID of exterior windowsill
+                processConfigId_sillOutdoor = \
+                    window_soup.find(name='input', attrs={'name': 'processConfigId[sillOutdoor]'}).attrs[
+                        'value']
+                # Size of exterior windowsill
+                sillOutdoorSize = window_soup.find(name='input', attrs={'name': 'sillOutdoorSize'}).attrs[
+                    'value']
+                # Depth of exterior windowsill
+                sillOutdoorDepth = window_soup.find(name='input', attrs={'name': 'sillOutdoorDepth'}).attrs[
+                    'value']
+                # ID of exterior window soffit
+                processConfigId_soffitOutdoor = \
+                    window_soup.find(name='input', attrs={'name': 'processConfigId[soffitOutdoor]'}).attrs[
+                        'value']
+                # Size of exterior window soffit
+                soffitOutdoorSize = window_soup.find(name='input', attrs={'name': 'soffitOutdoorSize'}).attrs[
+                    'value']
+                # Depth of exterior window soffit
+                soffitOutdoorDepth = window_soup.find(name='input', attrs={'name': 'soffitOutdoorDepth'}).attrs[
+                    'value']
+
+                # create dictionary with all the window data
+                window_save_data = {
+                    'context': 'project-elements',
+                    'projectVariantId': current_variant_id,
+                    'e': component,
+                    'name': window_name,
+                    'width': window_width,
+                    'height': window_height,
+                    'sealingWidth': window_sealing_width,
+                    'fixedFrameWidth': fixedFrameWidth,
+                    'sashFrameWidth': sashFrameWidth,
+                    'numberOfMullions': numberOfMullions,
+                    'numberOfTransoms': numberOfTransoms,
+                    'processConfigId[fixedFrame]': processConfigId_fixedFrame,
+                    'processConfigId[sashFrame]': processConfigId_sashFrame,
+                    'processConfigId[glass]': processConfigId_glass,
+                    'processConfigId[sealing]': processConfigId_sealing,
+                    'processConfigId[fittings]': processConfigId_fittings,
+                    'fittings': fittings,
+                    'processConfigId[handles]': processConfigId_handles,
+                    'handles': handles,
+                    'processConfigId[sunscreenOutdoor]': processConfigId_sunscreenOutdoor,
+                    'processConfigId[sunscreenIndoor]': processConfigId_sunscreenIndoor,
+                    'processConfigId[sillIndoor]': processConfigId_sillIndoor,
+                    'sillIndoorSize': sillIndoorSize,
+                    'sillIndoorDepth': sillIndoorDepth,
+                    'processConfigId[soffitIndoor]': processConfigId_soffitIndoor,
+                    'soffitIndoorSize': soffitIndoorSize,
+                    'soffitIndoorDepth': soffitIndoorDepth,
+                    'processConfigId[sillOutdoor]': processConfigId_sillOutdoor,
+                    'sillOutdoorSize': sillOutdoorSize,
+                    'sillOutdoorDepth': sillOutdoorDepth,
+                    'processConfigId[soffitOutdoor]': processConfigId_soffitOutdoor,
+                    'soffitOutdoorSize': soffitOutdoorSize,
+                    'soffitOutdoorDepth': soffitOutdoorDepth,
+                    'saveElement': 'Speichern'
+                }
+                # save the windows with the data from the dictionary
+                response_save_window = client.save_window(window_save_data)
+
+    # Save components
+    # Outer walls have the code 246 in eLCA
+    save_components(246)
+    # Windows have the code 250 in eLCA
+    save_components(250)
+    # Roofs have the code 269 in eLCA
+    save_components(269)
+
+    # Add final energy audit
+    # Update headers to enter final energy input page
+    enev_response = client.open_energy_demand()
+    # Save the energy demand and specify net floor area according to EnEV
+    ngf_enev_response = client.save_energy_demand({
+        'projectVariantId': current_variant_id,
+        'addDemand': '',
+        'addEnergyDemand': 'Bedarf hinzufügen',
+        # Specify net floor area according to EnEV
+        'ngf': variant['net_floor_area_enev'],
+        'enEvVersion': ''
+    })
+    # Specify energy source and save
+    energy_source_response = client.select_energy_carrier({
+        'relId': 'newDemand',
+        'projectVariantId': current_variant_id,
+        'ngf': variant['net_floor_area_enev'],
+        'enEvVersion': '',
+        'headline': 'Baustoff suchen und wählen',
+        'p': '',
+        'sp': '',
+        # 53 is Ökobaudat 2021 II but there are errors in this database,
+        # that's why Ökobaudat 2016 is chosen with the ID 45
+        'db': '45',
+        'filterByProjectVariantId': '',
+        'tpl': '',
+        'b': 'operation',
+        'u': 'kWh',
+        'search': '',
+        # Category 8.06 Usage: Selections from this only.
+        'processCategoryNodeId': '679',
+        # retrive energy carrier ID chosen by user in GUI
+        'id': variant['energy_source'],
+        'select': 'Übernehmen'
+    })
+    # Specify end energy for heating and warm water
+    end_energy_response = client.save_energy_demand({
+        'projectVariantId': current_variant_id,
+        # only one energy carrier in eLCArefurb
+        'addDemand': '1',
+        # energy carrier from JSON data
+        'processConfigId[newDemand]': variant['energy_source'],
+        # energy need for heating from JSON data
+        'heating[newDemand]': variant['energy_heating'],
+        # energy need for hot water from JSON data
+        'water[newDemand]': variant['energy_water'],
+        'lighting[newDemand]': '',
+        'ventilation[newDemand]': '',
+        'cooling[newDemand]': '',
+        'isKwk[newDemand]': '',
+        'saveEnergyDemand': 'Speichern',
+        # Net floor area
+        'ngf': variant['net_floor_area_enev'],
+        'enEvVersion': ''
+    })
+    # Save the project in the registry, so that the following phases can find the project without
+    # reading the project list of the account
+    register_project(key, refurb_variant, project_id, current_variant_id, input_hash, account)
+
+    print(f"Projekt {variant['projectname']} erstellt!")
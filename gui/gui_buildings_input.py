@@ -1,14 +1,33 @@
 from __future__ import annotations
-from PySide6.QtWidgets import QApplication, QDialog, QFormLayout
+from pathlib import Path
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, QThread, QTimer, Qt, Signal
+from PySide6.QtGui import QColor, QKeySequence
+from PySide6.QtWidgets import QApplication, QDialog, QStyledItemDelegate, QVBoxLayout
 from PySide6 import QtWidgets
-from helpers import load_component_json, save_component_json
+from helpers import TemplateCatalog, load_component_json, save_component_json
+from gui.template_combo_box import TemplateComboBox, template_tooltip
 import sys
 
+# Columns of the archetype table as tuples of the key in archetypes.json and the column title
+TABLE_COLUMNS = [('archetype name', 'Archetype name'), ('GFA in m²', 'GFA in m²'), ('NFA in m²', 'NFA in m²'),
+                 ('final energy heating in kWh/m²a', 'Final energy heating\nin kWh/(m²a)'),
+                 ('final energy hot water in kWh/m²a', 'Final energy hot water\nin kWh/(m²a)'),
+                 ('exterior walls area in m²', 'Area outer walls\nin m²'), ('roof area in m²', 'Area roof\nin m²'),
+                 ('number of windows', 'Number of\nwindows'), ('exterior walls template', 'Exterior walls'),
+                 ('window template', 'Windows'), ('roof template', 'Roof'),
+                 ('energy carrier template', 'Energy source\n(for module B6)'),
+                 ('building age class', 'Building age class')]
+# Template columns with the ID column and the cost group of their templates
+TEMPLATE_COLUMNS = {'exterior walls template': ('exterior walls ID', "330"), 'window template': ('window ID', "334"),
+                    'roof template': ('roof ID', "360")}
+# Time in milliseconds without changes after which the archetypes are validated
+VALIDATION_DELAY = 300
 
-def create_buildings_gui():
+
+def create_buildings_gui(refresh_catalog: bool = False, project_creator=None):
     """
     Load in the templates read out from the eLCA account. A GUI is displayed, where a user can enter information on
-    an archetype of the district. For each distric a user has to specify
+    the archetypes of the district in a table with one row per archetype. For each archetype a user has to specify
     - the net and gross floor areas,
     - the final energy demands for heating, and hot water
     - the areas/ number of all building components included in the analysis,
@@ -16,176 +35,492 @@ def create_buildings_gui():
       from drop-down menus,
     - the energy source and
     - the building age class.
-    The user input is saved in a JSON file.
+    Rows can be pasted from Excel (Ctrl+V, with the columns in the order of the table) or loaded from a CSV, XLSX
+    or JSON file (see import_archetypes). The archetypes are validated in a background thread after each change
+    with the checks of import_archetypes and preflight_projects, so that the table stays responsive for large
+    districts; invalid rows are highlighted and the mistakes are shown as tooltips. Archetypes from a previous
+    execution (archetypes.json) are shown at the start. The user input is saved in a JSON file.
+    With refresh_catalog=True the GUI opens at once with the templates of the last execution (stock_templates.json,
+    refurb_templates.json and refurb_alternatives.json), while collect_templates reads the templates from eLCA in
+    a background thread. New templates are then offered in the dropdown boxes and the archetypes are checked again.
+    With a project_creator the projects of the archetypes are created in eLCA while the user enters further
+    archetypes: when the user adds another archetype, the valid archetypes entered so far are confirmed and put
+    into the queue of the project_creator, archetypes changed after their confirmation are put into it again.
+    Return the saved archetypes, None if the window was closed without saving.
+    :param refresh_catalog: if True, the templates are read from eLCA in the background (see collect_templates)
+    :param project_creator: EarlyProjectCreator (see creation/early_creation.py) that creates the projects of the
+            confirmed archetypes in the background, None if the projects are only created after the input
     """
-    # The stock_templates.json can be selected through the dropdown box
-    stock_templates: list[dict] = load_component_json("stock_templates")
-    # refurb_templates and refurb_alternatives will be used to display the U-Value
-    # of the stock components and the refurbished components
-    refurb_templates: list[dict] = load_component_json("refurb_templates")
-    refurb_alternatives: list[dict] = load_component_json("refurb_alternatives")
-    # JSON file on eLCA energy sources
-    energy_sources: dict[str, str] = load_component_json("energy_sources", "creation")
-    # txt file on building age classes
-    construction_age_classes = open("creation/construction_age_classes.txt", "r")
-    age_classes = construction_age_classes.read()
-    age_classes_list = age_classes.replace('\n', '').split(",")
-    construction_age_classes.close()
-    archetypes = []
+    # The archetype import provides the validation, it is only imported with the GUI because it imports pandas
+    from creation.archetypes_import import (archetype_records, check_archetypes, load_archetype_references,
+                                            read_archetypes_file)
+    import pandas as pd
+    # The stock_templates.json can be selected through the dropdown box, energy sources and building age classes
+    # as well. refurb_alternatives and savings.csv are used by the validation
+    references = load_archetype_references()
+
+    def template_catalog() -> TemplateCatalog:
+        # The templates are indexed by UUID, cost group and name for the dropdown boxes with search
+        return TemplateCatalog(references['stock_templates'], references['refurb_templates'],
+                               references['refurb_alternatives'])
+
+    # Items of the dropdown boxes of the energy sources and building age classes as tuples of name and ID
+    choices = {'energy carrier template': list(references['energy_sources'].items()),
+               'building age class': [(age_class, None) for age_class in references['age_classes']]}
+    keys = [key for key, _ in TABLE_COLUMNS]
+
+    def empty_row() -> dict:
+        row = {key: '' for key in keys}
+        row.update({id_column: '' for id_column, _ in TEMPLATE_COLUMNS.values()})
+        row['number of heating supply systems'] = '1'
+        return row
+
+    # Table model with the archetypes as rows: each row is a dictionary with the keys of archetypes.json, the
+    # values are kept as entered and converted by the validation
+    class ArchetypesModel(QAbstractTableModel):
+        # Emitted when the archetypes have been changed, not when only the highlighting has been changed
+        edited = Signal()
+
+        def __init__(self, rows, catalog, parent=None):
+            super(ArchetypesModel, self).__init__(parent)
+            self.rows = rows
+            self.catalog = catalog
+            # Mistakes of the last validation with the row numbers as keys
+            self.problems = {}
+
+        def rowCount(self, parent=QModelIndex()):
+            return 0 if parent.isValid() else len(self.rows)
+
+        def columnCount(self, parent=QModelIndex()):
+            return 0 if parent.isValid() else len(TABLE_COLUMNS)
+
+        def headerData(self, section, orientation, role=Qt.DisplayRole):
+            if role != Qt.DisplayRole:
+                return None
+            return TABLE_COLUMNS[section][1] if orientation == Qt.Horizontal else str(section + 1)
+
+        def flags(self, index):
+            return Qt.ItemIsSelectable | Qt.ItemIsEnabled | Qt.ItemIsEditable
+
+        def data(self, index, role=Qt.DisplayRole):
+            if not index.isValid():
+                return None
+            row = self.rows[index.row()]
+            key = keys[index.column()]
+            if role in (Qt.DisplayRole, Qt.EditRole):
+                return str(row[key])
+            if role == Qt.UserRole and key in TEMPLATE_COLUMNS:
+                return row[TEMPLATE_COLUMNS[key][0]]
+            if role == Qt.BackgroundRole and index.row() in self.problems:
+                return QColor(255, 210, 210)
+            if role == Qt.ToolTipRole and index.row() in self.problems:
+                return "\n".join(self.problems[index.row()])
+            if role == Qt.ToolTipRole and key in TEMPLATE_COLUMNS and row[TEMPLATE_COLUMNS[key][0]]:
+                # U-values and description of the selected template
+                return template_tooltip(self.catalog, row[TEMPLATE_COLUMNS[key][0]])
+            return None
+
+        def setData(self, index, value, role=Qt.EditRole, template_id=None):
+            if not index.isValid() or role != Qt.EditRole:
+                return False
+            row = self.rows[index.row()]
+            key = keys[index.column()]
+            row[key] = str(value).strip()
+            if key in TEMPLATE_COLUMNS:
+                # Without ID (e.g. pasted names) the template is looked up by its name
+                row[TEMPLATE_COLUMNS[key][0]] = template_id or ''
+            self.dataChanged.emit(index, index)
+            self.edited.emit()
+            return True
+
+        def set_rows(self, rows):
+            self.beginResetModel()
+            self.rows = rows
+            self.problems = {}
+            self.endResetModel()
+            self.edited.emit()
+
+        def insert_rows(self, position, count):
+            self.beginInsertRows(QModelIndex(), position, position + count - 1)
+            self.rows[position:position] = [empty_row() for _ in range(count)]
+            self.endInsertRows()
+            self.edited.emit()
+
+        def remove_rows(self, positions):
+            # Remove from the end, so that the positions of the remaining rows do not change
+            for position in sorted(set(positions), reverse=True):
+                self.beginRemoveRows(QModelIndex(), position, position)
+                del self.rows[position]
+                self.endRemoveRows()
+            # The highlighting of the following rows is out of date until the next validation
+            self.problems = {}
+            self.edited.emit()
+
+        def paste(self, top, left, text):
+            # Paste tab-separated rows (e.g. copied from Excel), further rows are added to the table
+            lines = [line.split("\t") for line in text.rstrip("\r\n").replace("\r\n", "\n").split("\n")]
+            missing = top + len(lines) - len(self.rows)
+            if missing > 0:
+                self.insert_rows(len(self.rows), missing)
+            for row_offset, values in enumerate(lines):
+                row = self.rows[top + row_offset]
+                for key, value in zip(keys[left:], values):
+                    row[key] = value.strip()
+                    if key in TEMPLATE_COLUMNS:
+                        # Pasted templates are looked up by their names
+                        row[TEMPLATE_COLUMNS[key][0]] = ''
+            self.dataChanged.emit(self.index(top, left), self.index(top + len(lines) - 1, len(keys) - 1))
+            self.edited.emit()
+
+        def show_problems(self, problems):
+            self.problems = problems
+            if self.rows:
+                self.dataChanged.emit(self.index(0, 0), self.index(len(self.rows) - 1, len(keys) - 1),
+                                      [Qt.BackgroundRole, Qt.ToolTipRole])
+
+    # Dropdown boxes for the templates (with search, see TemplateComboBox), energy sources and building age classes
+    class ChoiceDelegate(QStyledItemDelegate):
+
+        def __init__(self, catalog, parent=None):
+            super(ChoiceDelegate, self).__init__(parent)
+            self.catalog = catalog
+            # Open template dropdown boxes, they are updated when the template catalog is refreshed
+            self.combo_boxes = set()
+
+        def createEditor(self, parent, option, index):
+            key = keys[index.column()]
+            if key in TEMPLATE_COLUMNS:
+                combo_box = TemplateComboBox(self.catalog, TEMPLATE_COLUMNS[key][1], parent)
+                self.combo_boxes.add(combo_box)
+                combo_box.destroyed.connect(lambda: self.combo_boxes.discard(combo_box))
+                return combo_box
+            if key not in choices:
+                return super(ChoiceDelegate, self).createEditor(parent, option, index)
+            combo_box = QtWidgets.QComboBox(parent)
+            for name, choice_id in choices[key]:
+                combo_box.addItem(name, choice_id)
+            return combo_box
+
+        def update_catalog(self, catalog):
+            # The open dropdown boxes keep the selected template if it still exists
+            self.catalog = catalog
+            for combo_box in list(self.combo_boxes):
+                combo_box.set_catalog(catalog)
+
+        def setEditorData(self, editor, index):
+            if isinstance(editor, TemplateComboBox):
+                # Select the template with the ID of the archetype, otherwise the first template with its name
+                return editor.select(index.data(Qt.UserRole), index.data())
+            if not isinstance(editor, QtWidgets.QComboBox):
+                return super(ChoiceDelegate, self).setEditorData(editor, index)
+            editor.setCurrentIndex(max(editor.findText(index.data()), 0))
+
+        def setModelData(self, editor, model, index):
+            if not isinstance(editor, QtWidgets.QComboBox):
+                return super(ChoiceDelegate, self).setModelData(editor, model, index)
+            # The text of an editable dropdown box can be an incomplete search text
+            model.setData(index, editor.itemText(editor.currentIndex()), template_id=editor.currentData())
+
+    # Validation of the archetypes in a background thread with the checks of import_archetypes
+    class ValidationWorker(QThread):
+        validated = Signal(int, object, object)
+
+        def __init__(self, generation, rows, catalog, parent=None):
+            super(ValidationWorker, self).__init__(parent)
+            self.generation = generation
+            self.rows = rows
+            self.catalog = catalog
+
+        def run(self):
+            # Empty IDs are looked up by the names of the templates
+            df_archetypes = pd.DataFrame(self.rows)
+            df_archetypes, problems = check_archetypes(df_archetypes, self.catalog)
+            # Assign the mistakes to the rows by the names of the archetypes
+            row_problems = {}
+            for problem in problems:
+                for position, row in enumerate(self.rows):
+                    if problem.startswith(f"Archetyp {row['archetype name']}:"):
+                        row_problems.setdefault(position, []).append(problem.split(": ", 1)[1])
+            # Mistakes that concern several archetypes (e.g. missing columns) are shown for all rows
+            if problems and not row_problems:
+                row_problems = {position: problems for position in range(len(self.rows))}
+            # Valid archetypes with their positions, with a project_creator the archetypes without mistakes are
+            # checked again on their own, so that they can be confirmed before the other archetypes are corrected
+            valid_records = {}
+            if not problems:
+                valid_records = dict(enumerate(archetype_records(df_archetypes)))
+            elif project_creator is not None:
+                valid_positions = [position for position in range(len(self.rows)) if position not in row_problems]
+                if valid_positions:
+                    df_valid, valid_problems = check_archetypes(
+                        pd.DataFrame([self.rows[position] for position in valid_positions]), self.catalog)
+                    if not valid_problems:
+                        valid_records = dict(zip(valid_positions, archetype_records(df_valid)))
+            self.validated.emit(self.generation, row_problems, valid_records)
+
+    # Refresh of the template catalog in a background thread
+    class CatalogWorker(QThread):
+        refreshed = Signal(object)
+        failed = Signal(str)
+
+        def run(self):
+            from creation.components_collection import collect_templates
+            try:
+                collect_templates()
+                self.refreshed.emit(load_archetype_references())
+            except Exception as error:
+                # The GUI keeps the templates of the last execution
+                self.failed.emit(f'{type(error).__name__}: {error}')
+
+    class ArchetypesTable(QtWidgets.QTableView):
+
+        def keyPressEvent(self, event):
+            index = self.currentIndex()
+            if event.matches(QKeySequence.Paste) and index.isValid():
+                self.model().paste(index.row(), index.column(), QApplication.clipboard().text())
+            elif event.key() in (Qt.Key_Delete, Qt.Key_Backspace) \
+                    and self.state() != QtWidgets.QAbstractItemView.EditingState:
+                for selected in self.selectedIndexes():
+                    self.model().setData(selected, '')
+            else:
+                super(ArchetypesTable, self).keyPressEvent(event)
 
     class Form(QDialog):
 
         def __init__(self, parent=None):
             super(Form, self).__init__(parent)
             self.setWindowTitle("eLCArefurb")
-            layout = QFormLayout()
-            self.form_data = []
-            self.create_form(layout)
-            self.comp_boxes = []
-            cost_groups = {"330": "exterior walls", "334": "windows", "360": "roofs"}
-            for cost_group, component_name in cost_groups.items():
-                self.create_component_combo_box(layout, cost_group, component_name)
-            self.create_energy_carrier_combo_box(layout, energy_sources)
-            self.create_age_class_combo_box(layout, age_classes_list)
-
-            self.first_button = QtWidgets.QPushButton("Add another archetype")
-            layout.addRow(self.first_button)
-            self.first_button.clicked.connect(self.press_it_next)
-            self.second_button = QtWidgets.QPushButton("Do not add any more archetypes and show input data")
-            layout.addRow(self.second_button)
-            self.second_button.clicked.connect(self.press_it_done)
+            self.resize(1400, 600)
+            layout = QVBoxLayout()
+            label_1 = QtWidgets.QLabel("Please add information on the building archetypes, one archetype per row. "
+                                       "Rows can be pasted from Excel (Ctrl+V).")
+            if project_creator is not None:
+                label_1.setText(f"{label_1.text()}\nWhen you add another archetype, the eLCA projects of the valid "
+                                f"archetypes are created in the background.")
+            label_1.setStyleSheet("font-size: 16pt")
+            layout.addWidget(label_1)
+            # Archetypes of a previous execution
+            rows = []
+            if (Path("temp_data") / "archetypes.json").exists():
+                rows = [{**empty_row(), **{key: str(value) for key, value in archetype.items()}}
+                        for archetype in load_component_json("archetypes")]
+            catalog = template_catalog()
+            self.model = ArchetypesModel(rows or [empty_row()], catalog, self)
+            self.table = ArchetypesTable(self)
+            self.table.setModel(self.model)
+            self.delegate = ChoiceDelegate(catalog, self.table)
+            self.table.setItemDelegate(self.delegate)
+            self.table.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
+            self.table.setEditTriggers(QtWidgets.QAbstractItemView.AllEditTriggers)
+            layout.addWidget(self.table)
+
+            buttons = QtWidgets.QHBoxLayout()
+            self.add_button = QtWidgets.QPushButton("Add archetype")
+            self.add_button.clicked.connect(self.press_add)
+            self.remove_button = QtWidgets.QPushButton("Remove selected archetypes")
+            self.remove_button.clicked.connect(self.press_remove)
+            self.load_button = QtWidgets.QPushButton("Load archetypes from file (CSV, XLSX, JSON)")
+            self.load_button.clicked.connect(self.press_load)
+            for button in [self.add_button, self.remove_button, self.load_button]:
+                buttons.addWidget(button)
+            layout.addLayout(buttons)
+            self.status_label = QtWidgets.QLabel("")
+            layout.addWidget(self.status_label)
+            self.catalog_label = QtWidgets.QLabel("")
+            layout.addWidget(self.catalog_label)
+            self.creation_label = QtWidgets.QLabel("")
+            layout.addWidget(self.creation_label)
+            self.done_button = QtWidgets.QPushButton("Save the archetypes and show input data")
+            self.done_button.setEnabled(False)
+            self.done_button.clicked.connect(self.press_it_done)
+            layout.addWidget(self.done_button)
             self.setLayout(layout)
 
-        def create_form(self, layout):
+            # The validation starts VALIDATION_DELAY after the last change, results of outdated table contents
+            # are ignored
+            self.generation = 0
+            self.validated_generation = -1
+            # Archetypes saved with the save button, None until they are saved
+            self.saved_records = None
+            self.records = []
+            # Valid archetypes of the last validation with their rows as keys
+            self.valid_records = {}
+            self.worker = None
+            self.validation_timer = QTimer(self)
+            self.validation_timer.setSingleShot(True)
+            self.validation_timer.setInterval(VALIDATION_DELAY)
+            self.validation_timer.timeout.connect(self.start_validation)
+            self.model.edited.connect(self.table_changed)
+            self.table_changed()
 
-            label_1 = QtWidgets.QLabel("Please add information on one building archetype \nand add more archetypes with the button below")
-            label_1.setStyleSheet("font-size: 16pt")
-            layout.addRow(label_1)
-            self.archetype_name = QtWidgets.QLineEdit(self)
-            self.gfa = QtWidgets.QLineEdit(self)
-            self.nfa = QtWidgets.QLineEdit(self)
-            self.final_energy_heat = QtWidgets.QLineEdit(self)
-            self.final_energy_water = QtWidgets.QLineEdit(self)
-            self.quantity_outer_walls = QtWidgets.QLineEdit(self)
-            self.quantity_roof = QtWidgets.QLineEdit(self)
-            self.quantity_windows = QtWidgets.QLineEdit(self)
-
-            layout.addRow("Archetype name (no spaces & capital letters combined/ no special characters):", self.archetype_name)
-            # Line: Gross ground space (gfa) according to DIN 276
-            layout.addRow("GFA in m² (only integer or float formats):", self.gfa)
-            # Line: Net ground space (nfa) according to DIN 276
-            layout.addRow("NFA in m² (only integer or float formats):", self.nfa)
-            # Line: Indication of final energy for heating
-            layout.addRow("Final energy for heating in kWh/(m²a)  (only integer or float formats):",
-                          self.final_energy_heat)
-            # Line: Specification of final energy for hot water
-            layout.addRow("Final energy for hot water in kWh/(m²a)  (only integer or float formats):",
-                          self.final_energy_water)
-            # Line: Specification of the masses for the outer walls
-            layout.addRow("Area of the outer walls in m² (only integer or float formats):", self.quantity_outer_walls)
-            # Line: Specification of the masses for the windows
-            layout.addRow("Area of the roof in m² (only integer or float formats):", self.quantity_roof)
-            # Line: Specification of the masses for the roof
-            layout.addRow("Number of windows (only integer formats):", self.quantity_windows)
-
-            self.form_data.append(self.archetype_name)
-            self.form_data.append(self.gfa)
-            self.form_data.append(self.nfa)
-            self.form_data.append(self.final_energy_heat)
-            self.form_data.append(self.final_energy_water)
-            self.form_data.append(self.quantity_outer_walls)
-            self.form_data.append(self.quantity_roof)
-            self.form_data.append(self.quantity_windows)
+            # Refresh of the template catalog while the archetypes are entered
+            self.catalog_worker = None
+            if refresh_catalog:
+                self.catalog_label.setText("The component templates are being read from eLCA in the background, "
+                                           "the templates of the last execution are shown until then...")
+                self.catalog_worker = CatalogWorker(self)
+                self.catalog_worker.refreshed.connect(self.update_catalog)
+                self.catalog_worker.failed.connect(self.report_catalog_error)
+                self.catalog_worker.finished.connect(self.finish_catalog)
+                self.catalog_worker.start()
+            # The window is closed when the refresh of the template catalog has finished
+            self.close_when_refreshed = False
 
-            self.setLayout(layout)
-            return self.form_data
-
-        def create_component_combo_box(self, layout, cost_group, component_name):
-            comp_combo_box = QtWidgets.QComboBox(self)
-            for stock_template in stock_templates:
-                if stock_template['CG_DIN_276'] == cost_group:
-                    comp_combo_box.addItem(stock_template['template_name'], stock_template['UUID'])
-            self.layout().addWidget(comp_combo_box)
-            layout.addRow(f"Selection {component_name}", comp_combo_box)
-            self.comp_boxes.append(comp_combo_box)
-            self.setLayout(layout)
+            # Archetypes put into the queue of the project_creator with their names as keys, the archetypes are
+            # confirmed when the validation is current
+            self.confirmed = {}
+            self.confirm_pending = False
+            self.creation_timer = QTimer(self)
+            self.creation_timer.setInterval(1000)
+            self.creation_timer.timeout.connect(self.show_creation)
 
-        def create_energy_carrier_combo_box(self, layout, energy_sources):
-            # Create a Combo box for energy sources
-            self.energy_carrier_combo_box = QtWidgets.QComboBox(self)
-            for key, value in energy_sources.items():
-                # Add the name (key) as currentText parameter of combo box and ID (value) as currentData parameter
-                self.energy_carrier_combo_box.addItem(key, value)
-                # Create a widget from the combo box
-            self.layout().addWidget(self.energy_carrier_combo_box)
-            # Line: Set energy carrier combo box and give information on what to choose in this selection box
-            layout.addRow("Selection of energy source (for module B6)", self.energy_carrier_combo_box)
-            self.setLayout(layout)
+        def update_catalog(self, refreshed_references):
+            known_ids = {template['UUID'] for template in references['stock_templates']}
+            new_templates = [template for template in refreshed_references['stock_templates']
+                             if template['UUID'] not in known_ids]
+            references.update(refreshed_references)
+            catalog = template_catalog()
+            self.model.catalog = catalog
+            self.delegate.update_catalog(catalog)
+            self.catalog_label.setText(f"The component templates have been read from eLCA: "
+                                       f"{len(references['stock_templates'])} templates, {len(new_templates)} new.")
+            # The archetypes are checked against the refreshed templates
+            self.table_changed()
 
-        def create_age_class_combo_box(self, layout, age_classes):
-            # Create a Combo box for building age class
-            self.building_age_combo_box = QtWidgets.QComboBox(self)
-            # Add the list of building age classes to the combo box
-            self.building_age_combo_box.addItems(age_classes)
-            # Create a widget from the combo box
-            self.layout().addWidget(self.building_age_combo_box)
-            # Line: Set buidling age class combo box and give information on what to choose in this selection box
-            layout.addRow("Selection building age class", self.building_age_combo_box)
-            self.setLayout(layout)
+        def report_catalog_error(self, error):
+            self.catalog_label.setText(f"The component templates could not be read from eLCA ({error}), "
+                                       f"the templates of the last execution are used.")
 
-        def press_it_next(self):
-            if self.read_values() == 'Right formats':
-                self.clear_values(self.form_data)
-            else:
-                pass
+        def table_changed(self):
+            self.generation += 1
+            self.records = []
+            self.valid_records = {}
+            self.done_button.setEnabled(False)
+            self.status_label.setText(f"{len(self.model.rows)} archetypes, checking...")
+            self.validation_timer.start()
 
-        def press_it_done(self):
-            #self.read_values()
-            if self.read_values() == 'Right formats':
-                alert = QtWidgets.QMessageBox()
-                alert.setWindowTitle("eLCArefurb")
-                alert.setText(f'You have defined the following building archetypes: {archetypes}')
-                save_component_json(archetypes, "archetypes")
-                alert.exec_()
-                self.close()
+        def start_validation(self):
+            # Only one validation runs at a time, the next one starts when it has finished
+            if self.worker is not None and self.worker.isRunning():
+                return
+            rows = [dict(row) for row in self.model.rows if any(row[key] for key in keys)]
+            if not rows:
+                self.status_label.setText("Please add at least one archetype.")
+                return
+            self.worker = ValidationWorker(self.generation, rows, dict(references), self)
+            self.worker.validated.connect(self.show_validation)
+            self.worker.start()
+
+        def show_validation(self, generation, row_problems, valid_records):
+            if generation != self.generation:
+                # The table has been changed during the validation
+                self.validation_timer.start()
+                return
+            # The validated rows are the non-empty rows of the table
+            positions = [position for position, row in enumerate(self.model.rows) if any(row[key] for key in keys)]
+            self.model.show_problems({positions[position]: problems for position, problems in row_problems.items()})
+            self.validated_generation = generation
+            self.valid_records = {positions[position]: record for position, record in valid_records.items()}
+            self.records = [] if row_problems else list(valid_records.values())
+            if row_problems:
+                count = sum(len(problems) for problems in row_problems.values())
+                self.status_label.setText(f"{len(positions)} archetypes, {count} mistakes in {len(row_problems)} "
+                                          f"archetypes (red rows, details as tooltip)")
             else:
-                pass
+                self.status_label.setText(f"{len(positions)} archetypes, all archetypes are valid")
+            self.done_button.setEnabled(bool(self.records) and not self.close_when_refreshed)
+            if self.confirm_pending:
+                self.confirm_archetypes()
 
+        def confirm_archetypes(self):
+            # The validation has to be current, otherwise the archetypes are confirmed after the validation
+            if self.validated_generation != self.generation:
+                self.confirm_pending = True
+                return
+            self.confirm_pending = False
+            for record in self.valid_records.values():
+                archetype_name = record['archetype name']
+                if self.confirmed.get(archetype_name) != record and project_creator.submit(record):
+                    self.confirmed[archetype_name] = record
+            if self.confirmed:
+                self.creation_timer.start()
+                self.show_creation()
 
-        def clear_values(self, data):
-            for line in data:
-                line.clear()
+        def show_creation(self):
+            progress = project_creator.progress
+            failed = f", {progress.failed} failed" if progress.failed else ""
+            self.creation_label.setText(f"{progress.completed}/{progress.planned} eLCA projects of "
+                                        f"{len(self.confirmed)} confirmed archetypes created in the background"
+                                        f"{failed}.")
 
-        def read_values(self):
+        def press_add(self):
+            # Adding another archetype confirms the archetypes entered so far
+            if project_creator is not None:
+                self.confirm_archetypes()
+            self.model.insert_rows(len(self.model.rows), 1)
+            self.table.setCurrentIndex(self.model.index(len(self.model.rows) - 1, 0))
+
+        def press_remove(self):
+            self.model.remove_rows([index.row() for index in self.table.selectionModel().selectedIndexes()])
+
+        def press_load(self):
+            file, _ = QtWidgets.QFileDialog.getOpenFileName(self, "eLCArefurb", "",
+                                                            "Archetypes (*.csv *.xlsx *.xlsm *.json)")
+            if not file:
+                return
             try:
-                archetypes.append({
-                    'archetype name': self.archetype_name.text().rstrip(),
-                    'GFA in m²': float(self.gfa.text()),
-                    'NFA in m²': float(self.nfa.text()),
-                    'final energy heating in kWh/m²a': float(self.final_energy_heat.text()),
-                    'final energy hot water in kWh/m²a': float(self.final_energy_water.text()),
-                    'exterior walls area in m²': float(self.quantity_outer_walls.text()),
-                    'roof area in m²': float(self.quantity_roof.text()),
-                    'number of windows': int(self.quantity_windows.text()),
-                    'number of heating supply systems': 1,
-                    'energy carrier template': self.energy_carrier_combo_box.currentText(),
-                    'energy carrier ID': self.energy_carrier_combo_box.currentData(),
-                    'exterior walls template': self.comp_boxes[0].currentText(),
-                    'window template': self.comp_boxes[1].currentText(),
-                    'roof template': self.comp_boxes[2].currentText(),
-                    'exterior walls ID': self.comp_boxes[0].currentData(),
-                    'window ID': self.comp_boxes[1].currentData(),
-                    'roof ID': self.comp_boxes[2].currentData(),
-                    'building age class': self.building_age_combo_box.currentText()
-                })
-                return 'Right formats'
-            except ValueError:
+                df_archetypes = read_archetypes_file(file)
+            except (OSError, ValueError) as error:
                 alert = QtWidgets.QMessageBox()
                 alert.setWindowTitle("eLCArefurb")
-                alert.setText(f'An error occured! Please check the formats of the data on the archetype!')
+                alert.setText(f'The file could not be read: {error}')
                 alert.exec_()
-                return 'Error'
+                return
+            df_archetypes = df_archetypes.astype(object).where(df_archetypes.notna(), '')
+            self.model.set_rows([{**empty_row(), **{key: str(value) for key, value in archetype.items()}}
+                                 for archetype in df_archetypes.to_dict(orient='records')])
+
+        def press_it_done(self):
+            alert = QtWidgets.QMessageBox()
+            alert.setWindowTitle("eLCArefurb")
+            alert.setText(f'You have defined {len(self.records)} building archetypes: '
+                          f'{", ".join(record["archetype name"] for record in self.records)}')
+            save_component_json(self.records, "archetypes")
+            self.saved_records = self.records
+            alert.exec_()
+            self.close()
 
+        def finish_catalog(self):
+            if self.close_when_refreshed:
+                self.close()
+
+        def reject(self):
+            # Escape closes the window like the close button of the title bar
+            if self.catalog_worker is not None and self.catalog_worker.isRunning():
+                self.close()
+            else:
+                super(Form, self).reject()
+
+        def closeEvent(self, event):
+            # The refresh of the template catalog must have finished before the next stages use the template files:
+            # the window stays open without blocking the GUI and closes when the refresh has finished
+            if self.catalog_worker is not None and self.catalog_worker.isRunning():
+                if not self.close_when_refreshed:
+                    print('Die Bauteilvorlagen werden noch aus eLCA eingelesen...')
+                    self.close_when_refreshed = True
+                    for widget in [self.table, self.add_button, self.remove_button, self.load_button,
+                                   self.done_button]:
+                        widget.setEnabled(False)
+                    self.catalog_label.setText("Finishing the refresh of the component templates, the window closes "
+                                               "afterwards...")
+                event.ignore()
+                return
+            # The validation thread must have finished before the window is destroyed
+            self.validation_timer.stop()
+            self.creation_timer.stop()
+            if self.worker is not None:
+                self.worker.wait()
+            super(Form, self).closeEvent(event)
 
     if not QtWidgets.QApplication.instance():
         app = QtWidgets.QApplication(sys.argv)
@@ -195,4 +530,8 @@ def create_buildings_gui():
     form = Form()
     form.show()
     app.exec_()
-    print('The information given on the archetypes has been saved!')
+    if form.saved_records is None:
+        print('The information given on the archetypes has not been saved.')
+    else:
+        print('The information given on the archetypes has been saved!')
+    return form.saved_records
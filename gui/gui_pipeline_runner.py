@@ -0,0 +1,299 @@
+from __future__ import annotations
+from typing import Callable
+import sys
+import time
+from PySide6 import QtWidgets
+from PySide6.QtCore import QObject, QThread, QTimer, Signal
+from PySide6.QtGui import QTextCursor
+from PySide6.QtWidgets import QDialog, QGridLayout, QVBoxLayout
+from helpers import StageCancelled, current_status, clear_status, request_cancel, reset_cancel, cancel_requested
+
+# Interval in milliseconds in which the progress bars are updated from the status of the ProgressTrackers
+POLL_INTERVAL = 500
+# Maximum number of lines of the output shown in the run window
+MAX_OUTPUT_LINES = 2000
+# English names of the units of the ProgressTrackers
+UNIT_NAMES = {"Projekte": "projects", "Abbildungen": "figures"}
+
+
+def duration_text(seconds: float) -> str:
+    """
+    Return a duration as text, e.g. 1:05:12 or 4:30.
+    :param seconds: duration in seconds
+    """
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+
+def create_run_gui(stages: list[tuple[str, Callable, str | None]], run_stage: Callable = None) -> bool:
+    """
+    A window is displayed that runs the stages of eLCArefurb one after the other in a background thread, so that
+    the window stays responsive during the long network phases (project creation, life cycle inventory and impact
+    assessment). Each stage has a progress bar: stages with a ProgressTracker show the completed and planned
+    units, the throughput in units per minute and eLCA requests per second and the remaining time, the other
+    stages show a busy bar and the elapsed time. The printed messages of the stages are shown in the window.
+    The user can cancel the run: the running stage stops before its next project, projects that are being created
+    or read are completed first. Resume continues with the cancelled or failed stage, the projects of the
+    projects registry are not created again and the projects of the harvest cache are not read again. Closing the
+    window during the run cancels it. Return True if all stages were completed.
+    :param stages: stages as tuples of the title shown in the window, the stage function (called without
+            arguments) and the name of its ProgressTracker (see helpers/progress.py), None if it has none
+    :param run_stage: function that runs a stage, e.g. with the profiler (see stage_runner in main.py),
+            by default the stage is called directly
+    """
+    run_stage = run_stage or (lambda stage: stage())
+
+    # Printed messages of the stages, forwarded from the worker threads to the window and to the terminal. The
+    # stream can be written from any thread, the signal is delivered to the window in the GUI thread
+    class OutputStream(QObject):
+        written = Signal(str)
+
+        def __init__(self, terminal, parent=None):
+            super(OutputStream, self).__init__(parent)
+            self.terminal = terminal
+
+        def write(self, text):
+            self.terminal.write(text)
+            self.written.emit(text)
+            return len(text)
+
+        def flush(self):
+            self.terminal.flush()
+
+    # Run the stages from a position on in a background thread
+    class PipelineWorker(QThread):
+        started_stage = Signal(int)
+        finished_stage = Signal(int)
+        cancelled_stage = Signal(int)
+        failed_stage = Signal(int, str)
+
+        def __init__(self, first: int, resumed: bool, parent=None):
+            super(PipelineWorker, self).__init__(parent)
+            self.first = first
+            self.resumed = resumed
+
+        def run(self):
+            for position in range(self.first, len(stages)):
+                # A cancellation between two stages stops before the next stage
+                if cancel_requested():
+                    self.cancelled_stage.emit(position)
+                    return
+                _, stage, progress_stage = stages[position]
+                # The progress of a previous attempt or stage with the same ProgressTracker is not shown, the
+                # progress of a tracker started before the run (e.g. by the creation during the input) is kept
+                if progress_stage is not None and (position > 0 or self.resumed):
+                    clear_status(progress_stage)
+                self.started_stage.emit(position)
+                try:
+                    run_stage(stage)
+                except StageCancelled as cancellation:
+                    print(cancellation)
+                    self.cancelled_stage.emit(position)
+                    return
+                except Exception as error:
+                    print(f'FEHLER in {stage.__name__}: {error!r}')
+                    self.failed_stage.emit(position, f'{type(error).__name__}: {error}')
+                    return
+                self.finished_stage.emit(position)
+
+    class RunWindow(QDialog):
+        def __init__(self, parent=None):
+            super(RunWindow, self).__init__(parent)
+            self.setWindowTitle("eLCArefurb")
+            self.resize(900, 600)
+            layout = QVBoxLayout(self)
+            self.title_label = QtWidgets.QLabel("Running eLCArefurb...")
+            layout.addWidget(self.title_label)
+
+            # One row per stage with title, progress bar and details (throughput, remaining time, errors)
+            grid = QGridLayout()
+            self.bars, self.details = [], []
+            for position, (title, _, _) in enumerate(stages):
+                bar = QtWidgets.QProgressBar(self)
+                bar.setRange(0, 1)
+                bar.setValue(0)
+                bar.setFormat("waiting")
+                detail = QtWidgets.QLabel("", self)
+                detail.setMinimumWidth(380)
+                grid.addWidget(QtWidgets.QLabel(title, self), position, 0)
+                grid.addWidget(bar, position, 1)
+                grid.addWidget(detail, position, 2)
+                self.bars.append(bar)
+                self.details.append(detail)
+            layout.addLayout(grid)
+
+            # Printed messages of the stages
+            self.output_view = QtWidgets.QPlainTextEdit(self)
+            self.output_view.setReadOnly(True)
+            self.output_view.setMaximumBlockCount(MAX_OUTPUT_LINES)
+            layout.addWidget(self.output_view)
+            self.output = OutputStream(sys.stdout, self)
+            self.output.written.connect(self.show_output)
+
+            buttons = QtWidgets.QHBoxLayout()
+            self.cancel_button = QtWidgets.QPushButton("Cancel", self)
+            self.cancel_button.clicked.connect(self.cancel)
+            self.resume_button = QtWidgets.QPushButton("Resume", self)
+            self.resume_button.clicked.connect(self.resume)
+            self.close_button = QtWidgets.QPushButton("Close", self)
+            self.close_button.clicked.connect(self.close)
+            for button in [self.cancel_button, self.resume_button, self.close_button]:
+                buttons.addWidget(button)
+            layout.addLayout(buttons)
+
+            self.worker = None
+            # Position of the running stage, or of the stage where the run stopped, and start time of the stage
+            self.position = 0
+            self.stage_start = None
+            self.completed = False
+            self.resumed = False
+            self.close_when_stopped = False
+            self.poll_timer = QTimer(self)
+            self.poll_timer.setInterval(POLL_INTERVAL)
+            self.poll_timer.timeout.connect(self.show_progress)
+
+        def start(self):
+            # Run the stages from the cancelled or failed stage on
+            reset_cancel()
+            self.title_label.setText("Running eLCArefurb...")
+            self.cancel_button.setText("Cancel")
+            self.cancel_button.setEnabled(True)
+            self.resume_button.setEnabled(False)
+            self.close_button.setEnabled(False)
+            # The printed messages of all threads are shown in the window during the run, sys.stdout is replaced
+            # here in the GUI thread and restored in stop
+            sys.stdout = self.output
+            self.worker = PipelineWorker(self.position, self.resumed, self)
+            self.resumed = True
+            self.worker.started_stage.connect(self.start_stage)
+            self.worker.finished_stage.connect(self.finish_stage)
+            self.worker.cancelled_stage.connect(self.cancel_stage)
+            self.worker.failed_stage.connect(self.fail_stage)
+            self.worker.finished.connect(self.stop)
+            self.poll_timer.start()
+            self.worker.start()
+
+        def start_stage(self, position):
+            self.position = position
+            self.stage_start = time.monotonic()
+            bar = self.bars[position]
+            # Busy bar until the ProgressTracker of the stage knows the planned units
+            bar.setRange(0, 0)
+            bar.setFormat("running")
+            self.details[position].setStyleSheet("")
+            self.details[position].setText("")
+
+        def finish_stage(self, position):
+            self.show_progress()
+            bar = self.bars[position]
+            bar.setRange(0, 1)
+            bar.setValue(1)
+            bar.setFormat("done")
+            # The throughput of a stage with ProgressTracker remains visible
+            tracked = stages[position][2] in current_status()
+            summary = f"{self.details[position].text()}, " if tracked else ""
+            self.details[position].setText(f"{summary}done in {duration_text(time.monotonic() - self.stage_start)}")
+            self.position = position + 1
+            if self.position == len(stages):
+                self.completed = True
+
+        def cancel_stage(self, position):
+            self.show_progress()
+            self.position = position
+            self.stop_stage(position, "cancelled")
+            self.title_label.setText("The run was cancelled. Resume continues with the cancelled stage, projects "
+                                     "that have already been created or read are skipped.")
+
+        def fail_stage(self, position, error):
+            self.show_progress()
+            self.position = position
+            self.stop_stage(position, "failed")
+            self.details[position].setStyleSheet("color: red")
+            self.details[position].setText(error)
+            self.title_label.setText("A stage failed (see the messages below). Resume runs the failed stage "
+                                     "again.")
+
+        def stop_stage(self, position, state):
+            bar = self.bars[position]
+            # A busy bar stays empty, a bar with planned units keeps its value
+            if bar.maximum() == 0:
+                bar.setRange(0, 1)
+                bar.setValue(0)
+            bar.setFormat(f"{state} (%v/%m)" if bar.maximum() > 1 else state)
+
+        def stop(self):
+            # The worker has finished: all stages completed, cancelled or failed
+            self.poll_timer.stop()
+            self.worker = None
+            sys.stdout = self.output.terminal
+            self.cancel_button.setEnabled(False)
+            self.resume_button.setEnabled(not self.completed)
+            self.close_button.setEnabled(True)
+            if self.completed:
+                self.title_label.setText("All stages have been completed.")
+            if self.close_when_stopped:
+                self.close()
+
+        def cancel(self):
+            request_cancel()
+            self.cancel_button.setText("Cancelling after the running projects...")
+            self.cancel_button.setEnabled(False)
+
+        def resume(self):
+            self.start()
+
+        def show_progress(self):
+            # Progress of the running stage from the status of its ProgressTracker
+            if self.stage_start is None or self.position >= len(stages):
+                return
+            progress_stage = stages[self.position][2]
+            status = current_status().get(progress_stage) if progress_stage is not None else None
+            bar, detail = self.bars[self.position], self.details[self.position]
+            if status is None:
+                if bar.maximum() == 0:
+                    detail.setText(f"running for {duration_text(time.monotonic() - self.stage_start)}")
+                return
+            unit = UNIT_NAMES.get(status["unit"], status["unit"])
+            if status["planned"]:
+                bar.setRange(0, status["planned"])
+                bar.setValue(min(status["completed"], status["planned"]))
+                bar.setFormat(f"%v/%m {unit} (%p%)")
+            failed = f", {status['failed']} failed" if status["failed"] else ""
+            eta = "" if status["eta_seconds"] is None or status["state"] != "läuft" \
+                else f", about {duration_text(status['eta_seconds'])} remaining"
+            detail.setText(f"{status['completed']} {unit}{failed}, {status['units_per_minute']:.1f} {unit}/min, "
+                           f"{status['requests_per_second']:.1f} requests/s{eta}")
+
+        def show_output(self, text):
+            cursor = self.output_view.textCursor()
+            cursor.movePosition(QTextCursor.End)
+            cursor.insertText(text)
+            self.output_view.setTextCursor(cursor)
+
+        def reject(self):
+            # Escape closes the window like the close button
+            if self.worker is not None:
+                self.close()
+            else:
+                super(RunWindow, self).reject()
+
+        def closeEvent(self, event):
+            # Closing during the run cancels it, the window closes when the running projects are completed
+            if self.worker is not None:
+                self.close_when_stopped = True
+                self.cancel()
+                event.ignore()
+                return
+            super(RunWindow, self).closeEvent(event)
+
+    if not QtWidgets.QApplication.instance():
+        app = QtWidgets.QApplication(sys.argv)
+    else:
+        app = QtWidgets.QApplication.instance()
+
+    window = RunWindow()
+    window.show()
+    window.start()
+    app.exec_()
+    return window.completed
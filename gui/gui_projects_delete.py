@@ -1,12 +1,9 @@
 from __future__ import annotations
-import glob
-import os
-import os.path
-import shutil
 import sys
 from PySide6 import QtWidgets
+from PySide6.QtCore import QThread, Signal
 from PySide6.QtWidgets import QDialog, QFormLayout
-from helpers import login, projects_dict
+from helpers import delete_registered_projects, delete_temporary_files
 
 
 def delete_projects():
@@ -21,8 +18,26 @@ def delete_projects():
     refurb_templates.json, stock_templates.json) are not removed, but overwritten when the programme is
     executed again. If new components have been created in the eLCArefurb account, they will also be
     read in.
+    Only the eLCA projects of the projects registry are deleted. The deletion runs in a background thread with
+    several parallel requests, so the window stays responsive and shows the progress of the deletion.
     """
 
+    # Delete the registered eLCA projects in a background thread
+    class DeletionWorker(QThread):
+        progress = Signal(int, int, str)
+        deleted = Signal(list)
+        failed = Signal(str)
+
+        def run(self):
+            # Errors before the deletion (e.g. a failed login) are shown in the window
+            try:
+                failed_projects = delete_registered_projects(
+                    progress=lambda done, total, project_name: self.progress.emit(done, total, project_name))
+            except Exception as error:
+                self.failed.emit(f'{type(error).__name__}: {error}')
+                return
+            self.deleted.emit(failed_projects)
+
     # Create graphic user interface (GUI)
 
     class DeleteWindow(QDialog):
@@ -33,11 +48,9 @@ def delete_projects():
             self.setLayout(form_layout)
             # Add widgets
 
-            label_1 = QtWidgets.QLabel("Do you want to delete all data? This may take a few minutes.")
+            label_1 = QtWidgets.QLabel("Do you want to delete all data?")
             form_layout.addRow(label_1)
-
-            self.session = login()
-            self.projects = projects_dict(self.session)
+            self.worker = None
 
             self.first_button = QtWidgets.QPushButton("Delete only the eLCA projects and the temporary data! The "
                                                       "report files must then be deleted manually before the next "
@@ -54,90 +67,87 @@ def delete_projects():
             form_layout.addRow(self.third_button)
             self.third_button.clicked.connect(self.press_not_delete)
 
+            # Show the progress of the deletion of the eLCA projects
+            self.progress_bar = QtWidgets.QProgressBar(self)
+            self.progress_bar.setVisible(False)
+            form_layout.addRow(self.progress_bar)
+
+        def start_deletion(self, finished):
+            # Disable the buttons while the projects are deleted
+            for button in [self.first_button, self.second_button, self.third_button]:
+                button.setEnabled(False)
+            self.progress_bar.setVisible(True)
+            self.progress_bar.setFormat("Deleting eLCA projects...")
+            self.worker = DeletionWorker(self)
+            self.worker.progress.connect(self.show_progress)
+            self.worker.deleted.connect(finished)
+            self.worker.failed.connect(self.report_error)
+            self.worker.start()
+
+        def show_progress(self, done, total, project_name):
+            self.progress_bar.setMaximum(total)
+            self.progress_bar.setValue(done)
+            self.progress_bar.setFormat(f"%v/%m eLCA projects deleted ({project_name})")
+
+        def report_failed_projects(self, failed_projects):
+            if failed_projects:
+                print(f'{len(failed_projects)} projects could not be deleted and remain in the projects registry.')
+            else:
+                print('All projects have been deleted.')
+
+        def failed_projects_text(self, failed_projects):
+            # The temporary files are kept if projects remain, so that their deletion can be repeated
+            failed_names = ", ".join(f'{project["archetype"]} {project["variant"]}' for project in failed_projects)
+            return (f'{len(failed_projects)} eLCA projects could not be deleted ({failed_names}). They remain in '
+                    f'the projects registry and the temporary files have been kept. Please repeat the deletion.')
+
+        def report_error(self, error):
+            # The deletion can be started again
+            self.progress_bar.setVisible(False)
+            for button in [self.first_button, self.second_button, self.third_button]:
+                button.setEnabled(True)
+            self.worker = None
+            alert = QtWidgets.QMessageBox()
+            alert.setWindowTitle("eLCArefurb")
+            alert.setText(f'The eLCA projects could not be deleted: {error}')
+            alert.exec_()
+
             # If " Delete temporary files and eLCA projects" is pressed:
 
         def press_delete(self):
+            self.start_deletion(self.finish_delete)
 
-            try:
-                # Read project-IDs and create dictionary of project_id as keys and project_name as value
-                # Delete all projects
-                for (key, value) in self.projects.items():
-                    response = self.session.get(
-                        "https://www.bauteileditor.de/projects/delete/?confirmed&id={}".format(key))
-                    print("Project {} is deleted...".format(value))
-                print(f'All projects have been deleted.')
-            # If there are no projects in the account, show error message
-            except AttributeError:
-                print(f'There are no projects in the account that could be deleted')
-
-            # Delete the directories of the archetypes in "temp_data"
-            # Create list of all folders and files in "temp_data"
-            filelist = glob.glob(os.path.join("temp_data", "*"))
-            # Iterate through list
-            for f in filelist:
-                try:
-                    # If it is a directiory it can be deleted through this line
-                    shutil.rmtree(f)
-                    print(f'{f} has been deleted!')
-                # "try" for all files and "except" for all folders
-                # If it is not a directory, pass
-                except NotADirectoryError:
-                    pass
-            print("All temporary files have been deleted!")
-            # Message Box
+        def finish_delete(self, failed_projects):
+            self.worker = None
+            self.report_failed_projects(failed_projects)
             alert1 = QtWidgets.QMessageBox()
             alert1.setWindowTitle("eLCArefurb")
-            alert1.setText(
-                'All eLCA projects and temporary files have been deleted. The report files '
-                'must be deleted manually before the next execution of the tool.')
+            if failed_projects:
+                alert1.setText(self.failed_projects_text(failed_projects))
+            else:
+                # Delete the directories of the archetypes in "temp_data"
+                delete_temporary_files()
+                alert1.setText(
+                    'All eLCA projects and temporary files have been deleted. The report files '
+                    'must be deleted manually before the next execution of the tool.')
             alert1.exec_()
             self.close()
 
         # If "Delete temporary files, eLCA projects and result files" is pressed:
         def press_delete_results(self):
-            # Enter all accounts
-            try:
-                # Delete all projects
-                for (key, value) in self.projects.items():
-                    response = self.session.get(
-                        "https://www.bauteileditor.de/projects/delete/?confirmed&id={}".format(key))
-                    print("Project {} is deleted...".format(value))
-                print(f'AAll projects have been deleted.')
-            # If there are no projects in the account, show error message
-            except AttributeError:
-                print('There are no projects included that could be deleted.')
-            # Delete the directories of the archetypes in "temp_data"
-            # Create list of all folders and files in "temp_data"
-            filelist = glob.glob(os.path.join("temp_data", "*"))
-            # Iterate through list
-            for f in filelist:
-                try:
-                    # If it is a directory it can be deleted through this line
-                    shutil.rmtree(f)
-                    print(f'{f} has been deleted!')
-                # "try" for all files and "except" for all folders
-                # If it is not a directory, pass
-                except NotADirectoryError:
-                    pass
-            print("All temporary files have been deleted!")
-
-            # Make lists of files for every directory in district_reports
-            lci_files = glob.glob(os.path.join("district_reports\\life_cycle_inventory", "*"))
-            lcia_files = glob.glob(os.path.join("district_reports\\life_cycle_impact", "*"))
-
-            # Create list of files for all files in district_reports
-            list_of_file_lists = [lci_files, lcia_files]
-            # Iterate through all files in the directory district_reports to delete the files
-            for directory in list_of_file_lists:
-                for file in directory:
-                    os.remove(file)
-                    print(f"{file} has been deleted!")
-
-            print("All data has been deleted!")
-            # Message Box
+            self.start_deletion(self.finish_delete_results)
+
+        def finish_delete_results(self, failed_projects):
+            self.worker = None
+            self.report_failed_projects(failed_projects)
             alert2 = QtWidgets.QMessageBox()
             alert2.setWindowTitle("eLCArefurb")
-            alert2.setText('All data on has been deleted.')
+            if failed_projects:
+                alert2.setText(self.failed_projects_text(failed_projects))
+            else:
+                # Delete the directories of the archetypes in "temp_data" and the report files
+                delete_temporary_files(include_reports=True)
+                alert2.setText('All data has been deleted.')
             alert2.exec_()
             self.close()
 
@@ -150,6 +160,21 @@ def delete_projects():
             self.close()
             print("The data is not automatically deleted.")
 
+        def closeEvent(self, event):
+            # The window is not closed while the projects are deleted, the running thread must not be destroyed
+            if self.worker is not None and self.worker.isRunning():
+                self.progress_bar.setFormat("Please wait until the eLCA projects have been deleted... (%v/%m)")
+                event.ignore()
+                return
+            super(DeleteWindow, self).closeEvent(event)
+
+        def reject(self):
+            # Escape does not close the window while the projects are deleted either
+            if self.worker is not None and self.worker.isRunning():
+                self.close()
+            else:
+                super(DeleteWindow, self).reject()
+
     if not QtWidgets.QApplication.instance():
         app = QtWidgets.QApplication(sys.argv)
     else:
@@ -1,7 +1,7 @@
 from __future__ import annotations
 import PyQt5.QtWidgets as qtw
 import PyQt5.QtGui as qtg
-from helpers import load_component_json, save_component_json
+from helpers import TemplateCatalog, load_component_json, save_component_json
 
 
 def create_quarter_gui():
@@ -31,11 +31,10 @@ def create_quarter_gui():
 
     """
     # The stock_templates.json can be selected through the dropdown box
-    stock_templates: list[dict] = load_component_json("stock_templates")
     # refurb_templates and refurb_alternatives will be used to display the U-Value
-    # of the stock components and the refurbished components
-    refurb_templates: list[dict] = load_component_json("refurb_templates")
-    refurb_alternatives: list[dict] = load_component_json("refurb_alternatives")
+    # of the stock components and the refurbished components.
+    # The catalog indexes the templates by UUID and cost group, so that the U-Values are looked up directly
+    catalog = TemplateCatalog.from_files()
 
     # The energy_sources.json can be selected through the dropdown box
     energy_sources: dict[str, str] = load_component_json("energy_sources")
@@ -123,12 +122,11 @@ def create_quarter_gui():
             # Create a Combo box (selection box) for outer wall components
             wall_combo_box = qtw.QComboBox(self)
             # Add items to the Combo Box
-            for template in stock_templates:
-                # wall combo box only contains walls
-                # walls have the cost group 330
-                if template['KGR_DIN_276'] == "330":
-                    # Add the name as currentText parameter of combo box and ID as currentData parameter
-                    wall_combo_box.addItem(template['Vorlage'], template['UUID'])
+            # wall combo box only contains walls
+            # walls have the cost group 330
+            for template in catalog.templates("330"):
+                # Add the name as currentText parameter of combo box and ID as currentData parameter
+                wall_combo_box.addItem(template['template_name'], template['UUID'])
             # Create a widget from the combo box
             self.layout().addWidget(wall_combo_box)
             # Line: Set wall combo box and give information on what to choose in this selection box
@@ -136,32 +134,15 @@ def create_quarter_gui():
             # Show description  and U-Value of the currently selected component
             # Show the U-Value of the corresponding refurbished component
 
-            # Iterate through all stock templates to find the fitting name (currentText parameter of combo box)
-            for template in stock_templates:
-                if template['Vorlage'] == wall_combo_box.currentText():
-                    # Choose the right U-Value from dictionary of stock components
-                    wall_u_value = template['U-Wert']
-                    # Choose the right description from dictionary of stock components
-                    wall_description = template['Beschreibung']
-                    # Choose the right U-Value of the corresponding refurbished component
-                    # Get the ID of the stock component
-                    wall_id = template['UUID']
-                    # search for ID of corresponding refurbished component
-                    for key, value in refurb_alternatives.items():
-                        if key == wall_id:
-                            for refurb_template in refurb_templates:
-                                # Get the U-Value of the refurbished component with the ID of the refurbished component
-                                if value == refurb_template['UUID']:
-                                    wall_u_value_refurb = refurb_template['U-Wert']
-                                    # If the corresponding U-Value of the refurbished component was found,
-                                    # break the loop
-                                    break
+            # Look up the U-Value and the description of the selected template (ID as currentData parameter) and the
+            # U-Value of the corresponding refurbished component
+            wall_id = wall_combo_box.currentData()
             # Add label for U-Value of stock component
-            u_value_label_wall = qtw.QLabel(wall_u_value)
+            u_value_label_wall = qtw.QLabel(catalog.u_value(wall_id))
             # Add label fo U-Value of refurbished component
-            u_value_label_wall_refurb = qtw.QLabel(wall_u_value_refurb)
+            u_value_label_wall_refurb = qtw.QLabel(catalog.refurbishment_u_value(wall_id))
             # Add label for the description of the stock component
-            description_label_wall = qtw.QLabel(wall_description)
+            description_label_wall = qtw.QLabel(catalog.description(wall_id))
             # Lines: Add rows for U-Values
             form_layout.addRow("Bestand U-Wert in W/(m²K) Außenwand", u_value_label_wall)
             form_layout.addRow("Sanierung U-Wert in W/(m²K) Außenwand", u_value_label_wall_refurb)
@@ -172,26 +153,12 @@ def create_quarter_gui():
             #  Change the description and U-Values if the selection of the combo box is changed
             # Define function to change the description and U-Values according to the currently selected wall component
             def change_description_uvalue(ComboBox, description_label, u_value_label, u_value_label_refurb):
-                for template in stock_templates:
-                    # Choose the right description from dictionary of stock components
-                    # Iterate through all stock templates to find the fitting name (currentText parameter of combo box)
-                    if template['Vorlage'] == ComboBox.currentText():
-                        # Show U-Value of template
-                        u_value = template['U-Wert']
-                        # Show the new description unterneath the wall combo box
-                        description = template['Beschreibung']
-                        # Get the U-Value of the refurbished component (see comments above)
-                        template_id = template['UUID']
-                        for key, value in refurb_alternatives.items():
-                            if key == template_id:
-                                for refurb_template in refurb_templates:
-                                    if value == refurb_template['UUID']:
-                                        u_value_refurb = refurb_template['U-Wert']
-                                        break
+                # Get the ID of the selected template (see comments above)
+                template_id = ComboBox.currentData()
                 # Change the labels according to current selection of the combo box
-                u_value_label.setText(u_value)
-                u_value_label_refurb.setText(u_value_refurb)
-                description_label.setText(description)
+                u_value_label.setText(catalog.u_value(template_id))
+                u_value_label_refurb.setText(catalog.refurbishment_u_value(template_id))
+                description_label.setText(catalog.description(template_id))
 
             # Execute function to change the description and U-Values
             wall_combo_box.currentIndexChanged.connect(
@@ -201,32 +168,21 @@ def create_quarter_gui():
             # Create a Combo box for windows
             window_combo_box = qtw.QComboBox(self)
             # Add items to the Combo Box
-            for template in stock_templates:
-                # window combo box only contains windows
-                # windows have the cost group 334
-                if template['KGR_DIN_276'] == "334":
-                    # Add the name as currentText parameter of combo box and ID as currentData parameter
-                    window_combo_box.addItem(template['Vorlage'], template['UUID'])
+            # window combo box only contains windows
+            # windows have the cost group 334
+            for template in catalog.templates("334"):
+                # Add the name as currentText parameter of combo box and ID as currentData parameter
+                window_combo_box.addItem(template['template_name'], template['UUID'])
             # Create a widget from the combo box
             self.layout().addWidget(window_combo_box)
             # Line: Set window combo box and give information on what to choose in this selection box
             form_layout.addRow("Auswahl Fenster KGR 334", window_combo_box)
             # See wall templates for comments on the code
             # Procedure is analogous to the wall components
-            for template in stock_templates:
-                if template['Vorlage'] == window_combo_box.currentText():
-                    window_u_value = template['U-Wert']
-                    window_description = template['Beschreibung']
-                    window_id = template['UUID']
-                    for key, value in refurb_alternatives.items():
-                        if key == window_id:
-                            for refurb_template in refurb_templates:
-                                if value == refurb_template['UUID']:
-                                    window_u_value_refurb = refurb_template['U-Wert']
-                                    break
-            u_value_label_window = qtw.QLabel(window_u_value)
-            u_value_label_window_refurb = qtw.QLabel(window_u_value_refurb)
-            description_label_window = qtw.QLabel(window_description)
+            window_id = window_combo_box.currentData()
+            u_value_label_window = qtw.QLabel(catalog.u_value(window_id))
+            u_value_label_window_refurb = qtw.QLabel(catalog.refurbishment_u_value(window_id))
+            description_label_window = qtw.QLabel(catalog.description(window_id))
             form_layout.addRow("Bestand U-Wert in W/(m²K) Fenster", u_value_label_window)
             form_layout.addRow("Sanierung U-Wert in W/(m²K) Fenster", u_value_label_window_refurb)
             form_layout.addRow("Beschreibung Fenster", description_label_window)
@@ -237,31 +193,20 @@ def create_quarter_gui():
             # Create a combo box for roofs
             roof_combo_box = qtw.QComboBox(self)
             # Add items to the Combo Box
-            for template in stock_templates:
-                # roof combo box only contains roofs
-                # roods have the cost group 360
-                if template['KGR_DIN_276'] == "360":
-                    # Add the name as currentText parameter of combo box and ID as currentData parameter
-                    roof_combo_box.addItem(template['Vorlage'], template['UUID'])
+            # roof combo box only contains roofs
+            # roods have the cost group 360
+            for template in catalog.templates("360"):
+                # Add the name as currentText parameter of combo box and ID as currentData parameter
+                roof_combo_box.addItem(template['template_name'], template['UUID'])
             # Create a widget from the combo box
             self.layout().addWidget(roof_combo_box)
             # Line: Set roof combo box and give information on what to choose in this selection box
             form_layout.addRow("Auswahl Dach KGR 360", roof_combo_box)
             # Procedure is analogous to the wall components
-            for template in stock_templates:
-                if template['Vorlage'] == roof_combo_box.currentText():
-                    roof_u_value = template['U-Wert']
-                    roof_description = template['Beschreibung']
-                    roof_id = template['UUID']
-                    for key, value in refurb_alternatives.items():
-                        if key == roof_id:
-                            for refurb_template in refurb_templates:
-                                if value == refurb_template['UUID']:
-                                    roof_u_value_refurb = refurb_template['U-Wert']
-                                    break
-            u_value_label_roof = qtw.QLabel(roof_u_value)
-            u_value_label_roof_refurb = qtw.QLabel(roof_u_value_refurb)
-            description_label_roof = qtw.QLabel(roof_description)
+            roof_id = roof_combo_box.currentData()
+            u_value_label_roof = qtw.QLabel(catalog.u_value(roof_id))
+            u_value_label_roof_refurb = qtw.QLabel(catalog.refurbishment_u_value(roof_id))
+            description_label_roof = qtw.QLabel(catalog.description(roof_id))
             form_layout.addRow("Bestand U-Wert in W/(m²K) Dach", u_value_label_roof)
             form_layout.addRow("Sanierung U-Wert in W/(m²K) Dch", u_value_label_roof_refurb)
             form_layout.addRow("Beschreibung Dach", description_label_roof)
@@ -1,7 +1,7 @@
 from __future__ import annotations
 from PySide6.QtWidgets import QApplication, QDialog, QFormLayout
 from PySide6 import QtWidgets
-from helpers import save_component_json, login
+from helpers import save_component_json, get_client, invalidate_clients
 import sys
 
 
@@ -61,7 +61,9 @@ def create_login_gui():
                 'Password': self.password.text()})
             save_component_json(login_credentials, "login_credentials")
             try:
-                login()
+                # The sessions of the previous login credentials are no longer valid
+                invalidate_clients()
+                get_client(force_login=True)
                 return 'successful'
             except ValueError:
                 alert = QtWidgets.QMessageBox()
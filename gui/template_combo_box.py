@@ -0,0 +1,164 @@
+from __future__ import annotations
+from PySide6.QtCore import QAbstractListModel, QModelIndex, Qt
+from PySide6.QtWidgets import QComboBox, QCompleter, QLineEdit
+from helpers import TemplateCatalog
+
+# Number of templates added to a list at a time when the user scrolls down
+BATCH_SIZE = 100
+# Maximum number of templates suggested while the user types
+MAX_SUGGESTIONS = 50
+
+
+class TemplateListModel(QAbstractListModel):
+    """
+    List of templates for the template combo boxes. The rows are populated lazily: the views request more rows
+    with fetchMore when the user scrolls, so that a list of thousands of templates opens instantly.
+    """
+
+    def __init__(self, catalog: TemplateCatalog, templates: list[dict] = None, parent=None):
+        """
+        :param catalog: template catalog for the tooltips with the U-values and descriptions
+        :param templates: templates of the list
+        """
+        super(TemplateListModel, self).__init__(parent)
+        self.catalog = catalog
+        self.set_templates(templates or [])
+
+    def set_templates(self, templates: list[dict]) -> None:
+        self.beginResetModel()
+        self.templates = templates
+        # Rows of the templates with their UUIDs as keys
+        self.rows = {str(template['UUID']): row for row, template in enumerate(templates)}
+        self.loaded = min(len(templates), BATCH_SIZE)
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.loaded
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self.loaded < len(self.templates)
+
+    def fetchMore(self, parent=QModelIndex()):
+        self.fetch_rows(self.loaded + BATCH_SIZE)
+
+    def fetch_rows(self, count: int) -> None:
+        """
+        Load the rows up to a number of rows.
+        :param count: number of rows that have to be loaded
+        """
+        count = min(count, len(self.templates))
+        if count <= self.loaded:
+            return
+        self.beginInsertRows(QModelIndex(), self.loaded, count - 1)
+        self.loaded = count
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= self.loaded:
+            return None
+        template = self.templates[index.row()]
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            return template['template_name']
+        if role == Qt.UserRole:
+            return template['UUID']
+        if role == Qt.ToolTipRole:
+            return template_tooltip(self.catalog, template['UUID'])
+        return None
+
+    def row_of(self, uuid: str) -> int:
+        """
+        Return the row of a template, the rows up to the template are loaded. Return -1 if the template is not
+        in the list.
+        :param uuid: UUID of the template
+        """
+        row = self.rows.get(str(uuid), -1)
+        if row >= 0:
+            self.fetch_rows(row + 1)
+        return row
+
+
+def template_tooltip(catalog: TemplateCatalog, uuid: str) -> str:
+    """
+    Return the tooltip of a stock template with its U-value, the U-value of its refurbishment alternative and its
+    description.
+    :param catalog: template catalog
+    :param uuid: UUID of the stock template
+    """
+    return (f"U-value stock: {catalog.u_value(uuid)} W/(m²K)\n"
+            f"U-value refurbishment: {catalog.refurbishment_u_value(uuid)} W/(m²K)\n"
+            f"{catalog.description(uuid) or ''}").strip()
+
+
+class TemplateComboBox(QComboBox):
+    """
+    Combo box for the stock templates of a cost group with an incremental fuzzy search: the user can type a part
+    of the name (also with typing mistakes) and choose from the best matches of the template catalog. The list of
+    the combo box is populated lazily (see TemplateListModel).
+    """
+
+    def __init__(self, catalog: TemplateCatalog, cost_group: str, parent=None):
+        """
+        :param catalog: template catalog
+        :param cost_group: cost group according to DIN 276 of the templates, e.g. "330"
+        """
+        super(TemplateComboBox, self).__init__(parent)
+        self.cost_group = cost_group
+        self.list_model = TemplateListModel(catalog, catalog.templates(cost_group), self)
+        self.setModel(self.list_model)
+        # The suggestions are the search results, the completer does not filter them again
+        self.suggestions = TemplateListModel(catalog, [], self)
+        completer = QCompleter(self.suggestions, self)
+        completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+        completer.setCaseSensitivity(Qt.CaseInsensitive)
+        completer.activated[QModelIndex].connect(self.choose_suggestion)
+        # The line edit is set with the completer, otherwise the combo box creates a completer that loads all
+        # rows of the list
+        line_edit = QLineEdit(self)
+        line_edit.setCompleter(completer)
+        self.setLineEdit(line_edit)
+        self.setInsertPolicy(QComboBox.NoInsert)
+        line_edit.textEdited.connect(self.search)
+        # The size of the list is calculated from the first row instead of all rows
+        self.setSizeAdjustPolicy(QComboBox.AdjustToMinimumContentsLengthWithIcon)
+        self.setMinimumContentsLength(40)
+        self.view().setUniformItemSizes(True)
+
+    @property
+    def catalog(self) -> TemplateCatalog:
+        return self.list_model.catalog
+
+    def set_catalog(self, catalog: TemplateCatalog) -> None:
+        """
+        Replace the templates of the combo box, e.g. after a refresh of the template catalog. The selected
+        template remains selected if it still exists.
+        :param catalog: template catalog
+        """
+        uuid, name = self.currentData(), self.itemText(self.currentIndex())
+        self.list_model.catalog = self.suggestions.catalog = catalog
+        self.list_model.set_templates(catalog.templates(self.cost_group))
+        self.select(uuid, name)
+
+    def search(self, text: str) -> None:
+        """
+        Suggest the templates that match the typed text.
+        :param text: typed text
+        """
+        self.suggestions.set_templates(self.catalog.search(text, self.cost_group, MAX_SUGGESTIONS))
+        self.completer().complete()
+
+    def choose_suggestion(self, index: QModelIndex) -> None:
+        # The index refers to the completion model of the completer
+        self.select(index.data(Qt.UserRole), index.data(Qt.DisplayRole))
+
+    def select(self, uuid: str | None, name: str = '') -> None:
+        """
+        Select a template by its UUID, or by its name if there is no UUID. The first template is selected if
+        neither is found.
+        :param uuid: UUID of the template
+        :param name: name of the template
+        """
+        row = self.list_model.row_of(uuid) if uuid else -1
+        if row < 0 and name:
+            templates = self.catalog.find(name, self.cost_group)
+            row = self.list_model.row_of(templates[0]['UUID']) if templates else -1
+        self.setCurrentIndex(max(row, 0) if self.list_model.templates else -1)
@@ -1,10 +1,65 @@
+# The helpers are imported lazily (PEP 562): a helper and the libraries it needs (pandas, plotly, kaleido,
+# bs4/lxml) are only imported when the helper is used for the first time, e.g. by "from helpers import
+# create_table". This way the login GUI and short commands of eLCArefurb start without importing the libraries
+# of the evaluation stages. New helpers have to be added to _EXPORTS with the module that defines them.
+from importlib import import_module
+
+# Names exported by helpers with the modules that define them
+_EXPORTS = {
+    ".tracing": ["TRACE_FILE", "span", "traced", "enable_tracing", "tracing_enabled", "save_trace", "trace_summary",
+                 "print_trace_summary"],
+    ".login": ["login", "load_login_credentials", "credentials_available"],
+    ".elca_client": ["ElcaClient", "BASE_URL"],
+    ".endpoint_latency": ["DEFAULT_LATENCY", "endpoint_name", "endpoint_latency", "save_endpoint_latency",
+                          "request_count"],
+    ".progress": ["STATUS_FILE", "ProgressTracker", "StageCancelled", "count_progress", "read_status",
+                  "current_status", "clear_status", "request_cancel", "reset_cancel", "cancel_requested"],
+    ".bar_chart": ["create_grouped_bar_chart", "create_stacked_bar_chart", "create_facetted_bar_chart",
+                   "create_vertical_bar_chart"],
+    ".beautifulsoup": ["create_get_soup", "create_post_soup", "parse_soup"],
+    ".df_utils": ["reorder_dataframe", "pandas_convert_decimals", "diff_two_dataframes"],
+    ".json": ["save_component_json", "load_component_json"],
+    ".projects_dict": ["projects_dict"],
+    ".scatter_plot": ["create_scatter", "create_facetted_scatter"],
+    ".image_export": ["export_image"],
+    ".table": ["create_table", "create_five_grouped_table", "create_four_grouped_table"],
+    ".elca_csv": ["save_elca_csv"],
+    ".report_data_dirs": ["create_report_data_dirs"],
+    ".projects_registry": ["REFURB_VARIANTS", "project_input_hash", "register_project", "registered_project",
+                           "registered_archetype_projects", "registered_archetype_account", "registered_projects",
+                           "unregister_project", "reconcile_projects_registry",
+                           "quarantine_project", "release_project", "quarantined_projects", "clear_dead_letters",
+                           "cache_harvest", "harvested_data", "clear_harvest_cache"],
+    ".accounts": ["shard_archetypes", "account_credentials"],
+    ".sessions": ["SESSION_MAX_AGE", "get_client", "client_pool", "login_accounts", "invalidate_clients"],
+    ".projects_deletion": ["delete_registered_projects", "delete_temporary_files"],
+    ".profiling": ["create_profile_dir", "profile_stage", "peak_rss"],
+    ".template_catalog": ["TemplateCatalog"],
+}
+_MODULES = {name: module for module, names in _EXPORTS.items() for name in names}
+__all__ = list(_MODULES)
+
+# The helpers login, endpoint_latency and projects_dict have the names of their modules: the import of the module
+# (e.g. by "from helpers.login import BASE_URL") would set the module as attribute of the package instead of the
+# helper, so these helpers are imported directly. Their modules import requests only when they are called.
 from .login import login
-from .bar_chart import create_grouped_bar_chart, create_stacked_bar_chart, create_facetted_bar_chart, create_vertical_bar_chart
-from .beautifulsoup import create_get_soup, create_post_soup
-from .df_utils import reorder_dataframe, pandas_convert_decimals, diff_two_dataframes
-from .json import save_component_json, load_component_json
+from .endpoint_latency import endpoint_latency
 from .projects_dict import projects_dict
-from .scatter_plot import create_scatter, create_facetted_scatter
-from .table import create_table, create_five_grouped_table, create_four_grouped_table
-from .elca_csv import save_elca_csv
-from .report_data_dirs import create_report_data_dirs
+
+
+def __getattr__(name: str):
+    """
+    Import the module of a helper at the first access to the helper.
+    :param name: name of the helper
+    """
+    module = _MODULES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    # Later accesses find the helper directly in the package
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
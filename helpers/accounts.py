@@ -0,0 +1,78 @@
+from __future__ import annotations
+from helpers.login import load_login_credentials
+from helpers.projects_registry import registered_projects
+
+
+def shard_archetypes(archetype_names: list[str], accounts: list[dict], projects_per_archetype: int = 5,
+                     assigned: dict[str, str] = None) -> dict[str, list[str]]:
+    """
+    Distribute the archetypes of a district over several eLCA accounts. All projects of an archetype
+    are created in the same account. Archetypes that are already registered in an account stay in this
+    account. The other archetypes are assigned to the account with the fewest archetypes that still has
+    enough free projects, so that the accounts can create their projects in parallel with similar workloads.
+    Return a dictionary with the user names of the accounts as keys and lists of archetype names as values.
+    :param archetype_names: names of the archetypes of the district
+    :param accounts: list of dictionaries with the login credentials of the accounts, an account can
+            define a "Project limit" (no limit if not given)
+    :param projects_per_archetype: number of eLCA projects created for each archetype
+    :param assigned: archetypes that have already been assigned to an account but are not registered yet (e.g. by
+            the creation of the projects during the input of the archetypes), with the archetype names as keys and
+            the user names of the accounts as values. They stay in their account like registered archetypes.
+    """
+    user_names = [account["User name"] for account in accounts]
+    shards: dict[str, list[str]] = {user_name: [] for user_name in user_names}
+    # Count the projects in each account, that do not belong to the archetypes of the district
+    registry = registered_projects()
+    registered_accounts = {project["archetype"]: project["account"] for project in registry}
+    registered_accounts.update(assigned or {})
+    free_projects = {}
+    for account in accounts:
+        project_limit = account.get("Project limit")
+        if project_limit is None:
+            free_projects[account["User name"]] = float("inf")
+        else:
+            # Projects registered before several accounts were supported have no account and belong to the first
+            # account
+            foreign_projects = [project for project in registry
+                                if (project["account"] or user_names[0]) == account["User name"]
+                                and project["archetype"] not in archetype_names]
+            free_projects[account["User name"]] = int(project_limit) - len(foreign_projects)
+
+    # Archetypes already created in one of the accounts keep their account
+    # Projects registered before several accounts were supported have no account and belong to the first account
+    unassigned = []
+    for archetype_name in archetype_names:
+        registered_account = registered_accounts.get(archetype_name)
+        if registered_account == "" and user_names:
+            registered_account = user_names[0]
+        if registered_account in shards:
+            shards[registered_account].append(archetype_name)
+            free_projects[registered_account] -= projects_per_archetype
+        else:
+            unassigned.append(archetype_name)
+
+    for archetype_name in unassigned:
+        candidates = [user_name for user_name in user_names if free_projects[user_name] >= projects_per_archetype]
+        if not candidates:
+            raise ValueError(f"The district with {len(archetype_names)} archetypes exceeds the project limits of "
+                             f"the eLCA accounts. Please add further accounts to login_credentials.json.")
+        user_name = min(candidates, key=lambda candidate: len(shards[candidate]))
+        shards[user_name].append(archetype_name)
+        free_projects[user_name] -= projects_per_archetype
+
+    return {user_name: shard for (user_name, shard) in shards.items() if shard}
+
+
+def account_credentials(user_name: str) -> dict:
+    """
+    Return the login credentials of an account from login_credentials.json. Projects registered without
+    account belong to the first account.
+    :param user_name: user name of the eLCA account
+    """
+    accounts = load_login_credentials()
+    for account in accounts:
+        if account["User name"] == user_name:
+            return account
+    if not user_name:
+        return accounts[0]
+    raise ValueError(f"There are no login credentials for the eLCA account {user_name}.")
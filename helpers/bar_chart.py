@@ -1,6 +1,7 @@
 import pandas
 import plotly.express as px
 import string
+from helpers.image_export import export_image
 
 
 # Function to create grouped bar charts
@@ -49,8 +50,7 @@ def create_grouped_bar_chart(input_frame: pandas.DataFrame, title: str, y_axis_n
     # Set font
     fig.update_layout(font=dict(family="Times New Roman", size=16, color="black"), uniformtext=dict(minsize=16, mode='show'), title_x=0.5)
     # Save image as PDF
-    fig.write_image(f'{directory}\BarChart{no_subscript_title}.pdf',
-                    engine='kaleido', height=400)
+    export_image(fig, f'{directory}\BarChart{no_subscript_title}.pdf', height=400)
 
 
 
@@ -95,8 +95,7 @@ def create_stacked_bar_chart(input_frame: pandas.DataFrame, title: str, y_axis_n
     # Set font and order of refurbishment scenarios
     fig.update_layout(uniformtext=dict(minsize=6, mode='show'), font_family="Times New Roman", font_color="black", title_x=0.5,
                       xaxis={'categoryorder': 'array', 'categoryarray': ['Bestand', 'Außenwandsanierung', 'Dachsanierung', 'Fenstersanierung', 'Komplettsanierung']})
-    fig.write_image(f'{directory}\\BarChart{no_subscript_title}.pdf',
-                    engine='kaleido', width=1000, height=1100)
+    export_image(fig, f'{directory}\\BarChart{no_subscript_title}.pdf', width=1000, height=1100)
 
 # Show two grouped bar charts next to each other
 def create_facetted_bar_chart(df: pandas.DataFrame, facet_col: str, list_col: list, directory: str, y_var: str):
@@ -130,7 +129,7 @@ def create_facetted_bar_chart(df: pandas.DataFrame, facet_col: str, list_col: li
                      title_x=0.5)
     #fig.update_layout(font_family="Serif", uniformtext=dict(minsize=24, mode='show'), font_color="black", title_x=0.5)
     # Save image as PDF for further data processing
-    fig.write_image(directory, engine='kaleido', height=2000,  width=800)
+    export_image(fig, directory, height=2000,  width=800)
 
 
 def create_vertical_bar_chart(input_frame: pandas.DataFrame, title: str, x_axis_name : str, y_axis_name: str, directory: str) -> None:
@@ -170,8 +169,7 @@ def create_vertical_bar_chart(input_frame: pandas.DataFrame, title: str, x_axis_
     # Set font
     fig.update_layout(font=dict(family="Times New Roman", size=16, color="black"), uniformtext=dict(minsize=16, mode='show'), title_x=0.5, yaxis={'categoryorder':'total ascending'})
     # Save image as PDF
-    fig.write_image(f'{directory}\BarChart{no_subscript_title}.pdf',
-                    engine='kaleido', height=400, width= 1000)
+    export_image(fig, f'{directory}\BarChart{no_subscript_title}.pdf', height=400, width= 1000)
 
 
 
@@ -1,9 +1,25 @@
+from __future__ import annotations
 import json
-import bs4
-from bs4 import BeautifulSoup
-import requests
-from typing import Union, Any
+from typing import TYPE_CHECKING, Union, Any
+from helpers.tracing import span
 
+if TYPE_CHECKING:
+    import bs4
+    import requests
+
+
+
+def parse_soup(html: str, name: str = "BeautifulSoup") -> bs4.BeautifulSoup:
+    """
+    Create a BeautifulSoup object from the HTML of a section of an eLCA response. The parsing is recorded as
+    span of the trace (see helpers/tracing.py).
+    :param html: HTML of the section
+    :param name: name of the span, e.g. the section of the website source code
+    """
+    # bs4 and lxml are imported with the first response, not with helpers
+    from bs4 import BeautifulSoup
+    with span(name, "parse", bytes=len(html)):
+        return BeautifulSoup(html, 'lxml')
 
 
 def create_get_soup(session: requests.sessions, URL: str, directory: str, data: dict = None, params: tuple[tuple[str, Union[str, Any]], tuple[str, str], tuple[str, str], tuple[str, str]]  = None) -> bs4.BeautifulSoup:
@@ -25,7 +41,7 @@ def create_get_soup(session: requests.sessions, URL: str, directory: str, data:
     # Parse the response with json.loads and enter required section
     html = json.loads(response.text)[directory]
     # Create a BeautifulSoup object from the json data
-    soup = BeautifulSoup(html, 'lxml')
+    soup = parse_soup(html, directory)
     # Return BeautifulSoup object
     return soup
 
@@ -48,6 +64,6 @@ def create_post_soup(session: requests.sessions, URL: str, directory: str, data:
     # Parse the response with json.loads and enter required section
     html = json.loads(response.text)[directory]
     # Create a BeautifulSoup object from the json data
-    soup = BeautifulSoup(html, 'lxml')
+    soup = parse_soup(html, directory)
     # Return BeautifulSoup object
     return soup
\ No newline at end of file
@@ -1,7 +1,9 @@
 import numpy as np
 import pandas
+from helpers.tracing import traced
 
 
+@traced("dataframe")
 def reorder_dataframe(df: pandas.DataFrame, reordered_column_indexes: list) -> pandas.DataFrame:
     """
     This function enables a quick reordering of the columns in a pandas dataframe (table). The
@@ -23,6 +25,7 @@ def reorder_dataframe(df: pandas.DataFrame, reordered_column_indexes: list) -> p
     return df[new_order]
 
 
+@traced("dataframe")
 def pandas_convert_decimals(df: pandas.DataFrame, column: str) -> pandas.DataFrame:
     '''
     This function converts string values in Pandas Dataframes into floats for further data processing.
@@ -41,6 +44,7 @@ def pandas_convert_decimals(df: pandas.DataFrame, column: str) -> pandas.DataFra
     return df
 
 
+@traced("dataframe")
 def diff_two_dataframes(df1: pandas.DataFrame, df2: pandas.DataFrame) -> pandas.DataFrame:
     '''
     Return only the rows of a dataframe that are not present in another dataframe.
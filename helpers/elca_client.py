@@ -0,0 +1,501 @@
+from __future__ import annotations
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Any, Callable
+from helpers.beautifulsoup import parse_soup
+from helpers.elca_recordings import RECORD_DIR, save_recording
+from helpers.endpoint_latency import endpoint_name, record_latency
+from helpers.login import BASE_URL, login
+from helpers.tracing import span
+
+if TYPE_CHECKING:
+    import bs4
+    import requests
+
+
+class ElcaClient:
+    """
+    Client for the requests of eLCArefurb to the eLCA Bauteileditor. All URLs and request data of the eLCA
+    endpoints are defined here, the stages of eLCArefurb only prepare the data of the projects and read the
+    information from the returned BeautifulSoup objects.
+    The client is based on one login session with a connection pool, so that the connections to eLCA are kept
+    alive and the methods can be called by several threads at the same time. Note that eLCA saves the current
+    project in the login session: requests on different projects at the same time require separate clients.
+    Identical reading requests that are sent at the same time by several threads are only sent once
+    (single flight): the threads wait for the request in progress and share its result.
+    If the environment variable ELCA_RECORD_DIR is set, all successful responses are recorded in this folder for
+    the stub server of helpers/stub_server.py.
+    """
+
+    def __init__(self, session: requests.Session, pool_maxsize: int = 10, timeout: float = 60,
+                 relogin: Callable[[], requests.Session] = None, on_request: Callable[[], None] = None):
+        """
+        :param session: Login session of the eLCA account
+        :param pool_maxsize: maximum number of open connections to eLCA (parallel requests)
+        :param timeout: timeout of each request in seconds
+        :param relogin: function that logs in again and returns a new login session, called if eLCA rejects the
+                login session, without it the rejected responses are returned
+        :param on_request: function called after each request, e.g. to note the last use of the session
+        """
+        self.session = session
+        self.timeout = timeout
+        self.relogin = relogin
+        self.on_request = on_request
+        self._session_lock = threading.Lock()
+        self.resize_pool(pool_maxsize)
+        # ID of the project entered with open_project, reading requests of reports refer to this project
+        self.project_id = None
+        # Reading requests in progress with the request as keys and the futures of the results as values
+        self._in_flight: dict[tuple, Future] = {}
+        self._in_flight_lock = threading.Lock()
+        # Number of requests that were not sent, because an identical request was in progress
+        self.coalesced_requests = 0
+
+    def resize_pool(self, pool_maxsize: int) -> None:
+        """
+        Set the maximum number of open connections to eLCA.
+        :param pool_maxsize: maximum number of open connections to eLCA (parallel requests)
+        """
+        # requests is imported with the first client, not with helpers
+        from requests.adapters import HTTPAdapter
+        self.pool_maxsize = pool_maxsize
+        # Keep the connections to eLCA alive and allow as many connections as there are parallel requests
+        # (http for a local stub server)
+        for prefix in ("https://", "http://"):
+            self.session.mount(prefix, HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize))
+
+    @classmethod
+    def login(cls, credentials: dict = None, pool_maxsize: int = 10) -> ElcaClient:
+        """
+        Log in to an eLCA account and return a client for the account.
+        :param credentials: dictionary with "User name" and "Password" of the eLCA account, if not given
+                the first account in temp_data/login_credentials.json is used
+        :param pool_maxsize: maximum number of open connections to eLCA (parallel requests)
+        """
+        return cls(login(credentials), pool_maxsize, relogin=lambda: login(credentials))
+
+    # General requests
+
+    def _send(self, method: str, path: str, **kwargs) -> requests.Response:
+        """
+        Send a request to eLCA. The duration of the request is recorded for the endpoint and as span of the trace.
+        If eLCA no longer accepts the login session (see _auth_failed), e.g. because it expired on the server,
+        the session is renewed once with the relogin function and the request is sent again.
+        :param method: GET or POST
+        :param path: path of the URL after BASE_URL, e.g. /projects/
+        """
+        session = self.session
+        response = self._timed_request(session, method, path, **kwargs)
+        if self.relogin is not None and self._auth_failed(response):
+            self._renew_session(session)
+            # Uploaded files are read again from the start
+            for upload in kwargs.get("files", {}).values():
+                upload[1].seek(0)
+            response = self._timed_request(self.session, method, path, **kwargs)
+        if self.on_request is not None:
+            self.on_request()
+        if RECORD_DIR and response.ok:
+            save_recording(RECORD_DIR, method, response.request.path_url, response.status_code, response.text)
+        return response
+
+    def _timed_request(self, session: requests.Session, method: str, path: str, **kwargs) -> requests.Response:
+        """
+        Send a request with a login session and record its duration for the endpoint and as span of the trace.
+        :param session: login session
+        :param method: GET or POST
+        :param path: path of the URL after BASE_URL
+        """
+        start = time.perf_counter()
+        with span(endpoint_name(method, path), "http", method=method, path=path) as trace_args:
+            response = session.request(method, BASE_URL + path, timeout=self.timeout, **kwargs)
+            trace_args.update(status=response.status_code, bytes=len(response.content))
+        record_latency(method, path, time.perf_counter() - start)
+        return response
+
+    @staticmethod
+    def _auth_failed(response: requests.Response) -> bool:
+        """
+        Return True if eLCA rejected a request because the login session is not (or no longer) logged in: eLCA
+        answers with 401 or 403, redirects to the login page or returns the login form instead of the view.
+        :param response: response of eLCA
+        """
+        if response.status_code in (401, 403):
+            return True
+        if any(redirect.is_redirect for redirect in response.history) and response.url.endswith("/login/"):
+            return True
+        return 'name="authName"' in response.text
+
+    def _renew_session(self, failed_session: requests.Session) -> None:
+        """
+        Replace the login session after an authentication failure. Threads that failed with the same session at
+        the same time log in only once. The current project is entered again in the new session, because eLCA
+        saves it in the login session.
+        :param failed_session: login session that was rejected by eLCA
+        """
+        with self._session_lock:
+            # Another thread has already renewed the session
+            if self.session is not failed_session:
+                return
+            print('Die Sitzung bei eLCA ist abgelaufen, es wird erneut eingeloggt.')
+            self.session = self.relogin()
+            self.resize_pool(self.pool_maxsize)
+            if self.project_id is not None:
+                self._timed_request(self.session, "GET", f'/projects/{self.project_id}/')
+
+    def get(self, path: str, **kwargs) -> requests.Response:
+        """
+        Send a GET request to eLCA (see _send).
+        :param path: path of the URL after BASE_URL, e.g. /projects/
+        """
+        return self._send("GET", path, **kwargs)
+
+    def _single_flight(self, key: tuple, load: Callable[[], Any]) -> Any:
+        """
+        Execute a reading request only once, if it is requested by several threads at the same time.
+        The first thread sends the request, the other threads wait for its result. The result is not kept
+        after the request is completed, so that later requests always read the current data from eLCA.
+        :param key: request, including the current project, that identifies identical requests
+        :param load: function that sends the request and returns the result
+        """
+        with self._in_flight_lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._in_flight[key] = future
+            else:
+                self.coalesced_requests += 1
+        if not leader:
+            return future.result()
+        try:
+            result = load()
+            future.set_result(result)
+            return result
+        except BaseException as error:
+            future.set_exception(error)
+            raise
+        finally:
+            with self._in_flight_lock:
+                del self._in_flight[key]
+
+    def _request_key(self, path: str, view: str = None, data: Any = None, params: Any = None) -> tuple:
+        """
+        Return the key of a reading request for _single_flight.
+        :param path: path of the URL after BASE_URL
+        :param view: section of the website source code that is parsed
+        :param data: data to be sent with the request
+        :param params: params to be sent with the request
+        """
+        return (self.project_id, path, view, json.dumps(data, sort_keys=True, default=str),
+                json.dumps(params, sort_keys=True, default=str))
+
+    def shared_get(self, path: str, data: dict = None, params: Any = None) -> requests.Response:
+        """
+        Send a reading GET request to eLCA, identical requests at the same time share one response.
+        :param path: path of the URL after BASE_URL
+        :param data: data to be sent with the get request
+        :param params: params to be sent with the get request
+        """
+        return self._single_flight(self._request_key(path, data=data, params=params),
+                                   lambda: self.get(path, data=data, params=params))
+
+    def post(self, path: str, **kwargs) -> requests.Response:
+        """
+        Send a POST request to eLCA (see _send).
+        :param path: path of the URL after BASE_URL, e.g. /projects/
+        """
+        return self._send("POST", path, **kwargs)
+
+    @staticmethod
+    def view_soup(response: requests.Response, view: str) -> bs4.BeautifulSoup:
+        """
+        Create a BeautifulSoup object from a section of the JSON response of eLCA.
+        :param response: response of eLCA
+        :param view: section of the website source code, e.g. Elca\\View\\ElcaProjectsView
+        """
+        return parse_soup(json.loads(response.text)[view], view)
+
+    def get_soup(self, path: str, view: str, data: dict = None, params: Any = None) -> bs4.BeautifulSoup:
+        """
+        Send a GET request to eLCA and create a BeautifulSoup object from a section of the response.
+        Identical requests at the same time share one response and one BeautifulSoup object, which must
+        therefore not be modified.
+        :param path: path of the URL after BASE_URL
+        :param view: section of the website source code
+        :param data: data to be sent with the get request
+        :param params: params to be sent with the get request
+        """
+        return self._single_flight(self._request_key(path, view, data, params),
+                                   lambda: self.view_soup(self.get(path, data=data, params=params), view))
+
+    def post_soup(self, path: str, view: str, data: dict = None, params: Any = None) -> bs4.BeautifulSoup:
+        """
+        Send a POST request to eLCA and create a BeautifulSoup object from a section of the response.
+        :param path: path of the URL after BASE_URL
+        :param view: section of the website source code
+        :param data: data to be sent with the post request
+        :param params: params to be sent with the post request
+        """
+        return self.view_soup(self.post(path, data=data, params=params), view)
+
+    # Projects
+
+    def list_projects(self, include_templates: bool = False) -> dict[str, str]:
+        """
+        Return a dictionary of the projects in the account with project IDs as keys and project names as values.
+        :param include_templates: if True, the project "Template creation" is included
+        """
+        projects = {}
+        projects_soup = self.get_soup('/projects', 'Elca\\View\\ElcaProjectsView')
+        project_list = projects_soup.find('ul', {"class": "project-list"})
+        # If there are no projects in the account return empty dictionary
+        if project_list is None:
+            return projects
+        for project_tag in project_list.children:
+            # Save project name
+            project_name = project_tag.find('h2', {"class": "headline"}).text
+            if project_name == "Template creation" and not include_templates:
+                continue
+            # Save project ID
+            project_id = re.search(r".*-(\d*)", project_tag.attrs["id"]).group(1)
+            projects[project_id] = project_name
+        return projects
+
+    def open_project(self, project_id: str) -> requests.Response:
+        """
+        Enter a project, all following project requests of the session refer to this project.
+        :param project_id: ID of the project in eLCA
+        """
+        response = self.get(f'/projects/{project_id}/')
+        self.project_id = str(project_id)
+        return response
+
+    def delete_project(self, project_id: str, missing_ok: bool = False) -> requests.Response:
+        """
+        Delete a project in the account. Raise an HTTPError if the request was not successful.
+        :param project_id: ID of the project in eLCA
+        :param missing_ok: if True, a project that no longer exists in the account (e.g. deleted manually in eLCA)
+                counts as deleted and raises no HTTPError
+        """
+        response = self.get(f'/projects/delete/?confirmed&id={project_id}')
+        if missing_ok and response.status_code == 404:
+            return response
+        response.raise_for_status()
+        return response
+
+    def import_csv_project(self, project_name: str, filename: str,
+                           net_floor_area: float, gross_floor_area: float) -> str:
+        """
+        Create a project in eLCA through the CSV import feature and return the ID of the project.
+        :param project_name: name of the project
+        :param filename: path of the CSV file with the components of the project
+        :param net_floor_area: net floor space of the project
+        :param gross_floor_area: gross floor space of the project
+        """
+        # The CSV import leaves the current project
+        self.project_id = None
+        # Data for CSV import project creation
+        # Post data to eLCA server through post response with requests
+        with open(filename, 'rb') as csv_file:
+            self.post('/project-csv/validate/',
+                      # Set parameter to import CSV file in eLCA
+                      files={'importFile': (os.path.basename(filename), csv_file, "text/csv")},
+                      data={
+                          'name': project_name,
+                          # private construction measure
+                          'constrMeasure': "1",
+                          # generic postcode
+                          'postcode': "12345",
+                          # single family homes
+                          'constrClassId': "210",
+                          # At this point a BNB Benchmark System has to be set
+                          # to create the project
+                          # Later, the benchmark system is deselected,
+                          # so that no benchmark system
+                          # is selected, since no evaluation according to BNB is to take place
+                          # Benchmark system BNB-BN_2015 has the Version ID "6"
+                          'benchmarkVersionId': "6",
+                          # net floor space
+                          'netFloorSpace': net_floor_area,
+                          # gross floor space
+                          'grossFloorSpace': gross_floor_area,
+                          'upload': "Absenden"
+                      })
+
+        # Create dictionary for POST data to confirm component collection from CSV
+        element_data = {}
+        # Load preview of the components to create the project to retrieve data from the source code
+        preview_soup = self.get_soup('/project-csv/preview/', 'Elca\\View\\Import\\Csv\\ProjectImportPreviewView')
+        for item in preview_soup.find_all('li', {"class": "element"}):
+            # Reading the KGR 2. level of the cost group (e.g. 330)
+            item_cg_two = re.search(r"option selected=\"\" value=\"(\d{3})\">",
+                                    str(item('select')[0].contents)).group(1)
+            # Reading the KGR 3. level of the cost group, if available (e.g. 334)
+            try:
+                item_cg_three = re.search(r"option selected=\"\" value=\"(\d{3})\">",
+                                          str(item('select')[1].contents)).group(1)
+            # if Attribute Error occurs there is no third level
+            except AttributeError:
+                item_cg_three = ""
+            # Reading element quantity and unit (m2/ Stück)
+            item_quantity = item.input.attrs["value"]
+            item_unit = re.search(r"option selected=\"\" value=\"(.*?)\">", str(item('select')[2].contents)).group(1)
+            # Reading the rel_id of the elements (long element ID)
+            rel_id = re.search(r"relId=(.{8}-.{4}-.{4}-.{4}-.{12})", item.a.attrs["href"]).group(1)
+            # Reading the short element ID of each element
+            tpl_element_id = item('input')[1].attrs["value"]
+            # Fill POST data dictionary with the information read about elements
+            element_data.update({
+                'dinCode2[{}]'.format(rel_id): item_cg_two,
+                'dinCode3[{}]'.format(rel_id): item_cg_three,
+                'quantity[{}]'.format(rel_id): item_quantity,
+                'unit[{}]'.format(rel_id): item_unit,
+                # short ID
+                'tplElementId[{}]'.format(rel_id): tpl_element_id
+            })
+        # Post data dictionary to confirm project creation requires this at the end
+        element_data.update({'createProject': 'Projekt erstellen'})
+        # Create projects by confirming the components with the element_data
+        generation_response = self.post('/project-csv/preview/', data=element_data)
+        # Project is now created! Read the project ID
+        project_id_text = json.loads(generation_response.text)["Elca\\View\\ElcaModalProcessingView"]
+        return re.search(r"data-action=\"/project-data/lcaProcessing/\?id=(\d{1,7})&amp", project_id_text).group(1)
+
+    # Project data and project elements of the current project
+
+    def get_project_general(self) -> bs4.BeautifulSoup:
+        """
+        Return the master data - general of the current project.
+        """
+        return self.get_soup('/project-data/general/', 'Elca\\View\\ElcaProjectDataGeneralView')
+
+    def save_project_general(self, data: dict) -> requests.Response:
+        """
+        Save the master data - general of the current project.
+        :param data: form data of the master data
+        """
+        return self.post('/project-data/save/', data=data)
+
+    def list_project_elements(self, component_category_id: int | str) -> bs4.BeautifulSoup:
+        """
+        Return the list of the components of a cost group in the current project.
+        :param component_category_id: ID of the cost group in eLCA (e.g. 246 for outer walls)
+        """
+        return self.get_soup(f'/project-elements/list/?t={component_category_id}', 'Elca\\View\\ElcaProjectElementsView')
+
+    def get_project_element(self, element_id: str, view: str = 'Elca\\View\\ElcaElementView') -> bs4.BeautifulSoup:
+        """
+        Return a component of the current project. Raise a KeyError if the component does not have the view,
+        e.g. windows created with the window wizard are shown in the view Elca\\View\\Assistant\\WindowAssistantView.
+        :param element_id: ID of the component
+        :param view: section of the website source code
+        """
+        return self.get_soup(f'/project-elements/{element_id}/', view)
+
+    def save_element(self, data: dict) -> requests.Response:
+        """
+        Save a component of the current project.
+        :param data: form data of the component
+        """
+        return self.post('/project-elements/save/', data=data)
+
+    def save_window(self, data: dict) -> requests.Response:
+        """
+        Save a window of the current project created with the window wizard.
+        :param data: form data of the window wizard
+        """
+        return self.post('/assistant/window/save/', data=data)
+
+    def open_energy_demand(self) -> requests.Response:
+        """
+        Enter the final energy demand of the current project.
+        """
+        return self.get('/project-data/enEv/')
+
+    def save_energy_demand(self, data: dict) -> requests.Response:
+        """
+        Save the final energy demand of the current project.
+        :param data: form data of the final energy demand
+        """
+        return self.post('/project-data/saveEnEv/', data=data)
+
+    def select_energy_carrier(self, data: dict) -> requests.Response:
+        """
+        Select the energy carrier of the final energy demand of the current project.
+        :param data: form data of the energy carrier selection
+        """
+        return self.post('/project-data/selectProcessConfig/', data=data)
+
+    # Reports of the current project
+
+    def get_summary_report(self) -> bs4.BeautifulSoup:
+        """
+        Return the overall balance of the current project.
+        """
+        return self.get_soup('/project-reports/summary/', 'Elca\\View\\Report\\ElcaReportSummaryView')
+
+    def get_elements_report(self) -> bs4.BeautifulSoup:
+        """
+        Return the balance of the components of the current project.
+        """
+        return self.get_soup('/project-reports/elements/', 'Elca\\View\\Report\\ElcaReportEffectsView')
+
+    def get_element_effect_details(self, params: Any) -> bs4.BeautifulSoup:
+        """
+        Return the balance of the building materials of a component of the current project.
+        :param params: params with the ID of the component
+        """
+        return self.get_soup('/project-report-effects/elementDetails/',
+                             'Elca\\View\\Report\\ElcaReportEffectDetailsView', params=params)
+
+    def get_operation_report(self) -> bs4.BeautifulSoup:
+        """
+        Return the balance of the operation (final energy) of the current project.
+        """
+        return self.get_soup('/project-report-effects/operation/', 'Elca\\View\\Report\\ElcaReportEffectsView')
+
+    def get_top_assets_report(self, data: dict) -> bs4.BeautifulSoup:
+        """
+        Return the ranking of the building materials by mass of the current project.
+        :param data: form data of the ranking, e.g. the number of materials
+        """
+        return self.post_soup('/project-report-assets/topAssets/', 'Elca\\View\\Report\\ElcaReportAssetsView', data=data)
+
+    def get_extant_savings_report(self) -> bs4.BeautifulSoup:
+        """
+        Return the savings of the existing components compared to new components of the current project.
+        """
+        return self.get_soup('/report/extant-savings/savings/', 'Elca\\View\\Report\\ExtantSavingsView')
+
+    # Component templates
+
+    def list_elements(self, data: dict = None, component_no: str = None, page: int = None) -> requests.Response:
+        """
+        Return a page of the list of component templates. Without page, the list is filtered with the data
+        (POST request), the filter is saved in the session and the following pages are requested by page.
+        :param data: filter of the list
+        :param component_no: ID of the cost group in eLCA
+        :param page: number of the page of the list
+        """
+        if page is None:
+            return self.post('/elements/list/', data=data)
+        return self.shared_get(f'/elements/list/?t={component_no}&page={page}', data={'t': component_no, 'page': page})
+
+    def get_element_details(self, element_id: str) -> requests.Response:
+        """
+        Return the page of a component template.
+        :param element_id: ID of the template
+        """
+        return self.shared_get(f'/elements/{element_id}/')
+
+    def get_element_general_tab(self, element_id: str) -> requests.Response:
+        """
+        Return the general tab of a component template, windows created with the window wizard have
+        their description in this tab.
+        :param element_id: ID of the template
+        """
+        return self.shared_get(f'/elements/general/?e={element_id}&tab=general')
@@ -0,0 +1,56 @@
+from __future__ import annotations
+import hashlib
+import json
+import os
+from pathlib import Path
+from helpers.endpoint_latency import endpoint_name
+
+# Folder in which the responses of eLCA are recorded for the stub server (see helpers/stub_server.py),
+# nothing is recorded if the environment variable ELCA_RECORD_DIR is not set
+RECORD_DIR = os.environ.get("ELCA_RECORD_DIR")
+
+
+def save_recording(folder: str | Path, method: str, path: str, status: int, body: str) -> None:
+    """
+    Save the response of eLCA to a request in a JSON file of the recordings folder. Each request (method and path
+    with query string) has its own file, a later response to the same request replaces the recording.
+    :param folder: recordings folder
+    :param method: HTTP method of the request
+    :param path: path of the URL after the base URL
+    :param status: HTTP status code of the response
+    :param body: text of the response, usually the JSON-wrapped HTML views of eLCA
+    """
+    request = f'{method} {path}'
+    file_name = hashlib.sha1(request.encode("utf-8")).hexdigest()[:16] + ".json"
+    os.makedirs(folder, exist_ok=True)
+    with open(Path(folder) / file_name, "w", encoding="utf-8") as file:
+        json.dump({"request": request, "endpoint": endpoint_name(method, path), "status": status, "body": body},
+                  file, ensure_ascii=False)
+
+
+def load_recordings(folder: str | Path) -> tuple[dict[str, dict], dict[str, dict]]:
+    """
+    Load the recorded responses of eLCA. Return two dictionaries with the recordings as values: the first one
+    with the requests (method and path) as keys, the second one with the endpoints as keys, so that requests
+    with other IDs than the recorded requests are answered with a recording of the same endpoint.
+    :param folder: recordings folder
+    """
+    by_request, by_endpoint = {}, {}
+    for recording_file in sorted(Path(folder).glob("*.json")):
+        with open(recording_file, encoding="utf-8") as file:
+            recording = json.load(file)
+        by_request[recording["request"]] = recording
+        by_endpoint.setdefault(recording["endpoint"], recording)
+    return by_request, by_endpoint
+
+
+def find_recording(by_request: dict[str, dict], by_endpoint: dict[str, dict], method: str, path: str) -> dict | None:
+    """
+    Return the recorded response to a request or, if the request was not recorded, a recorded response of the
+    same endpoint. Return None if the endpoint was not recorded.
+    :param by_request: recordings with the requests as keys (see load_recordings)
+    :param by_endpoint: recordings with the endpoints as keys (see load_recordings)
+    :param method: HTTP method of the request
+    :param path: path of the URL after the base URL with query string
+    """
+    return by_request.get(f'{method} {path}') or by_endpoint.get(endpoint_name(method, path))
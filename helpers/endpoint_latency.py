@@ -0,0 +1,109 @@
+from __future__ import annotations
+import json
+import re
+import threading
+from pathlib import Path
+
+# Latency assumed for endpoints that have not been measured yet, in seconds
+DEFAULT_LATENCY = 0.5
+# Maximum weight of the saved measurements compared to the measurements of the current execution,
+# so that the latencies adapt to changes of the eLCA server
+MAX_SAVED_COUNT = 100
+
+# Measurements of the current execution with the endpoints as keys and [number of requests, total time] as values
+_measurements: dict[str, list[float]] = {}
+_lock = threading.Lock()
+# Serializes the merging into endpoint_latency.json of threads that save at the same time
+_file_lock = threading.Lock()
+# Number of requests of the current execution, not reset by save_endpoint_latency (see helpers/progress.py)
+_request_count = 0
+
+
+def endpoint_name(method: str, path: str) -> str:
+    """
+    Return the name of an endpoint, under which the latencies of all requests to the endpoint are collected.
+    IDs and query strings are removed from the path, e.g. GET /project-elements/{id}/
+    :param method: HTTP method of the request
+    :param path: path of the URL after the base URL
+    """
+    path = re.sub(r"\d+", "{id}", path.split("?")[0])
+    return f'{method} {path}'
+
+
+def record_latency(method: str, path: str, seconds: float) -> None:
+    """
+    Record the duration of a request to eLCA.
+    :param method: HTTP method of the request
+    :param path: path of the URL after the base URL
+    :param seconds: duration of the request in seconds
+    """
+    global _request_count
+    endpoint = endpoint_name(method, path)
+    with _lock:
+        _request_count += 1
+        measurement = _measurements.setdefault(endpoint, [0, 0.0])
+        measurement[0] += 1
+        measurement[1] += seconds
+
+
+def request_count() -> int:
+    """
+    Return the number of requests to eLCA sent by the current execution.
+    """
+    with _lock:
+        return _request_count
+
+
+def _load_saved_latency(folder: str) -> dict[str, dict]:
+    """
+    Load the latencies saved by earlier executions.
+    :param folder: Name of the folder where endpoint_latency.json is saved
+    """
+    latency_file = Path(folder) / "endpoint_latency.json"
+    if not latency_file.exists():
+        return {}
+    with open(latency_file, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def _merge_latency(saved: dict[str, dict], measurements: dict[str, tuple[int, float]]) -> dict[str, dict]:
+    """
+    Merge measurements into the saved latencies and return the mean and the number of requests of each endpoint.
+    :param saved: latencies saved by earlier executions (see _load_saved_latency)
+    :param measurements: measurements with the endpoints as keys and (number of requests, total time) as values
+    """
+    merged = dict(saved)
+    for endpoint, (count, total) in measurements.items():
+        saved_count = min(saved.get(endpoint, {}).get("count", 0), MAX_SAVED_COUNT)
+        saved_mean = saved.get(endpoint, {}).get("mean", 0)
+        merged[endpoint] = {"mean": (saved_mean * saved_count + total) / (saved_count + count),
+                            "count": saved_count + count}
+    return merged
+
+
+def endpoint_latency(folder: str = "temp_data") -> dict[str, float]:
+    """
+    Return the mean latency of each endpoint in seconds from the measurements of earlier executions and of
+    the current execution.
+    :param folder: Name of the folder where endpoint_latency.json is saved
+    """
+    saved = _load_saved_latency(folder)
+    with _lock:
+        measurements = {endpoint: tuple(measurement) for endpoint, measurement in _measurements.items()}
+    return {endpoint: values["mean"] for endpoint, values in _merge_latency(saved, measurements).items()}
+
+
+def save_endpoint_latency(folder: str = "temp_data") -> None:
+    """
+    Merge the measurements of the current execution into temp_data/endpoint_latency.json. The measurements are
+    taken and reset at once, so that requests recorded by other threads during the saving are kept for the next
+    saving.
+    :param folder: Name of the folder where endpoint_latency.json is saved
+    """
+    with _lock:
+        measurements = {endpoint: tuple(measurement) for endpoint, measurement in _measurements.items()}
+        _measurements.clear()
+    with _file_lock:
+        merged = _merge_latency(_load_saved_latency(folder), measurements)
+        with open(Path(folder) / "endpoint_latency.json", "w", encoding="utf-8") as file:
+            json.dump(merged, file, indent=4)
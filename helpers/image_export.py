@@ -0,0 +1,41 @@
+from __future__ import annotations
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING
+from helpers.progress import count_progress
+from helpers.tracing import span
+
+if TYPE_CHECKING:
+    import plotly.graph_objects as go
+
+_kaleido_configured = False
+_kaleido_lock = threading.Lock()
+
+
+def _configure_kaleido() -> None:
+    """
+    Configure kaleido before the first export instead of at the import of the helpers. MathJax is not loaded,
+    otherwise kaleido writes a "Loading [MathJax]" box into the PDF files.
+    """
+    global _kaleido_configured
+    with _kaleido_lock:
+        if _kaleido_configured:
+            return
+        import plotly.io as pio
+        pio.kaleido.scope.mathjax = None
+        _kaleido_configured = True
+
+
+def export_image(fig: go.Figure, file: str, **kwargs) -> None:
+    """
+    Save a plotly figure as image with kaleido. The export is recorded as span of the trace (see tracing)
+    and counted in the progress of the exported figures (see progress).
+    :param fig: plotly figure
+    :param file: path of the image, the format is given by the file extension, e.g. ".pdf"
+    :param kwargs: further arguments of write_image, e.g. width and height
+    """
+    _configure_kaleido()
+    # The paths of the report data partly use Windows separators
+    with span(Path(file.replace("\\", "/")).stem, "export", file=file):
+        fig.write_image(file, engine='kaleido', **kwargs)
+    count_progress("Abbildungen", "Abbildungen")
@@ -1,32 +1,96 @@
-import requests
+from __future__ import annotations
+import os
 import json
+from typing import TYPE_CHECKING
+from helpers.tracing import span
 
-def login() -> requests.Session:
+if TYPE_CHECKING:
+    import requests
+
+# URL of the eLCA Bauteileditor, the environment variable ELCA_BASE_URL can point eLCArefurb to another server,
+# e.g. the local stub server of helpers/stub_server.py
+BASE_URL = os.environ.get("ELCA_BASE_URL", "https://www.bauteileditor.de").rstrip("/")
+
+# Login credentials read from login_credentials.json with the path and the modification time of the file
+_credentials_cache: tuple[tuple[str, int], list[dict]] | None = None
+
+
+def _credentials_source() -> tuple[str | None, str | None]:
+    """
+    Return the source of the login credentials in the order of load_login_credentials: the credentials as JSON
+    from ELCA_CREDENTIALS and None, or None and the file given in ELCA_CREDENTIALS_FILE or the default file.
+    """
+    credentials_file = os.environ.get("ELCA_CREDENTIALS_FILE")
+    credentials_json = os.environ.get("ELCA_CREDENTIALS")
+    if credentials_json and not credentials_file:
+        return credentials_json, None
+    return None, credentials_file or "temp_data/login_credentials.json"
+
+
+def credentials_available() -> bool:
+    """
+    Return True if login credentials can be read by load_login_credentials, i.e. ELCA_CREDENTIALS is set or the
+    credentials file exists, e.g. to check the project limits of the accounts before the login GUI was used.
+    """
+    credentials_json, credentials_file = _credentials_source()
+    return bool(credentials_json) or os.path.exists(credentials_file)
+
+
+def load_login_credentials() -> list[dict]:
+    """
+    Read the login credentials of the eLCA accounts from temp_data/login_credentials.json.
+    The file either contains one dictionary with the keys "User name" and "Password" (as saved by the login GUI)
+    or a list of such dictionaries to distribute the projects of a district over several accounts.
+    Optionally, each account can define a "Project limit" (maximum number of projects in the account).
+    For runs without the login GUI, the credentials can be given in the same format as JSON in the environment
+    variable ELCA_CREDENTIALS, or another file can be given in the environment variable ELCA_CREDENTIALS_FILE
+    (e.g. by the option --credentials of main.py). A file given in ELCA_CREDENTIALS_FILE takes precedence over
+    ELCA_CREDENTIALS. The file is only read again if it has been changed since it was read last.
+    """
+    global _credentials_cache
+    credentials_json, credentials_file = _credentials_source()
+    if credentials_json:
+        login_credentials = json.loads(credentials_json)
+        return [login_credentials] if isinstance(login_credentials, dict) else login_credentials
+    modified = os.stat(credentials_file).st_mtime_ns
+    if _credentials_cache is None or _credentials_cache[0] != (credentials_file, modified):
+        with open(credentials_file, encoding="utf-8") as lc:
+            login_credentials = json.load(lc)
+        if isinstance(login_credentials, dict):
+            login_credentials = [login_credentials]
+        _credentials_cache = ((credentials_file, modified), login_credentials)
+    return _credentials_cache[1]
+
+
+def login(credentials: dict = None) -> requests.Session:
     """
     login to specific eLCA Bauteileditor account and return requests session to stay
     logged in for further requests
-    :param username: Username of the eLCA account
-    :param password: Password of the eLCA account
+    :param credentials: dictionary with "User name" and "Password" of the eLCA account, if not given
+            the first account in temp_data/login_credentials.json is used
     """
 
+    if credentials is None:
+        credentials = load_login_credentials()[0]
 
-    lc = open("temp_data/login_credentials.json", encoding="utf-8")
-    login_credentials = json.load(lc)
-
-    username = login_credentials["User name"]
-    password = login_credentials["Password"]
+    username = credentials["User name"]
+    password = credentials["Password"]
 
 
+    # requests is imported with the first login, not with helpers
+    import requests
     session = requests.session()
     headers = {'x-requested-with': 'XMLHttpRequest'}
     session.headers.update(headers)
 
-    response_import = session.post("https://www.bauteileditor.de/login/", data={
-        "origin": "/",
-        "authName": username,
-        "authKey": password,
-        "login": "Absenden"
-    })
+    with span("POST /login/", "http", method="POST", path="/login/") as trace_args:
+        response_import = session.post(BASE_URL + "/login/", data={
+            "origin": "/",
+            "authName": username,
+            "authKey": password,
+            "login": "Absenden"
+        })
+        trace_args.update(status=response_import.status_code, bytes=len(response_import.content))
     if "authName error" in response_import.text:
         raise ValueError("Login was unsuccessful.")
     return session
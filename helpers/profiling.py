@@ -0,0 +1,161 @@
+from __future__ import annotations
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+# Interval of the sampling profiler in seconds
+SAMPLE_INTERVAL = 0.005
+# Number of allocation sites saved per stage
+TOP_ALLOCATIONS = 25
+
+
+def peak_rss() -> int | None:
+    """
+    Return the peak resident set size (RSS) of the process since its start in bytes, or None if it is not
+    available on the operating system.
+    """
+    try:
+        import resource
+    except ImportError:
+        # Windows: peak working set of the process
+        try:
+            import ctypes
+            from ctypes import wintypes
+
+            class ProcessMemoryCounters(ctypes.Structure):
+                _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                            ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                            ("QuotaNonPagedPoolUsage", ctypes.c_size_t), ("PagefileUsage", ctypes.c_size_t),
+                            ("PeakPagefileUsage", ctypes.c_size_t)]
+
+            counters = ProcessMemoryCounters()
+            counters.cb = ctypes.sizeof(counters)
+            ctypes.windll.psapi.GetProcessMemoryInfo(ctypes.windll.kernel32.GetCurrentProcess(),
+                                                     ctypes.byref(counters), counters.cb)
+            return int(counters.PeakWorkingSetSize)
+        except (AttributeError, OSError):
+            return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is given in bytes on macOS and in kilobytes on Linux
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+class SamplingProfiler:
+    """
+    Wall-clock sampling profiler without further dependencies: a background thread reads the call stacks of all
+    other threads (including the worker threads of the stages) every SAMPLE_INTERVAL seconds and counts the
+    stacks. The stacks are saved in the folded format ("thread;function;function count"), which can be shown
+    as flame graph with https://www.speedscope.app or flamegraph.pl.
+    """
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        """
+        :param interval: interval between two samples in seconds
+        """
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, name="SamplingProfiler", daemon=True)
+
+    def _sample(self) -> None:
+        """
+        Sample the call stacks of the threads until the profiler is stopped.
+        """
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(thread_names.get(thread_id, str(thread_id)))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def save_folded(self, file: str | Path) -> None:
+        """
+        Save the counted stacks in the folded format of flame graphs.
+        :param file: path of the file
+        """
+        with open(file, "w", encoding="utf-8") as folded_file:
+            for stack, count in self.stacks.most_common():
+                folded_file.write(f"{stack} {count}\n")
+
+
+def create_profile_dir(folder: str = "profile_data") -> Path:
+    """
+    Create the folder of a profiled run of eLCArefurb, named after the start time of the run.
+    :param folder: folder of all profiled runs
+    """
+    profile_dir = Path(folder) / datetime.now().strftime("%Y%m%d-%H%M%S")
+    profile_dir.mkdir(parents=True, exist_ok=True)
+    return profile_dir
+
+
+def profile_stage(stage: Callable, profile_dir: str | Path, *args, **kwargs):
+    """
+    Run a stage of eLCArefurb with the sampling profiler and tracemalloc and save the results of the stage in
+    the folder of the run:
+    1) <stage>.folded: call stacks of the stage for a flame graph (see SamplingProfiler)
+    2) <stage>_allocations.txt: code lines with the most memory still allocated at the end of the stage
+    3) profile.json: runtime, number of samples, peak of the memory allocated by Python (tracemalloc) and peak
+       RSS of the process after each stage. The peak RSS is the peak since the start of the process, a stage
+       that increases it needs more memory than all stages before.
+    Note that tracemalloc slows down stages that allocate many objects, the runtimes are therefore higher than
+    without profiling.
+    :param stage: stage of eLCArefurb, e.g. compile_lci
+    :param profile_dir: folder of the run, see create_profile_dir
+    :param args: arguments of the stage
+    :param kwargs: keyword arguments of the stage
+    """
+    profile_dir = Path(profile_dir)
+    name = stage.__name__
+    profiler = SamplingProfiler()
+    tracemalloc.start()
+    profiler.start()
+    start = time.perf_counter()
+    try:
+        return stage(*args, **kwargs)
+    finally:
+        duration = time.perf_counter() - start
+        profiler.stop()
+        snapshot = tracemalloc.take_snapshot()
+        traced_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        profiler.save_folded(profile_dir / f"{name}.folded")
+        # Allocation sites without the allocations of tracemalloc and the profiler itself
+        snapshot = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__),
+                                           tracemalloc.Filter(False, __file__)])
+        with open(profile_dir / f"{name}_allocations.txt", "w", encoding="utf-8") as allocations_file:
+            for statistic in snapshot.statistics("lineno")[:TOP_ALLOCATIONS]:
+                allocations_file.write(f"{statistic}\n")
+        stage_profile = {"seconds": round(duration, 3), "samples": profiler.samples,
+                         "traced_peak_bytes": traced_peak, "peak_rss_bytes": peak_rss()}
+        profile_file = profile_dir / "profile.json"
+        profile = json.loads(profile_file.read_text(encoding="utf-8")) if profile_file.exists() else {}
+        profile[name] = stage_profile
+        profile_file.write_text(json.dumps(profile, indent=4), encoding="utf-8")
+        rss = "-" if stage_profile["peak_rss_bytes"] is None else f'{stage_profile["peak_rss_bytes"] / 2 ** 20:.1f}'
+        print(f'Profil {name}: {duration:.1f} s, Python-Speicher max. {traced_peak / 2 ** 20:.1f} MB, '
+              f'RSS max. {rss} MB ({profile_dir})')
@@ -0,0 +1,238 @@
+from __future__ import annotations
+import atexit
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from helpers.endpoint_latency import request_count
+
+# Status file polled by external monitors, by default temp_data/status.json
+STATUS_FILE = os.environ.get("ELCA_STATUS_FILE", str(Path("temp_data") / "status.json"))
+# Period in seconds over which the throughput and the remaining time are calculated
+THROUGHPUT_WINDOW = 300
+# Minimum interval in seconds between two progress lines in the terminal and two writes of the status file
+PRINT_INTERVAL = 10
+WRITE_INTERVAL = 1
+
+# Status of all stages of the current execution with the stages as keys
+_status: dict[str, dict] = {}
+_status_lock = threading.Lock()
+_last_write = 0.0
+# Set by request_cancel (e.g. by the cancel button of the run window), the stages stop at their next unit
+_cancel_event = threading.Event()
+
+
+class StageCancelled(Exception):
+    """
+    Raised by a stage that was stopped by request_cancel. The units completed before are kept (projects registry
+    and harvest cache), so that the stage continues with the remaining units when it is run again.
+    """
+
+
+def request_cancel() -> None:
+    """
+    Ask the running stages to stop. Each stage stops before its next unit, units that are running (e.g. a project
+    that is being created) are completed first.
+    """
+    _cancel_event.set()
+
+
+def reset_cancel() -> None:
+    """
+    Withdraw a request to stop the stages, e.g. before the stages are resumed.
+    """
+    _cancel_event.clear()
+
+
+def cancel_requested() -> bool:
+    """
+    Return True if the stages have been asked to stop (see request_cancel).
+    """
+    return _cancel_event.is_set()
+
+
+def current_status() -> dict[str, dict]:
+    """
+    Return the status of the stages of the current execution with the stages as keys, without reading the status
+    file (e.g. for the progress bars of the run window).
+    """
+    with _status_lock:
+        return {stage: dict(stage_status) for stage, stage_status in _status.items()}
+
+
+def clear_status(stage: str) -> None:
+    """
+    Remove the status of a stage, e.g. the status of a cancelled stage before it is run again.
+    :param stage: name of the stage, e.g. Projekterstellung
+    """
+    with _status_lock:
+        _status.pop(stage, None)
+        _counters.pop(stage, None)
+
+
+def _write_status(force: bool = False) -> None:
+    """
+    Write the status of all stages to the status file. The file is replaced atomically, so that a monitor never
+    reads a partly written file.
+    :param force: write the file even if the last write was less than WRITE_INTERVAL seconds ago
+    """
+    global _last_write
+    with _status_lock:
+        if not _status:
+            return
+        now = time.monotonic()
+        if not force and now - _last_write < WRITE_INTERVAL:
+            return
+        _last_write = now
+        status = {"updated": datetime.now().isoformat(timespec="seconds"), "pid": os.getpid(),
+                  "stages": {stage: dict(stage_status) for stage, stage_status in _status.items()}}
+        status_file = Path(STATUS_FILE)
+        status_file.parent.mkdir(parents=True, exist_ok=True)
+        temporary_file = status_file.with_name(f"{status_file.name}.{os.getpid()}.tmp")
+        temporary_file.write_text(json.dumps(status, indent=4, ensure_ascii=False), encoding="utf-8")
+        os.replace(temporary_file, status_file)
+
+
+def read_status(status_file: str = None) -> dict:
+    """
+    Return the status of the stages written by the ProgressTrackers of a running or finished execution.
+    :param status_file: path of the status file, by default STATUS_FILE
+    """
+    status_file = Path(status_file or STATUS_FILE)
+    if not status_file.exists():
+        return {}
+    return json.loads(status_file.read_text(encoding="utf-8"))
+
+
+class ProgressTracker:
+    """
+    Progress of a stage of eLCArefurb: planned against completed units (e.g. projects created, projects read or
+    figures exported), the throughput in units per minute and eLCA requests per second over the last
+    THROUGHPUT_WINDOW seconds and the remaining time estimated from this throughput. The progress is printed at
+    most every PRINT_INTERVAL seconds and written to the status file STATUS_FILE, which can be polled by a
+    monitor during long runs. The tracker can be advanced by several threads at the same time.
+    """
+
+    def __init__(self, stage: str, planned: int | None, unit: str = "Projekte"):
+        """
+        :param stage: name of the stage, e.g. Projekterstellung
+        :param planned: number of planned units, None if it is not known in advance (no remaining time)
+        :param unit: name of the units in the progress lines, e.g. Projekte
+        """
+        self.stage = stage
+        self.planned = planned
+        self.unit = unit
+        self.completed = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+        self._start = time.monotonic()
+        self._last_print = self._start
+        # Samples of (time, completed units, eLCA requests) for the throughput of the last THROUGHPUT_WINDOW
+        self._samples: deque[tuple[float, int, int]] = deque([(self._start, 0, request_count())])
+        self._update(time.monotonic(), "läuft")
+
+    def advance(self, count: int = 1, failed: bool = False) -> None:
+        """
+        Record completed units.
+        :param count: number of completed units
+        :param failed: True if the units failed (e.g. quarantined projects), failed units count as completed
+        """
+        with self._lock:
+            self.completed += count
+            if failed:
+                self.failed += count
+            now = time.monotonic()
+            self._samples.append((now, self.completed, request_count()))
+            while len(self._samples) > 2 and now - self._samples[1][0] > THROUGHPUT_WINDOW:
+                self._samples.popleft()
+            status = self._update(now, "läuft")
+            print_line = now - self._last_print >= PRINT_INTERVAL
+            if print_line:
+                self._last_print = now
+        if print_line:
+            self._print(status)
+
+    def finish(self) -> None:
+        """
+        Mark the stage as finished and print the final progress line.
+        """
+        with self._lock:
+            status = self._update(time.monotonic(), "beendet")
+        _write_status(force=True)
+        self._print(status)
+
+    def check_cancel(self) -> None:
+        """
+        Raise StageCancelled if the stages have been asked to stop (see request_cancel). Called by the stages
+        before each unit, the stage is marked as cancelled in the status.
+        """
+        if not cancel_requested():
+            return
+        with self._lock:
+            status = self._update(time.monotonic(), "abgebrochen")
+        _write_status(force=True)
+        self._print(status)
+        raise StageCancelled(f'{self.stage} wurde nach {self.completed} {self.unit} abgebrochen.')
+
+    def _update(self, now: float, state: str) -> dict:
+        """
+        Calculate the throughput and the remaining time and update the status of the stage.
+        :param now: current time of time.monotonic
+        :param state: state of the stage (läuft, beendet or abgebrochen)
+        """
+        first_time, first_completed, first_requests = self._samples[0]
+        window = now - first_time
+        units_per_minute = (self.completed - first_completed) / window * 60 if window > 0 else 0.0
+        requests_per_second = (request_count() - first_requests) / window if window > 0 else 0.0
+        remaining = None
+        if self.planned is not None and units_per_minute > 0:
+            remaining = max(self.planned - self.completed, 0) / units_per_minute * 60
+        status = {"state": state, "unit": self.unit, "planned": self.planned, "completed": self.completed,
+                  "failed": self.failed, "elapsed_seconds": round(now - self._start, 1),
+                  "units_per_minute": round(units_per_minute, 2), "requests_per_second": round(requests_per_second, 2),
+                  "eta_seconds": None if remaining is None else round(remaining)}
+        with _status_lock:
+            _status[self.stage] = status
+        _write_status(force=state == "beendet")
+        return status
+
+    def _print(self, status: dict) -> None:
+        """
+        Print a progress line of the stage.
+        :param status: status of the stage
+        """
+        planned = "" if self.planned is None else f'/{self.planned}'
+        share = f' ({self.completed / self.planned:.0%})' if self.planned else ''
+        failed = f', {self.failed} fehlgeschlagen' if self.failed else ''
+        eta = '' if status["eta_seconds"] is None or status["state"] != "läuft" \
+            else f', Restzeit ca. {status["eta_seconds"] / 60:.0f} min'
+        print(f'{self.stage}: {self.completed}{planned} {self.unit}{share}{failed}, '
+              f'{status["units_per_minute"]:.1f} {self.unit}/min, {status["requests_per_second"]:.1f} Anfragen/s'
+              f'{eta}')
+
+
+# Trackers of units without a planned number, e.g. the exported figures, with the stages as keys
+_counters: dict[str, ProgressTracker] = {}
+
+
+def count_progress(stage: str, unit: str) -> None:
+    """
+    Advance the progress of units whose number is not known in advance, e.g. the figures exported by the
+    chart helpers. The tracker of the stage is created with the first unit.
+    :param stage: name of the stage, e.g. Abbildungen
+    :param unit: name of the units, e.g. Abbildungen
+    """
+    with _status_lock:
+        tracker = _counters.get(stage)
+    if tracker is None:
+        tracker = ProgressTracker(stage, None, unit)
+        with _status_lock:
+            tracker = _counters.setdefault(stage, tracker)
+    tracker.advance()
+
+
+# Write the last progress that was not written because of WRITE_INTERVAL at the end of the execution
+atexit.register(_write_status, True)
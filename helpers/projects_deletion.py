@@ -0,0 +1,84 @@
+from __future__ import annotations
+import glob
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable
+import requests
+from helpers.sessions import login_accounts
+from helpers.projects_registry import registered_projects, unregister_project, clear_dead_letters
+
+
+def delete_registered_projects(max_workers: int = 8, retries: int = 3,
+                               progress: Callable[[int, int, str], None] = None) -> list[dict]:
+    """
+    Delete all projects of the projects registry in their eLCA accounts. Projects that are not registered
+    (e.g. the project "Template creation" or projects created manually) are not deleted.
+    The deletion requests are sent in parallel by a limited number of workers. Failed requests are repeated,
+    projects that no longer exist in eLCA count as deleted. Deleted projects are removed from the registry together
+    with their harvest cache and dead letters (see unregister_project). If all projects are deleted, the dead-letter
+    queue is emptied as well. Return the registry entries of the projects that could not be deleted.
+    :param max_workers: maximum number of parallel deletion requests
+    :param retries: number of attempts to delete a project
+    :param progress: function that is called after each project with the number of processed projects,
+            the total number of projects and the project name
+    """
+    projects = registered_projects()
+    if not projects:
+        clear_dead_letters()
+        return []
+    # Allow as many open connections per account as there are workers
+    clients = login_accounts({project["account"] for project in projects}, pool_maxsize=max_workers)
+
+    def delete_project(project: dict) -> bool:
+        for attempt in range(retries):
+            try:
+                # A project that was deleted manually in eLCA only has to be removed from the registry
+                clients[project["account"]].delete_project(project["project_id"], missing_ok=True)
+                unregister_project(project["project_id"])
+                return True
+            except requests.RequestException:
+                # Wait before the next attempt: 1 s, 2 s, 4 s, ...
+                if attempt < retries - 1:
+                    time.sleep(2 ** attempt)
+        return False
+
+    failed_projects = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(delete_project, project): project for project in projects}
+        for done, future in enumerate(as_completed(futures), start=1):
+            project = futures[future]
+            project_name = f'{project["archetype"]} {project["variant"]}'
+            if future.result():
+                print("Project {} is deleted...".format(project_name))
+            else:
+                failed_projects.append(project)
+                print("Project {} could not be deleted!".format(project_name))
+            if progress:
+                progress(done, len(projects), project_name)
+    if not failed_projects:
+        clear_dead_letters()
+    return failed_projects
+
+
+def delete_temporary_files(include_reports: bool = False) -> None:
+    """
+    Delete the temporary files of the projects (the archetype folders in temp_data with the CSV and JSON files
+    of the projects), so that the programme can be run again. The files of the read components, the energy
+    sources, the archetypes and the login credentials directly in temp_data are kept and overwritten by the next
+    execution.
+    :param include_reports: if True, the report files in report_data are deleted as well, the folders are kept
+    """
+    for folder in glob.glob(os.path.join("temp_data", "*")):
+        if os.path.isdir(folder):
+            shutil.rmtree(folder)
+            print(f'{folder} has been deleted!')
+    print("All temporary files have been deleted!")
+    if not include_reports:
+        return
+    for file in glob.glob(os.path.join("report_data", "**", "*"), recursive=True):
+        if os.path.isfile(file):
+            os.remove(file)
+            print(f"{file} has been deleted!")
+    print("All data has been deleted!")
@@ -0,0 +1,283 @@
+from __future__ import annotations
+import hashlib
+import json
+import sqlite3
+import traceback
+from contextlib import closing
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING
+from helpers.login import load_login_credentials
+
+if TYPE_CHECKING:
+    from helpers.elca_client import ElcaClient
+
+# Refurbishment variants of every archetype in the order in which they are evaluated and presented
+REFURB_VARIANTS = ["Bestand", "Außenwandsanierung", "Dachsanierung", "Fenstersanierung", "Komplettsanierung"]
+
+
+def _connect_registry(folder: str = "temp_data") -> sqlite3.Connection:
+    """
+    Open the SQLite database of the projects registry and create the tables on the first use.
+    Besides the projects, the database contains the dead-letter queue of projects that failed in a stage
+    and the harvest cache of the data read from the projects.
+    :param folder: Name of the folder where the registry is saved
+    """
+    connection = sqlite3.connect(Path(folder) / "projects_registry.sqlite")
+    connection.row_factory = sqlite3.Row
+    connection.execute("""
+        CREATE TABLE IF NOT EXISTS projects (
+            archetype TEXT NOT NULL,
+            variant TEXT NOT NULL,
+            project_id TEXT NOT NULL UNIQUE,
+            variant_id TEXT,
+            input_hash TEXT,
+            account TEXT NOT NULL DEFAULT '',
+            PRIMARY KEY (archetype, variant)
+        )""")
+    # Registries created before projects were distributed over several accounts have no account column
+    columns = [row["name"] for row in connection.execute("PRAGMA table_info(projects)")]
+    if "account" not in columns:
+        connection.execute("ALTER TABLE projects ADD COLUMN account TEXT NOT NULL DEFAULT ''")
+    connection.execute("""
+        CREATE TABLE IF NOT EXISTS dead_letters (
+            stage TEXT NOT NULL,
+            archetype TEXT NOT NULL,
+            variant TEXT NOT NULL,
+            error TEXT,
+            traceback TEXT,
+            attempts INTEGER NOT NULL DEFAULT 1,
+            failed_at TEXT,
+            PRIMARY KEY (stage, archetype, variant)
+        )""")
+    connection.execute("""
+        CREATE TABLE IF NOT EXISTS harvest_cache (
+            stage TEXT NOT NULL,
+            project_id TEXT NOT NULL,
+            data TEXT NOT NULL,
+            PRIMARY KEY (stage, project_id)
+        )""")
+    return connection
+
+
+def project_input_hash(project_data: dict, csv_file: str | Path) -> str:
+    """
+    Create a hash of the data a project is created from (JSON data and CSV file of the project).
+    If the hash of a registered project is unchanged, the project does not have to be created again.
+    :param project_data: dictionary with project data from the JSON file of the project
+    :param csv_file: path of the CSV file that is imported into eLCA to create the project
+    """
+    input_hash = hashlib.sha256(json.dumps(project_data, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+    input_hash.update(Path(csv_file).read_bytes())
+    return input_hash.hexdigest()
+
+
+def register_project(archetype_name: str, variant: str, project_id: str, variant_id: str, input_hash: str,
+                     account: str = "", folder: str = "temp_data") -> None:
+    """
+    Save a created eLCA project in the projects registry. An existing entry of the same archetype
+    and refurbishment variant is replaced.
+    :param archetype_name: name of the archetype
+    :param variant: refurbishment variant of the project (e.g. Bestand or Dachsanierung)
+    :param project_id: ID of the project in eLCA
+    :param variant_id: ID of the project variant (planning phase) in eLCA
+    :param input_hash: hash of the data the project was created from
+    :param account: user name of the eLCA account the project was created in
+    :param folder: Name of the folder where the registry is saved
+    """
+    with closing(_connect_registry(folder)) as connection, connection:
+        connection.execute("INSERT OR REPLACE INTO projects (archetype, variant, project_id, variant_id, input_hash, "
+                           "account) VALUES (?, ?, ?, ?, ?, ?)",
+                           (archetype_name, variant, str(project_id), str(variant_id), input_hash, account))
+
+
+def registered_project(archetype_name: str, variant: str, folder: str = "temp_data") -> dict | None:
+    """
+    Return the registry entry of a project as a dictionary or None if the project is not registered.
+    :param archetype_name: name of the archetype
+    :param variant: refurbishment variant of the project
+    :param folder: Name of the folder where the registry is saved
+    """
+    with closing(_connect_registry(folder)) as connection:
+        row = connection.execute("SELECT * FROM projects WHERE archetype = ? AND variant = ?",
+                                 (archetype_name, variant)).fetchone()
+    return dict(row) if row else None
+
+
+def registered_archetype_projects(archetype_name: str, folder: str = "temp_data") -> dict[str, str]:
+    """
+    Return a dictionary with the refurbishment variants of an archetype as keys and the eLCA project IDs
+    as values. The variants are sorted according to REFURB_VARIANTS.
+    :param archetype_name: name of the archetype
+    :param folder: Name of the folder where the registry is saved
+    """
+    with closing(_connect_registry(folder)) as connection:
+        rows = connection.execute("SELECT variant, project_id FROM projects WHERE archetype = ?",
+                                  (archetype_name,)).fetchall()
+    projects = {row["variant"]: row["project_id"] for row in rows}
+    return {variant: projects[variant] for variant in REFURB_VARIANTS if variant in projects}
+
+
+def registered_archetype_account(archetype_name: str, folder: str = "temp_data") -> str | None:
+    """
+    Return the user name of the eLCA account that contains the projects of an archetype
+    or None if no project of the archetype is registered.
+    :param archetype_name: name of the archetype
+    :param folder: Name of the folder where the registry is saved
+    """
+    with closing(_connect_registry(folder)) as connection:
+        row = connection.execute("SELECT account FROM projects WHERE archetype = ?", (archetype_name,)).fetchone()
+    return row["account"] if row else None
+
+
+def registered_projects(folder: str = "temp_data") -> list[dict]:
+    """
+    Return all registered projects as a list of dictionaries.
+    :param folder: Name of the folder where the registry is saved
+    """
+    with closing(_connect_registry(folder)) as connection:
+        rows = connection.execute("SELECT * FROM projects ORDER BY archetype").fetchall()
+    return [dict(row) for row in rows]
+
+
+def unregister_project(project_id: str, folder: str = "temp_data") -> None:
+    """
+    Remove a project from the registry, e.g. after the project has been deleted in eLCA. The data read from the
+    project (harvest cache) and the project's entries in the dead-letter queue are removed as well, so that a new
+    project of the archetype does not reuse them.
+    :param project_id: ID of the project in eLCA
+    :param folder: Name of the folder where the registry is saved
+    """
+    with closing(_connect_registry(folder)) as connection, connection:
+        row = connection.execute("SELECT archetype, variant FROM projects WHERE project_id = ?",
+                                 (str(project_id),)).fetchone()
+        if row is not None:
+            connection.execute("DELETE FROM dead_letters WHERE archetype = ? AND variant = ?",
+                               (row["archetype"], row["variant"]))
+        connection.execute("DELETE FROM projects WHERE project_id = ?", (str(project_id),))
+        connection.execute("DELETE FROM harvest_cache WHERE project_id = ?", (str(project_id),))
+
+
+def quarantine_project(stage: str, archetype_name: str, variant: str, error: BaseException,
+                       folder: str = "temp_data") -> None:
+    """
+    Put a project that failed in a stage into the dead-letter queue, so that the stage can continue with
+    the other projects and a later retry only processes the failed projects.
+    :param stage: stage in which the project failed (e.g. creation, lci or lcia)
+    :param archetype_name: name of the archetype
+    :param variant: refurbishment variant of the project
+    :param error: exception raised for the project
+    :param folder: Name of the folder where the registry is saved
+    """
+    with closing(_connect_registry(folder)) as connection, connection:
+        connection.execute("""
+            INSERT INTO dead_letters (stage, archetype, variant, error, traceback, failed_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (stage, archetype, variant) DO UPDATE SET error = excluded.error,
+                traceback = excluded.traceback, failed_at = excluded.failed_at, attempts = attempts + 1""",
+                           (stage, archetype_name, variant, repr(error),
+                            "".join(traceback.format_exception(type(error), error, error.__traceback__)), datetime.now().isoformat(timespec="seconds")))
+
+
+def release_project(stage: str, archetype_name: str, variant: str, folder: str = "temp_data") -> None:
+    """
+    Remove a project from the dead-letter queue of a stage after it has been processed successfully.
+    :param stage: stage in which the project was processed
+    :param archetype_name: name of the archetype
+    :param variant: refurbishment variant of the project
+    :param folder: Name of the folder where the registry is saved
+    """
+    with closing(_connect_registry(folder)) as connection, connection:
+        connection.execute("DELETE FROM dead_letters WHERE stage = ? AND archetype = ? AND variant = ?",
+                           (stage, archetype_name, variant))
+
+
+def quarantined_projects(stage: str = None, folder: str = "temp_data") -> list[dict]:
+    """
+    Return the projects in the dead-letter queue as a list of dictionaries with stage, archetype, variant,
+    error, traceback, number of attempts and time of the last failure.
+    :param stage: if given, only the projects that failed in this stage are returned
+    :param folder: Name of the folder where the registry is saved
+    """
+    with closing(_connect_registry(folder)) as connection:
+        if stage is None:
+            rows = connection.execute("SELECT * FROM dead_letters ORDER BY stage, archetype").fetchall()
+        else:
+            rows = connection.execute("SELECT * FROM dead_letters WHERE stage = ? ORDER BY archetype",
+                                      (stage,)).fetchall()
+    return [dict(row) for row in rows]
+
+
+def clear_dead_letters(folder: str = "temp_data") -> None:
+    """
+    Remove all projects from the dead-letter queue.
+    :param folder: Name of the folder where the registry is saved
+    """
+    with closing(_connect_registry(folder)) as connection, connection:
+        connection.execute("DELETE FROM dead_letters")
+
+
+def cache_harvest(stage: str, project_id: str, data: dict, folder: str = "temp_data") -> None:
+    """
+    Save the data read from a project in a stage, so that a retry of the stage does not read the project again.
+    :param stage: stage in which the data was read (e.g. lci or lcia)
+    :param project_id: ID of the project in eLCA
+    :param data: JSON serializable data read from the project
+    :param folder: Name of the folder where the registry is saved
+    """
+    with closing(_connect_registry(folder)) as connection, connection:
+        connection.execute("INSERT OR REPLACE INTO harvest_cache (stage, project_id, data) VALUES (?, ?, ?)",
+                           (stage, str(project_id), json.dumps(data, ensure_ascii=False)))
+
+
+def harvested_data(stage: str, project_id: str, folder: str = "temp_data") -> dict | None:
+    """
+    Return the data read from a project in a stage or None if the project has not been read yet.
+    :param stage: stage in which the data was read
+    :param project_id: ID of the project in eLCA
+    :param folder: Name of the folder where the registry is saved
+    """
+    with closing(_connect_registry(folder)) as connection:
+        row = connection.execute("SELECT data FROM harvest_cache WHERE stage = ? AND project_id = ?",
+                                 (stage, str(project_id))).fetchone()
+    return json.loads(row["data"]) if row else None
+
+
+def clear_harvest_cache(stage: str = None, folder: str = "temp_data") -> None:
+    """
+    Remove the cached data of the projects, so that the next execution of the stage reads all projects again
+    from eLCA, e.g. after the projects were changed manually in eLCA.
+    :param stage: stage whose data is removed (e.g. lci or lcia), if not given the data of all stages is removed
+    :param folder: Name of the folder where the registry is saved
+    """
+    with closing(_connect_registry(folder)) as connection, connection:
+        if stage is None:
+            connection.execute("DELETE FROM harvest_cache")
+        else:
+            connection.execute("DELETE FROM harvest_cache WHERE stage = ?", (stage,))
+
+
+def reconcile_projects_registry(client: ElcaClient, account: str = None,
+                                folder: str = "temp_data") -> dict[str, str]:
+    """
+    Compare the registry with the projects in the eLCA account. Registered projects that no longer exist
+    in the account are removed from the registry. This function is only called on demand, all other
+    functions of eLCArefurb rely on the registry without any requests to eLCA.
+    Return a dictionary of the projects in the account that are not registered with project IDs as keys
+    and project names as values.
+    :param client: eLCA client of the account to read the projects
+    :param account: user name of the account of the client, if given only the registered projects
+            of this account are compared
+    :param folder: Name of the folder where the registry is saved
+    """
+    account_projects = client.list_projects()
+    # Projects registered before several accounts were supported have no account and belong to the first account
+    # (see shard_archetypes)
+    owners = {account}
+    if account is not None and account == load_login_credentials()[0]["User name"]:
+        owners.add("")
+    registered_ids = {project["project_id"] for project in registered_projects(folder)
+                      if account is None or project["account"] in owners}
+    for project_id in registered_ids - account_projects.keys():
+        unregister_project(project_id, folder)
+    return {k: v for (k, v) in account_projects.items() if k not in registered_ids}
@@ -1,5 +1,6 @@
 import pandas
 import plotly.express as px
+from helpers.image_export import export_image
 
 def create_scatter(df: pandas.DataFrame, x_axis: str, y_axis: str, title: str, directory: str, height: int = 700) -> None:
 
@@ -24,7 +25,7 @@ def create_scatter(df: pandas.DataFrame, x_axis: str, y_axis: str, title: str, d
     fig.update_layout(font_family='Serif', font_color="black", font_size=16)
     #fig.data = fig.data[::-1]
     # Save PDf file
-    fig.write_image(directory, engine='kaleido', height=height)
+    export_image(fig, directory, height=height)
 
 
 
@@ -53,4 +54,4 @@ def create_facetted_scatter(df: pandas.DataFrame, x_axis: str, y_axis: str, face
     fig.update_traces(marker=dict(line=dict(width=0.5, color='black')))
     #fig.data = fig.data[::-1]
     # Save PDf file
-    fig.write_image(directory, engine='kaleido',  width=width, height=height)
\ No newline at end of file
+    export_image(fig, directory, width=width, height=height)
\ No newline at end of file
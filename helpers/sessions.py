@@ -0,0 +1,183 @@
+from __future__ import annotations
+import json
+import re
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING
+from helpers.accounts import account_credentials
+from helpers.elca_client import ElcaClient
+from helpers.login import login
+
+if TYPE_CHECKING:
+    import requests
+
+# Time in seconds after the last use of a login session, after which eLCA is logged in again
+SESSION_MAX_AGE = 20 * 60
+# Minimum time in seconds between two savings of a session file after requests of its client
+SESSION_SAVE_INTERVAL = 60
+
+# Clients of the logged in sessions of this process with (user name, slot) as keys
+_clients: dict[tuple[str, int], ElcaClient] = {}
+# Time of the last use of the clients
+_last_used: dict[tuple[str, int], float] = {}
+# Time of the last saving of the session files
+_last_saved: dict[tuple[str, int], float] = {}
+_lock = threading.Lock()
+# One lock per session, so that each session is only logged in once, even if it is requested by several threads
+_session_locks: dict[tuple[str, int], threading.Lock] = {}
+
+
+def _session_file(user_name: str, slot: int, folder: str = "temp_data") -> Path:
+    """
+    Return the path of the file in which the cookies of a login session are saved.
+    :param user_name: user name of the eLCA account
+    :param slot: number of the session of the account
+    :param folder: Name of the folder where the session files are saved
+    """
+    safe_name = re.sub(r"[^\w.-]", "_", user_name)
+    suffix = f"_{slot}" if slot else ""
+    return Path(folder) / f"session_{safe_name}{suffix}.json"
+
+
+def _save_session(user_name: str, slot: int, session: requests.Session, last_used: float) -> None:
+    """
+    Save the cookies of a login session, so that further executions of eLCArefurb can use the session
+    without logging in again.
+    :param user_name: user name of the eLCA account
+    :param slot: number of the session of the account
+    :param session: Login session
+    :param last_used: time of the last use of the session
+    """
+    cookies = [{"name": cookie.name, "value": cookie.value, "domain": cookie.domain, "path": cookie.path}
+               for cookie in session.cookies]
+    with open(_session_file(user_name, slot), "w", encoding="utf-8") as file:
+        json.dump({"User name": user_name, "last_used": last_used, "cookies": cookies}, file, indent=4)
+    _last_saved[(user_name, slot)] = last_used
+
+
+def _load_session(user_name: str, slot: int) -> requests.Session | None:
+    """
+    Load a login session saved by _save_session. Return None if there is no saved session or if the
+    session has expired.
+    :param user_name: user name of the eLCA account
+    :param slot: number of the session of the account
+    """
+    session_file = _session_file(user_name, slot)
+    if not session_file.exists():
+        return None
+    with open(session_file, encoding="utf-8") as file:
+        saved_session = json.load(file)
+    if time.time() - saved_session["last_used"] > SESSION_MAX_AGE:
+        return None
+    # requests is imported with the first session, not with helpers
+    import requests
+    session = requests.session()
+    session.headers.update({'x-requested-with': 'XMLHttpRequest'})
+    for cookie in saved_session["cookies"]:
+        session.cookies.set(cookie["name"], cookie["value"], domain=cookie["domain"], path=cookie["path"])
+    return session
+
+
+def _relogin(key: tuple[str, int], credentials: dict) -> requests.Session:
+    """
+    Log in again after eLCA rejected the login session of a client (see ElcaClient._renew_session) and save the
+    new session.
+    :param key: user name of the eLCA account and number of the session
+    :param credentials: dictionary with "User name" and "Password" of the eLCA account
+    """
+    session = login(credentials)
+    now = time.time()
+    _last_used[key] = now
+    _save_session(*key, session, now)
+    return session
+
+
+def _note_use(key: tuple[str, int]) -> None:
+    """
+    Note the use of a login session by a request of its client, so that sessions in use are not replaced after
+    SESSION_MAX_AGE. The time is saved in the session file at most every SESSION_SAVE_INTERVAL seconds, so that
+    further executions also reuse a session that a stage has used for longer than SESSION_MAX_AGE.
+    :param key: user name of the eLCA account and number of the session
+    """
+    now = time.time()
+    _last_used[key] = now
+    if now - _last_saved.get(key, 0) < SESSION_SAVE_INTERVAL:
+        return
+    with _lock:
+        client = _clients.get(key)
+        # Another thread has saved the session in the meantime
+        if client is None or now - _last_saved.get(key, 0) < SESSION_SAVE_INTERVAL:
+            return
+        _save_session(*key, client.session, now)
+
+
+def get_client(user_name: str = None, slot: int = 0, pool_maxsize: int = 10,
+               force_login: bool = False) -> ElcaClient:
+    """
+    Return an eLCA client of an account, which is logged in only once: the login session is shared by all
+    stages of eLCArefurb in this process and saved in temp_data/session_<user name>.json for further
+    executions. eLCA is logged in again if the session has not been used for SESSION_MAX_AGE seconds or if eLCA
+    rejects a request of the client because the session has expired on the server (the request is then sent again).
+    :param user_name: user name of the eLCA account, if not given the first account of
+            login_credentials.json is used
+    :param slot: number of the session of the account, eLCA saves the current project in the session, so that
+            workers that edit different projects at the same time need different sessions (see client_pool)
+    :param pool_maxsize: maximum number of open connections of the client (parallel requests)
+    :param force_login: if True, eLCA is logged in again, e.g. after the login credentials were changed
+    """
+    credentials = account_credentials(user_name)
+    key = (credentials["User name"], slot)
+    with _lock:
+        session_lock = _session_locks.setdefault(key, threading.Lock())
+    with session_lock:
+        now = time.time()
+        client = _clients.get(key)
+        if client is None or force_login or now - _last_used[key] > SESSION_MAX_AGE:
+            session = None if force_login else _load_session(*key)
+            if session is None:
+                session = login(credentials)
+            client = ElcaClient(session, pool_maxsize, relogin=lambda: _relogin(key, credentials),
+                                on_request=lambda: _note_use(key))
+            _clients[key] = client
+        elif pool_maxsize > client.pool_maxsize:
+            client.resize_pool(pool_maxsize)
+        _last_used[key] = now
+        _save_session(*key, client.session, now)
+        return client
+
+
+def client_pool(user_name: str = None, size: int = 1, pool_maxsize: int = 10, first_slot: int = 0) -> list[ElcaClient]:
+    """
+    Return several eLCA clients of an account with separate login sessions for parallel workers that edit
+    different projects at the same time. Each session is logged in only once (see get_client).
+    :param user_name: user name of the eLCA account
+    :param size: number of clients
+    :param pool_maxsize: maximum number of open connections of each client
+    :param first_slot: slot of the first session (see get_client), the slots before it are left to other threads,
+            e.g. slot 0 to the refresh of the template catalog
+    """
+    return [get_client(user_name, slot, pool_maxsize) for slot in range(first_slot, first_slot + size)]
+
+
+def login_accounts(user_names: set[str], pool_maxsize: int = 10) -> dict[str, ElcaClient]:
+    """
+    Return a dictionary with the user names of several eLCA accounts as keys and
+    the eLCA clients of the accounts as values (see get_client).
+    :param user_names: user names of the eLCA accounts
+    :param pool_maxsize: maximum number of open connections of each client (parallel requests)
+    """
+    return {user_name: get_client(user_name, pool_maxsize=pool_maxsize) for user_name in user_names}
+
+
+def invalidate_clients() -> None:
+    """
+    Forget all login sessions of this process and remove the saved sessions,
+    e.g. after the login credentials were changed.
+    """
+    with _lock:
+        _clients.clear()
+        _last_used.clear()
+        _last_saved.clear()
+    for session_file in Path("temp_data").glob("session_*.json"):
+        session_file.unlink()
@@ -0,0 +1,301 @@
+from __future__ import annotations
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from email.parser import BytesParser
+from email.policy import default as default_policy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+from helpers.elca_recordings import find_recording, load_recordings
+from helpers.endpoint_latency import endpoint_name
+
+# Paths of the endpoints that refer to the current project of the login session
+PROJECT_PATHS = ("/project-data/", "/project-elements/", "/project-report", "/report/", "/assistant/")
+# Responses of endpoints without recording, so that the project creation works without recordings
+FALLBACK_VIEWS = {"GET /project-csv/preview/": {"Elca\\View\\Import\\Csv\\ProjectImportPreviewView": "<ul></ul>"}}
+
+
+class ElcaStubServer(ThreadingHTTPServer):
+    """
+    Local stand-in for the eLCA Bauteileditor to run and load-test eLCArefurb without bauteileditor.de.
+    The server keeps the projects of the accounts and the current project of each login session. Login,
+    project list, CSV import, entering and deleting projects are answered by the server itself, all other
+    requests with the responses of eLCA recorded by ElcaClient (see ELCA_RECORD_DIR). The latency, the rate
+    limit and the error rate of the server can be configured to test concurrency, retries and caching offline.
+    eLCArefurb uses the server if the environment variable ELCA_BASE_URL is set to its base_url.
+    """
+    daemon_threads = True
+
+    def __init__(self, recordings: str = None, port: int = 8000, latency: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, rate_limit: float = None, seed: int = None):
+        """
+        :param recordings: folder with the recorded responses of eLCA
+        :param port: port of the server, 0 chooses a free port
+        :param latency: mean time in seconds until a request is answered
+        :param jitter: maximum deviation of the latency in seconds
+        :param error_rate: share of the requests that are answered with an internal server error (HTTP 500)
+        :param rate_limit: maximum number of requests per second, further requests are answered with
+                too many requests (HTTP 429), no limit if None
+        :param seed: seed of the random latencies and errors
+        """
+        super().__init__(("127.0.0.1", port), ElcaStubHandler)
+        self.by_request, self.by_endpoint = load_recordings(recordings) if recordings else ({}, {})
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        # Login sessions with the session IDs as keys and the user name and current project as values
+        self.sessions: dict[str, dict] = {}
+        # Projects of all accounts with the project IDs as keys and the user name and project name as values
+        self.projects: dict[str, dict] = {}
+        self.next_project_id = 100000
+        # Token bucket of the rate limit
+        self.tokens = rate_limit or 0
+        self.tokens_updated = time.monotonic()
+        # Number of requests per endpoint and number of injected errors
+        self.request_counts: dict[str, int] = {}
+        self.injected_errors = 0
+        self.throttled_requests = 0
+
+    @property
+    def base_url(self) -> str:
+        """
+        Return the base URL of the server for ELCA_BASE_URL.
+        """
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def take_token(self) -> bool:
+        """
+        Take a token of the rate limit, return False if the rate limit is exceeded.
+        """
+        if self.rate_limit is None:
+            return True
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate_limit, self.tokens + (now - self.tokens_updated) * self.rate_limit)
+            self.tokens_updated = now
+            if self.tokens < 1:
+                self.throttled_requests += 1
+                return False
+            self.tokens -= 1
+            return True
+
+
+class ElcaStubHandler(BaseHTTPRequestHandler):
+    """
+    Answer the requests to the stub server, see ElcaStubServer.
+    """
+    server: ElcaStubServer
+
+    def log_message(self, format, *args):
+        # Do not print every request
+        pass
+
+    def do_GET(self):
+        self.handle_request("GET")
+
+    def do_POST(self):
+        self.handle_request("POST")
+
+    def handle_request(self, method: str) -> None:
+        """
+        Inject latency, throttling and errors and answer the request.
+        :param method: HTTP method of the request
+        """
+        server = self.server
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        url = urlsplit(self.path)
+        endpoint = endpoint_name(method, url.path)
+        with server.lock:
+            server.request_counts[endpoint] = server.request_counts.get(endpoint, 0) + 1
+        if not server.take_token():
+            return self.send_text(429, "Too Many Requests", {"Retry-After": "1"})
+        time.sleep(max(server.latency + server.random.uniform(-server.jitter, server.jitter), 0))
+        if server.random.random() < server.error_rate:
+            with server.lock:
+                server.injected_errors += 1
+            return self.send_text(500, "Internal Server Error")
+
+        if method == "POST" and url.path == "/login/":
+            return self.login(self.form_data(body))
+        session = self.current_session()
+        if session is None:
+            return self.send_text(403, "Not logged in")
+        query = parse_qs(url.query, keep_blank_values=True)
+        if method == "GET" and url.path in ("/projects", "/projects/"):
+            return self.list_projects(session)
+        if method == "GET" and url.path == "/projects/delete/":
+            return self.delete_project(session, query.get("id", [""])[0])
+        match = re.fullmatch(r"/projects/(\d+)/", url.path)
+        if method == "GET" and match:
+            return self.open_project(session, match.group(1))
+        if method == "POST" and url.path == "/project-csv/validate/":
+            session["import"] = self.form_data(body).get("name", "")
+            session["project_id"] = None
+            return self.send_json({})
+        if method == "POST" and url.path == "/project-csv/preview/":
+            return self.create_project(session)
+        if url.path.startswith(PROJECT_PATHS) and session["project_id"] is None:
+            return self.send_text(400, "No current project in the session")
+        return self.send_recording(method)
+
+    # Responses generated by the server
+
+    def login(self, form: dict) -> None:
+        """
+        Log in to an account: every user name with a password is accepted.
+        :param form: form data of the login
+        """
+        if not form.get("authName") or not form.get("authKey"):
+            return self.send_text(200, '<input class="authName error">')
+        session_id = uuid.uuid4().hex
+        with self.server.lock:
+            self.server.sessions[session_id] = {"user": form["authName"], "project_id": None, "import": None}
+        self.send_text(200, "", {"Set-Cookie": f"PHPSESSID={session_id}; Path=/"})
+
+    def list_projects(self, session: dict) -> None:
+        """
+        Answer with the projects view of the account.
+        :param session: login session
+        """
+        with self.server.lock:
+            projects = [(project_id, project["name"]) for project_id, project in self.server.projects.items()
+                        if project["user"] == session["user"]]
+        items = "".join(f'<li id="project-{project_id}"><h2 class="headline">{name}</h2></li>'
+                        for project_id, name in projects)
+        view = f'<ul class="project-list">{items}</ul>' if projects else '<div></div>'
+        self.send_json({"Elca\\View\\ElcaProjectsView": view})
+
+    def open_project(self, session: dict, project_id: str) -> None:
+        """
+        Enter a project of the account.
+        :param session: login session
+        :param project_id: ID of the project
+        """
+        project = self.server.projects.get(project_id)
+        if project is None or project["user"] != session["user"]:
+            return self.send_text(404, "Project not found")
+        session["project_id"] = project_id
+        self.send_json({})
+
+    def delete_project(self, session: dict, project_id: str) -> None:
+        """
+        Delete a project of the account.
+        :param session: login session
+        :param project_id: ID of the project
+        """
+        with self.server.lock:
+            project = self.server.projects.get(project_id)
+            if project is None or project["user"] != session["user"]:
+                return self.send_text(404, "Project not found")
+            del self.server.projects[project_id]
+        self.send_json({})
+
+    def create_project(self, session: dict) -> None:
+        """
+        Create the project of the CSV import of the session.
+        :param session: login session
+        """
+        if session["import"] is None:
+            return self.send_text(400, "No CSV import in the session")
+        with self.server.lock:
+            self.server.next_project_id += 1
+            project_id = str(self.server.next_project_id)
+            self.server.projects[project_id] = {"user": session["user"], "name": session["import"]}
+        session["import"] = None
+        self.send_json({"Elca\\View\\ElcaModalProcessingView":
+                        f'<div data-action="/project-data/lcaProcessing/?id={project_id}&amp;"></div>'})
+
+    def send_recording(self, method: str) -> None:
+        """
+        Answer with the recorded response to the request or to another request of the same endpoint.
+        :param method: HTTP method of the request
+        """
+        recording = find_recording(self.server.by_request, self.server.by_endpoint, method, self.path)
+        if recording is None and f"{method} {urlsplit(self.path).path}" in FALLBACK_VIEWS:
+            return self.send_json(FALLBACK_VIEWS[f"{method} {urlsplit(self.path).path}"])
+        if recording is None:
+            return self.send_text(404, f"No recording of {method} {self.path}")
+        self.send_text(recording["status"], recording["body"])
+
+    # Helpers
+
+    def current_session(self) -> dict | None:
+        """
+        Return the login session of the request from the session cookie.
+        """
+        match = re.search(r"PHPSESSID=(\w+)", self.headers.get("Cookie", ""))
+        return self.server.sessions.get(match.group(1)) if match else None
+
+    def form_data(self, body: bytes) -> dict[str, str]:
+        """
+        Return the form data of a POST request, both url-encoded and multipart forms (CSV import).
+        :param body: body of the request
+        """
+        content_type = self.headers.get("Content-Type", "")
+        if content_type.startswith("multipart/form-data"):
+            message = BytesParser(policy=default_policy).parsebytes(
+                f"Content-Type: {content_type}\r\n\r\n".encode("utf-8") + body)
+            return {part.get_param("name", header="content-disposition"): part.get_content()
+                    for part in message.iter_parts() if part.get_filename() is None}
+        return {key: values[0] for key, values in parse_qs(body.decode("utf-8"), keep_blank_values=True).items()}
+
+    def send_text(self, status: int, text: str, headers: dict[str, str] = None) -> None:
+        """
+        Send a response.
+        :param status: HTTP status code
+        :param text: body of the response
+        :param headers: further headers of the response
+        """
+        body = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json(self, views: dict[str, str]) -> None:
+        """
+        Send a response of JSON-wrapped HTML views like eLCA.
+        :param views: dictionary with the names of the views as keys and the HTML code as values
+        """
+        self.send_text(200, json.dumps(views))
+
+
+def start_stub_server(**kwargs) -> ElcaStubServer:
+    """
+    Start the stub server in a background thread and return it, e.g. for load tests. The server is stopped
+    with shutdown(). The keyword arguments are passed to ElcaStubServer, by default a free port is chosen.
+    """
+    kwargs.setdefault("port", 0)
+    server = ElcaStubServer(**kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for the eLCA Bauteileditor. Start eLCArefurb "
+                                                 "with ELCA_BASE_URL=http://127.0.0.1:<port> to use it.")
+    parser.add_argument("--recordings", help="folder with responses recorded with ELCA_RECORD_DIR")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.0, help="mean latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="maximum deviation of the latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with HTTP 500")
+    parser.add_argument("--rate-limit", type=float, default=None, help="maximum number of requests per second")
+    parser.add_argument("--seed", type=int, default=None)
+    arguments = parser.parse_args()
+    stub_server = ElcaStubServer(arguments.recordings, arguments.port, arguments.latency, arguments.jitter,
+                                 arguments.error_rate, arguments.rate_limit, arguments.seed)
+    print(f"eLCA stub server: {stub_server.base_url}")
+    try:
+        stub_server.serve_forever()
+    except KeyboardInterrupt:
+        stub_server.server_close()
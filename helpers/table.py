@@ -2,8 +2,7 @@ import pandas
 import plotly.graph_objects as go
 import numpy as np
 np.random.seed(1)
-import plotly.io as pio
-pio.kaleido.scope.mathjax = None
+from helpers.image_export import export_image
 
 def create_table(df: pandas.DataFrame, title: str, directory: str, image_height: int, layout_width: int = 2000, layout_height: int = 10000) -> None:
     """
@@ -42,7 +41,7 @@ def create_table(df: pandas.DataFrame, title: str, directory: str, image_height:
     # Set font
     fig.update_layout(title_text=title,  font_family="Serif", font_color="black")
     # Save PDF
-    fig.write_image(directory + '.pdf', engine='kaleido', height=image_height)
+    export_image(fig, directory + '.pdf', height=image_height)
     # Save CSV file for further data processing
     df.to_csv(directory + '.csv', index=False)
 
@@ -83,7 +82,7 @@ def create_five_grouped_table(df: pandas.DataFrame, title: str, directory: str,
     # Set font
     fig.update_layout(title_text=title,  font_family="Serif", font_color="black")
     # Save PDF
-    fig.write_image(directory + '.pdf', engine='kaleido', height=image_height)
+    export_image(fig, directory + '.pdf', height=image_height)
     # Save CSV file for further data processing
     df.to_csv(directory + '.csv', index=False)
 
@@ -127,7 +126,7 @@ def create_four_grouped_table(df: pandas.DataFrame, title: str, directory: str,
     # Set font
     fig.update_layout(title_text=title,  font_family="Serif", font_color="black")
     # Save PDf
-    fig.write_image(directory + '.pdf', engine='kaleido', height=image_height)
+    export_image(fig, directory + '.pdf', height=image_height)
     # Save CSV file for further data processing
     df.to_csv(directory + '.csv', index=False)
 
@@ -0,0 +1,171 @@
+from __future__ import annotations
+import heapq
+from collections import Counter, defaultdict
+from helpers.json import load_component_json
+
+# Minimum share of the trigrams of a search text that a template name must contain to be found
+MIN_TRIGRAM_SHARE = 0.5
+
+
+def trigrams(text: str) -> set[str]:
+    """
+    Return the trigrams (sequences of three characters) of a text for the fuzzy search. The text is compared
+    without regard to upper and lower case and padded with spaces, so that the beginnings of words weigh more.
+    :param text: text, e.g. the name of a template
+    """
+    padded = f"  {' '.join(text.casefold().split())} "
+    return {padded[position:position + 3] for position in range(len(padded) - 2)}
+
+
+class TemplateCatalog:
+    """
+    Component templates read by collect_templates (stock_templates.json, refurb_templates.json and
+    refurb_alternatives.json) indexed for the GUIs: the templates are found by UUID, cost group and name in
+    constant time, and the names of the stock templates are indexed by trigrams for an incremental fuzzy search,
+    which stays fast with thousands of templates. The U-values and descriptions of a stock template and its
+    refurbishment alternative are looked up by the UUID of the stock template.
+    Not to be confused with template_catalog.json of collect_templates, which caches the entries of the eLCA
+    template list.
+    """
+
+    def __init__(self, stock_templates: list[dict], refurb_templates: list[dict] = (),
+                 refurb_alternatives: dict[str, str] = None):
+        """
+        :param stock_templates: existing components with refurbishment alternative (see stock_templates.json)
+        :param refurb_templates: refurbishment components (see refurb_templates.json)
+        :param refurb_alternatives: dictionary with IDs of stock templates as keys and IDs of corresponding
+                refurbishment components as values
+        """
+        self.stock_templates = list(stock_templates)
+        self.refurb_alternatives = dict(refurb_alternatives or {})
+        self._by_uuid = {str(template['UUID']): template for template in self.stock_templates}
+        self._refurb_by_uuid = {str(template['UUID']): template for template in refurb_templates}
+        # Templates per cost group in the order of the template list, and per cost group and name
+        self._by_cost_group: dict[str, list[dict]] = defaultdict(list)
+        self._by_name: dict[tuple[str, str], list[dict]] = defaultdict(list)
+        # UUIDs of the templates per cost group with the trigrams of their names as keys
+        self._trigram_index: dict[str, dict[str, set[str]]] = defaultdict(lambda: defaultdict(set))
+        self._trigram_counts: dict[str, int] = {}
+        # Names of the templates for the comparison without regard to upper and lower case
+        self._keys: dict[str, str] = {}
+        # Positions of the templates in the template list with their UUIDs as keys
+        self._positions: dict[str, int] = {}
+        for position, template in enumerate(self.stock_templates):
+            uuid, cost_group = str(template['UUID']), str(template['CG_DIN_276'])
+            self._by_cost_group[cost_group].append(template)
+            self._keys[uuid] = template['template_name'].casefold()
+            self._by_name[cost_group, self._keys[uuid]].append(template)
+            name_trigrams = trigrams(template['template_name'])
+            self._trigram_counts[uuid] = len(name_trigrams)
+            self._positions[uuid] = position
+            for trigram in name_trigrams:
+                self._trigram_index[cost_group][trigram].add(uuid)
+
+    @classmethod
+    def from_files(cls, folder: str = "temp_data") -> TemplateCatalog:
+        """
+        Load the catalog from the template files saved by collect_templates.
+        :param folder: Name of the folder of the template files
+        """
+        return cls(load_component_json("stock_templates", folder), load_component_json("refurb_templates", folder),
+                   load_component_json("refurb_alternatives", folder))
+
+    def __len__(self) -> int:
+        return len(self.stock_templates)
+
+    def templates(self, cost_group: str = None) -> list[dict]:
+        """
+        Return the stock templates of a cost group in the order of the template list.
+        :param cost_group: cost group according to DIN 276, e.g. "330", None for all templates
+        """
+        if cost_group is None:
+            return self.stock_templates
+        return self._by_cost_group.get(str(cost_group), [])
+
+    def template(self, uuid: str) -> dict | None:
+        """
+        Return the stock template with a UUID, None if there is no such template.
+        :param uuid: UUID of the template
+        """
+        return self._by_uuid.get(str(uuid))
+
+    def find(self, name: str, cost_group: str) -> list[dict]:
+        """
+        Return the stock templates of a cost group with a name (without regard to upper and lower case). Several
+        templates of a cost group can have the same name.
+        :param name: name of the template
+        :param cost_group: cost group according to DIN 276, e.g. "330"
+        """
+        return self._by_name.get((str(cost_group), name.strip().casefold()), [])
+
+    def refurbishment(self, uuid: str) -> dict | None:
+        """
+        Return the refurbishment alternative of a stock template, None if it has none.
+        :param uuid: UUID of the stock template
+        """
+        return self._refurb_by_uuid.get(str(self.refurb_alternatives.get(str(uuid))))
+
+    def u_value(self, uuid: str) -> str | None:
+        """
+        Return the U-value of a stock template in W/(m²K) as read from eLCA.
+        :param uuid: UUID of the stock template
+        """
+        template = self.template(uuid)
+        return None if template is None else template.get('U-Value')
+
+    def refurbishment_u_value(self, uuid: str) -> str | None:
+        """
+        Return the U-value of the refurbishment alternative of a stock template in W/(m²K).
+        :param uuid: UUID of the stock template
+        """
+        refurbishment = self.refurbishment(uuid)
+        return None if refurbishment is None else refurbishment.get('U-Value')
+
+    def description(self, uuid: str) -> str | None:
+        """
+        Return the description of a stock template.
+        :param uuid: UUID of the stock template
+        """
+        template = self.template(uuid)
+        return None if template is None else template.get('description')
+
+    def search(self, text: str, cost_group: str = None, limit: int = None) -> list[dict]:
+        """
+        Return the stock templates whose names match a search text, best matches first. Names that contain the
+        text come first, followed by the names that share most of the trigrams of the text, so that typing
+        mistakes and words in a different order are tolerated. Without search text all templates of the cost
+        group are returned in the order of the template list.
+        :param text: search text, e.g. the beginning of a name typed in a combo box
+        :param cost_group: cost group according to DIN 276, e.g. "330", None for all templates
+        :param limit: maximum number of returned templates, None for all matches
+        """
+        query = ' '.join(text.casefold().split())
+        if not query:
+            return self.templates(cost_group)[:limit]
+        query_trigrams = trigrams(query)
+        # Number of common trigrams per template, only the templates with at least one common trigram are counted
+        indexes = self._trigram_index.values() if cost_group is None \
+            else [self._trigram_index.get(str(cost_group), {})]
+        hits = Counter()
+        for index in indexes:
+            for trigram in query_trigrams:
+                hits.update(index.get(trigram, ()))
+        minimum_hits = max(1, int(len(query_trigrams) * MIN_TRIGRAM_SHARE))
+        # A name that contains a search text of three or more characters shares at least one trigram with it,
+        # shorter texts are searched in all names
+        if len(query) >= 3:
+            candidates = [self._by_uuid[uuid] for uuid in hits]
+        else:
+            candidates = self.templates(cost_group)
+        scored = []
+        for template in candidates:
+            uuid = str(template['UUID'])
+            contained = query in self._keys[uuid]
+            if not contained and hits[uuid] < minimum_hits:
+                continue
+            # Similarity of the trigram sets (Jaccard index)
+            similarity = hits[uuid] / (len(query_trigrams) + self._trigram_counts[uuid] - hits[uuid])
+            scored.append((not contained, -similarity, self._positions[uuid], template))
+        key = lambda score: score[:3]
+        best = sorted(scored, key=key) if limit is None else heapq.nsmallest(limit, scored, key=key)
+        return [template for *_, template in best]
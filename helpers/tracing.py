@@ -0,0 +1,138 @@
+from __future__ import annotations
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+# File of the Chrome trace (chrome://tracing or https://ui.perfetto.dev), tracing is enabled if the environment
+# variable ELCA_TRACE is set or enable_tracing is called
+TRACE_FILE = os.environ.get("ELCA_TRACE")
+
+# Spans as Chrome trace events
+_events: list[dict] = []
+_lock = threading.Lock()
+_enabled = bool(TRACE_FILE)
+# Start of the trace, the times of the events are relative to it
+_start = time.perf_counter()
+
+
+def enable_tracing(enabled: bool = True) -> None:
+    """
+    Enable or disable the recording of spans.
+    :param enabled: True to record spans
+    """
+    global _enabled
+    _enabled = enabled
+
+
+def tracing_enabled() -> bool:
+    """
+    Return True if spans are recorded.
+    """
+    return _enabled
+
+
+@contextmanager
+def span(name: str, category: str, **args) -> Iterator[dict]:
+    """
+    Record the duration of a block as span of the trace, e.g. an HTTP request, the parsing of a response,
+    a stage of eLCArefurb or the export of a chart. The yielded dictionary contains the arguments of the span
+    and can be extended within the block, e.g. with the status of a response.
+    :param name: name of the span, e.g. the endpoint of a request
+    :param category: category of the span, e.g. http, parse, stage, dataframe or export
+    :param args: further information on the span
+    """
+    if not _enabled:
+        yield args
+        return
+    start = time.perf_counter()
+    try:
+        yield args
+    finally:
+        end = time.perf_counter()
+        event = {"name": name, "cat": category, "ph": "X", "ts": (start - _start) * 1e6,
+                 "dur": (end - start) * 1e6, "pid": os.getpid(), "tid": threading.get_ident(),
+                 "args": {key: value if isinstance(value, (int, float, bool)) or value is None else str(value)
+                          for key, value in args.items()}}
+        with _lock:
+            _events.append(event)
+
+
+def traced(category: str = "stage") -> Callable:
+    """
+    Decorator that records each call of a function as span with the name of the function.
+    :param category: category of the spans
+    """
+    def decorator(function: Callable) -> Callable:
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(function.__name__, category):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def save_trace(trace_file: str = None) -> None:
+    """
+    Save the recorded spans as Chrome trace file, which can be opened with chrome://tracing or
+    https://ui.perfetto.dev.
+    :param trace_file: path of the trace file, by default ELCA_TRACE
+    """
+    with _lock:
+        events = list(_events)
+    # Name the threads of the trace
+    thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+    metadata = [{"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid,
+                 "args": {"name": thread_names.get(tid, str(tid))}} for tid in {event["tid"] for event in events}]
+    with open(trace_file or TRACE_FILE, "w", encoding="utf-8") as file:
+        json.dump({"traceEvents": metadata + events, "displayTimeUnit": "ms"}, file)
+
+
+def trace_summary() -> list[dict]:
+    """
+    Return the time spent per category and span name (e.g. per endpoint and per stage), sorted by category and
+    total time. Each row contains the category, the name, the number of spans, the total, mean and maximum time
+    in milliseconds and the transferred bytes of HTTP requests.
+    """
+    with _lock:
+        events = list(_events)
+    rows: dict[tuple[str, str], dict] = {}
+    for event in events:
+        row = rows.setdefault((event["cat"], event["name"]), {"category": event["cat"], "name": event["name"],
+                                                              "count": 0, "total_ms": 0.0, "max_ms": 0.0,
+                                                              "bytes": 0})
+        row["count"] += 1
+        row["total_ms"] += event["dur"] / 1000
+        row["max_ms"] = max(row["max_ms"], event["dur"] / 1000)
+        row["bytes"] += event["args"].get("bytes") or 0
+    for row in rows.values():
+        row["mean_ms"] = row["total_ms"] / row["count"]
+    return sorted(rows.values(), key=lambda row: (row["category"], -row["total_ms"]))
+
+
+def print_trace_summary() -> None:
+    """
+    Print the time spent per endpoint, per stage and per further category of spans.
+    """
+    print(f'{"Kategorie":10s} {"Name":55s} {"Anzahl":>7s} {"Summe ms":>11s} {"Mittel ms":>10s} '
+          f'{"Max ms":>10s} {"Bytes":>12s}')
+    for row in trace_summary():
+        print(f'{row["category"]:10s} {row["name"][:55]:55s} {row["count"]:7d} {row["total_ms"]:11.1f} '
+              f'{row["mean_ms"]:10.1f} {row["max_ms"]:10.1f} {row["bytes"]:12d}')
+
+
+def _save_trace_at_exit() -> None:
+    """
+    Save the trace and print the summary at the end of a run with ELCA_TRACE.
+    """
+    if TRACE_FILE and _events:
+        save_trace()
+        print_trace_summary()
+        print(f'Der Trace wurde in {TRACE_FILE} gespeichert.')
+
+
+atexit.register(_save_trace_at_exit)
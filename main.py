@@ -1,20 +1,67 @@
-from creation.components_collection import collect_templates
-from creation.projects_data import prepare_projects_data
-from creation.projects_creation import create_elca_projects
-from gui.gui_buildings_input import create_buildings_gui
-from gui.gui_projects_delete import delete_projects
-from assessment.life_cycle_inventory_assessments import compile_lci
-from assessment.life_cycle_impact_assessments import calculate_lcia
-from assessment.life_cycle_interpretation_assessments import interpret_lca
-from assessment.final_rating_diagram import create_rating_diagram
-from assessment.life_cycle_costing_assessments import analyse_life_cycle_costs
-from gui.login_credentials import create_login_gui
+from importlib import import_module
+from typing import Callable
+import argparse
+import sys
 import warnings
 warnings.simplefilter(action='ignore', category=FutureWarning)
 
 
+def lazy_stage(module: str, name: str) -> Callable:
+    """
+    Return a function that imports a stage of eLCArefurb at its first call. The stage modules import pandas,
+    plotly, kaleido and bs4/lxml, so that importing all of them at the start of main.py would delay the login GUI
+    by several seconds.
+    :param module: module of the stage, e.g. creation.components_collection
+    :param name: name of the stage function, e.g. collect_templates
+    """
+    def stage(*args, **kwargs):
+        return getattr(import_module(module), name)(*args, **kwargs)
+    # The name is used by the profiling of the stages
+    stage.__name__ = stage.__qualname__ = name
+    return stage
+
+
+collect_templates = lazy_stage("creation.components_collection", "collect_templates")
+prepare_projects_data = lazy_stage("creation.projects_data", "prepare_projects_data")
+preflight_projects = lazy_stage("creation.preflight", "preflight_projects")
+import_archetypes = lazy_stage("creation.archetypes_import", "import_archetypes")
+create_elca_projects = lazy_stage("creation.projects_creation", "create_elca_projects")
+create_buildings_gui = lazy_stage("gui.gui_buildings_input", "create_buildings_gui")
+delete_projects = lazy_stage("gui.gui_projects_delete", "delete_projects")
+compile_lci = lazy_stage("assessment.life_cycle_inventory_assessments", "compile_lci")
+calculate_lcia = lazy_stage("assessment.life_cycle_impact_assessments", "calculate_lcia")
+interpret_lca = lazy_stage("assessment.life_cycle_interpretation_assessments", "interpret_lca")
+create_rating_diagram = lazy_stage("assessment.final_rating_diagram", "create_rating_diagram")
+analyse_life_cycle_costs = lazy_stage("assessment.life_cycle_costing_assessments", "analyse_life_cycle_costs")
+create_login_gui = lazy_stage("gui.login_credentials", "create_login_gui")
+create_run_gui = lazy_stage("gui.gui_pipeline_runner", "create_run_gui")
+
+
+def stage_runner(profile: bool = False) -> Callable:
+    """
+    Return a function that runs a stage with its arguments, with profile=True the stage is profiled
+    (see helpers/profiling.py) and the results are saved in profile_data/<start time of the run>.
+    :param profile: if True, the stages are run with a sampling profiler and tracemalloc
+    """
+    if not profile:
+        return lambda stage, *args, **kwargs: stage(*args, **kwargs)
+    from helpers import create_profile_dir, profile_stage
+    profile_dir = create_profile_dir()
+    return lambda stage, *args, **kwargs: profile_stage(stage, profile_dir, *args, **kwargs)
+
 
-def main():
+def template_files_exist(folder: str = "temp_data") -> bool:
+    """
+    Return True if the template files of a previous execution of collect_templates exist, so that the buildings
+    GUI can be opened before the templates are read from eLCA again.
+    :param folder: Name of the folder of the template files
+    """
+    from pathlib import Path
+    return all((Path(folder) / f"{name}.json").exists()
+               for name in ["stock_templates", "refurb_templates", "refurb_alternatives"])
+
+
+def main(profile: bool = False, early_creation: bool = False):
     """
 
     eLCArefurb creates a life cycle assessment of possible renovation scenarios on multiple buildings by
@@ -27,51 +74,97 @@ def main():
     Finally, the ecological aspects of GWP changes are compared with the economic aspects in order
     to allow a comprehensive evaluation of the refurbishment scenarios.
 
+    :param profile: if True, the stages from collect_templates to create_rating_diagram are run with a sampling
+            profiler and tracemalloc, the flame graph data, the top allocation sites and the peak RSS of each
+            stage are saved in profile_data/<start time of the run> (see helpers/profiling.py)
+    :param early_creation: if True, the eLCA projects of an archetype are created in the background as soon as
+            the user adds another archetype in the buildings GUI, while the further archetypes are entered
+            (see creation/early_creation.py). create_elca_projects then only creates the missing projects.
+
     """
 
+    run_stage = stage_runner(profile)
     create_login_gui()
     # collect_templates reads the energy sources, outer walls, windows and roofs from eLCA,
     # which can be chosen by the user in the gui dropdown-box.
     # Existing building components are assigned to the appropriate refurbishment alternative.
-    collect_templates()
+    # If the template files of a previous execution exist, the GUI opens at once with these templates and
+    # collect_templates runs in the background of the GUI (not when the stages are profiled).
+    refresh_in_background = template_files_exist() and not profile
+    if not refresh_in_background:
+        run_stage(collect_templates)
+    # With early_creation, the projects of the confirmed archetypes are created while the user enters the
+    # further archetypes, so that the input time of the user overlaps with the time needed by eLCA.
+    project_creator = None
+    if early_creation:
+        from creation.early_creation import EarlyProjectCreator
+        project_creator = EarlyProjectCreator()
     # Create a graphical user interface where a user can enter information
     # on stock building archetypes of a quarter.
-    create_buildings_gui()
-    # Transform the data from the user input on the archetypes and the read
-    # renovation components into the data formats necessary to create a project through a
-    # CSV import in eLCA. For each archetype defined by the user, 5 projects are to be created:
-    # Existing building, exterior wall renovation, roof renovation, window renovation and
-    # complete renovation.
-    prepare_projects_data()
-    # Create the projects in eLCA through the CSV import feature.
-    # The existing building components selected by the user are modelled for the
-    # existing scenario and the corresponding renovation components are modelled
-    # for the renovation scenarios.
-    # The energy source and the corresponding final energy demand
-    # for heating and hot water are specified.
-    create_elca_projects()
-    # compile_lci is used for phase 2 of the LCA, the life cycle inventory.
-    # The life cycle inventory data of the created projects are
-    # retrieved from eLCA. From the information compiled by eLCA on the input and
-    # output flows of the building over the product life cycle, various tables are
-    # created.
-    compile_lci()
-    # calculate_lcia is used for phase 3 of the LCA, the impact assessment.
-    # The evaluations for the impact assessments on the total GWP from eLCA are read and
-    # tables for the different archetypes and remediation scenarios are created.
-    calculate_lcia()
-    # interpret_lca is used for phase 4 of the LCA, the interpretation. The data from the
-    # impact assessment phase is read in and processed to create visualisations on the
-    # identification of pollution hotspots, the comparison of refurbishment scenarios
-    # and the temporal distribution.
-    interpret_lca()
-    # analysis_life_cycle_costs is used to calculate the costs for the refurbishment measures
-    # according to the best base and worst case. In addition, the net present value of the
-    # energy cost savings is calculated and compared to the costs for the refurbishment.
-    analyse_life_cycle_costs()
-    # create_rating_diagram compares the changes in GWP with the economic impacts.
-    # In addition, the changes in GWP per euro spent are determined to allow prioritization of the different scenarios.
-    create_rating_diagram()
+    archetypes = create_buildings_gui(refresh_catalog=refresh_in_background, project_creator=project_creator)
+    if project_creator is not None and archetypes is None:
+        # The archetypes were not saved, the projects created during the input are discarded
+        project_creator.cancel()
+        project_creator = None
+    # The following stages run in a background thread of a run window, which shows the progress and throughput
+    # of each stage and keeps responsive during the long network phases. The run can be cancelled and resumed
+    # with the cancelled stage, projects that have already been created or read are skipped.
+    stages = [
+        # preflight_projects validates all archetypes against refurb_alternatives.json and savings.csv, counts the
+        # requests to eLCA and estimates the runtime of the project creation, before any project is created.
+        # Mistakes in the archetypes stop the programme here instead of during the project creation.
+        ("Check archetypes", preflight_projects, None),
+        # Transform the data from the user input on the archetypes and the read
+        # renovation components into the data formats necessary to create a project through a
+        # CSV import in eLCA. For each archetype defined by the user, 5 projects are to be created:
+        # Existing building, exterior wall renovation, roof renovation, window renovation and
+        # complete renovation.
+        ("Prepare project data", prepare_projects_data, None),
+        # Create the projects in eLCA through the CSV import feature.
+        # The existing building components selected by the user are modelled for the
+        # existing scenario and the corresponding renovation components are modelled
+        # for the renovation scenarios.
+        # The energy source and the corresponding final energy demand
+        # for heating and hot water are specified.
+        ("Create eLCA projects", create_elca_projects, "Projekterstellung"),
+        # compile_lci is used for phase 2 of the LCA, the life cycle inventory.
+        # The life cycle inventory data of the created projects are
+        # retrieved from eLCA. From the information compiled by eLCA on the input and
+        # output flows of the building over the product life cycle, various tables are
+        # created.
+        ("Life cycle inventory", compile_lci, "Sachbilanz"),
+        # calculate_lcia is used for phase 3 of the LCA, the impact assessment.
+        # The evaluations for the impact assessments on the total GWP from eLCA are read and
+        # tables for the different archetypes and remediation scenarios are created.
+        ("Life cycle impact assessment", calculate_lcia, "Wirkungsabschätzung"),
+        # interpret_lca is used for phase 4 of the LCA, the interpretation. The data from the
+        # impact assessment phase is read in and processed to create visualisations on the
+        # identification of pollution hotspots, the comparison of refurbishment scenarios
+        # and the temporal distribution.
+        ("Interpretation", interpret_lca, "Abbildungen"),
+        # analysis_life_cycle_costs is used to calculate the costs for the refurbishment measures
+        # according to the best base and worst case. In addition, the net present value of the
+        # energy cost savings is calculated and compared to the costs for the refurbishment.
+        ("Life cycle costs", analyse_life_cycle_costs, "Abbildungen"),
+        # create_rating_diagram compares the changes in GWP with the economic impacts.
+        # In addition, the changes in GWP per euro spent are determined to allow prioritization of the different
+        # scenarios.
+        ("Rating diagram", create_rating_diagram, "Abbildungen"),
+    ]
+    if project_creator is not None:
+        # The projects created during the input have to be completed before the project files are written again
+        from creation.early_creation import EARLY_CREATION_STAGE
+
+        def finish_early_creation():
+            project_creator.finish(archetypes)
+        stages.insert(0, ("Finish projects created during the input", finish_early_creation,
+                          EARLY_CREATION_STAGE))
+    completed = create_run_gui(stages, run_stage)
+    if not completed:
+        # The projects and files are kept, so that the run can be continued with the command-line interface
+        print('Die Berechnung wurde nicht abgeschlossen. Sie kann mit "python main.py create", "assess" und '
+              '"report" fortgesetzt werden, bereits erstellte und gelesene Projekte werden übersprungen.')
+        return 1
     # delete_projects creates a graphical user interface that asks the user whether the projects
     # in the eLCA accounts, the temporary files for creating the eLCA projects and the report data should be deleted.
     # Deleting the files and projects allows the programme to be run again.
@@ -80,8 +173,174 @@ def main():
     return 0
 
 
-if __name__ == '__main__':
-    main()
+def retry_quarantined_projects(run_stage: Callable = None) -> int:
+    """
 
+    Retry the projects that failed during the last execution of eLCArefurb and were put into the dead-letter
+    queue of the projects registry (subcommand retry of the command-line interface). Only the failed projects are
+    created again, the life cycle inventory and the impact assessment only read the projects that are not in the
+    harvest cache, i.e. the failed projects. Afterwards the report data of the whole district is created again.
+    Return 1 if projects are still in the dead-letter queue afterwards, otherwise 0.
 
+    :param run_stage: function that runs a stage (see stage_runner), by default the stages are called directly
 
+    """
+    run_stage = run_stage or stage_runner()
+    from helpers import quarantined_projects
+    failed_projects = quarantined_projects()
+    if not failed_projects:
+        print('Es gibt keine zurückgestellten Projekte.')
+        return 0
+    for project in failed_projects:
+        print(f'Zurückgestellt in {project["stage"]}: {project["archetype"]} {project["variant"]} '
+              f'({project["attempts"]} Versuche, zuletzt {project["failed_at"]}): {project["error"]}')
+    run_stage(create_elca_projects, only_quarantined=True)
+    run_stage(compile_lci)
+    run_stage(calculate_lcia)
+    run_stage(interpret_lca)
+    run_stage(analyse_life_cycle_costs)
+    run_stage(create_rating_diagram)
+    return 1 if quarantined_projects() else 0
+
+
+def cli(argv: list[str] = None) -> int:
+    """
+
+    Command-line interface of eLCArefurb for batch and server runs without the GUIs. Without a subcommand the
+    programme runs with the GUIs (see main). The subcommands run the stages of eLCArefurb one after the other:
+    collect:  read the component templates and energy sources from eLCA (collect_templates)
+    prepare:  import the archetypes of a CSV, XLSX or JSON file (import_archetypes), check them
+              (preflight_projects) and prepare the data of the projects (prepare_projects_data)
+    create:   create the projects in eLCA (create_elca_projects)
+    assess:   read the life cycle inventory and the impact assessment of the projects (compile_lci,
+              calculate_lcia)
+    report:   create the report data (interpret_lca, analyse_life_cycle_costs, create_rating_diagram)
+    clean:    delete the registered eLCA projects and the temporary files
+    retry:    create and read only the projects of the dead-letter queue again and create the report data
+              (retry_quarantined_projects)
+    reconcile: compare the projects registry with the projects in the eLCA accounts, projects deleted in eLCA are
+              removed from the registry and projects that are not registered are listed
+              (reconcile_projects_registry)
+    The login credentials are read from the file given with --credentials, otherwise from the environment variable
+    ELCA_CREDENTIALS (JSON) or temp_data/login_credentials.json (see load_login_credentials).
+    Return 1 if projects could not be created or read and were put into the dead-letter queue, otherwise 0.
+
+    Example: python main.py --credentials accounts.json prepare --archetypes district.xlsx
+
+    :param argv: arguments of the command line, by default sys.argv
+
+    """
+    import os
+    parser = argparse.ArgumentParser(description="eLCArefurb: life cycle assessment of refurbishment scenarios "
+                                                 "of districts with eLCA")
+    parser.add_argument("--profile", action="store_true",
+                        help="profile CPU and memory of each stage, the results are saved in profile_data")
+    parser.add_argument("--credentials", default=None,
+                        help="JSON file with the login credentials of the eLCA accounts "
+                             "(default: ELCA_CREDENTIALS or temp_data/login_credentials.json)")
+    parser.add_argument("--trace", default=None, help="save a Chrome trace of the requests and stages in this file")
+    parser.add_argument("--early-creation", action="store_true",
+                        help="without subcommand: create the eLCA projects of the archetypes in the background "
+                             "while further archetypes are entered in the GUI")
+    subparsers = parser.add_subparsers(dest="command")
+    collect = subparsers.add_parser("collect", help="read the component templates from eLCA")
+    collect.add_argument("--full-refresh", action="store_true",
+                         help="read all templates again instead of using the template catalog")
+    collect.add_argument("--workers", type=int, default=8, help="parallel requests to eLCA")
+    prepare = subparsers.add_parser("prepare", help="check the archetypes and prepare the project data")
+    prepare.add_argument("--archetypes", default=None,
+                         help="CSV, XLSX or JSON file with the archetypes of the district "
+                              "(default: temp_data/archetypes.json)")
+    prepare.add_argument("--workers-per-account", type=int, default=3,
+                         help="projects created at the same time in each account, for the runtime estimate")
+    create = subparsers.add_parser("create", help="create the projects in eLCA")
+    create.add_argument("--workers-per-account", type=int, default=3,
+                        help="projects created at the same time in each account")
+    create.add_argument("--only-quarantined", action="store_true",
+                        help="only create the projects of the dead-letter queue")
+    assess = subparsers.add_parser("assess", help="read the life cycle inventory and the impact assessment")
+    assess.add_argument("--refresh", action="store_true",
+                        help="read all projects again from eLCA instead of using the harvest cache")
+    report = subparsers.add_parser("report", help="create the report data")
+    report.add_argument("--output", default=None, help="copy the report data into this folder")
+    clean = subparsers.add_parser("clean", help="delete the eLCA projects and the temporary files")
+    clean.add_argument("--reports", action="store_true", help="delete the report files as well")
+    clean.add_argument("--workers", type=int, default=8, help="parallel deletion requests")
+    subparsers.add_parser("retry", help="process only the projects of the dead-letter queue again")
+    subparsers.add_parser("reconcile", help="compare the projects registry with the projects in eLCA")
+    arguments = parser.parse_args(argv)
+
+    if arguments.credentials:
+        os.environ["ELCA_CREDENTIALS_FILE"] = arguments.credentials
+    if arguments.trace:
+        from helpers import enable_tracing
+        enable_tracing()
+    try:
+        return run_command(arguments)
+    finally:
+        if arguments.trace:
+            from helpers import save_trace, print_trace_summary
+            save_trace(arguments.trace)
+            print_trace_summary()
+
+
+def run_command(arguments: argparse.Namespace) -> int:
+    """
+    Run a subcommand of the command-line interface (see cli).
+    :param arguments: parsed arguments of the command line
+    """
+    if arguments.command is None:
+        return main(arguments.profile, arguments.early_creation)
+    run_stage = stage_runner(arguments.profile)
+    from helpers import quarantined_projects
+    if arguments.command == "collect":
+        run_stage(collect_templates, full_refresh=arguments.full_refresh, max_workers=arguments.workers)
+    elif arguments.command == "prepare":
+        if arguments.archetypes:
+            run_stage(import_archetypes, arguments.archetypes)
+        run_stage(preflight_projects, workers_per_account=arguments.workers_per_account)
+        run_stage(prepare_projects_data)
+    elif arguments.command == "create":
+        run_stage(create_elca_projects, only_quarantined=arguments.only_quarantined,
+                  workers_per_account=arguments.workers_per_account)
+        if quarantined_projects("creation"):
+            return 1
+    elif arguments.command == "assess":
+        if arguments.refresh:
+            from helpers import clear_harvest_cache
+            clear_harvest_cache()
+        run_stage(compile_lci)
+        run_stage(calculate_lcia)
+        if quarantined_projects("lci") or quarantined_projects("lcia"):
+            return 1
+    elif arguments.command == "report":
+        run_stage(interpret_lca)
+        run_stage(analyse_life_cycle_costs)
+        run_stage(create_rating_diagram)
+        if arguments.output:
+            import shutil
+            shutil.copytree("report_data", arguments.output, dirs_exist_ok=True)
+            print(f'Die Berichtsdaten wurden nach {arguments.output} kopiert.')
+    elif arguments.command == "clean":
+        from helpers import delete_registered_projects, delete_temporary_files
+        failed_projects = delete_registered_projects(max_workers=arguments.workers)
+        if failed_projects:
+            print(f'{len(failed_projects)} projects could not be deleted and remain in the projects registry.')
+        delete_temporary_files(include_reports=arguments.reports)
+        if failed_projects:
+            return 1
+    elif arguments.command == "retry":
+        return retry_quarantined_projects(run_stage)
+    elif arguments.command == "reconcile":
+        from helpers import load_login_credentials, get_client, reconcile_projects_registry
+        # Each account is only compared with its own registered projects
+        for credentials in load_login_credentials():
+            user_name = credentials["User name"]
+            unregistered = reconcile_projects_registry(get_client(user_name), user_name)
+            for project_id, project_name in unregistered.items():
+                print(f'Nicht registriertes Projekt im Account {user_name}: {project_name} ({project_id})')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(cli())
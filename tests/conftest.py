@@ -0,0 +1,12 @@
+import pytest
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """
+    Run a test in an empty folder with a temp_data folder, as the helpers read and write the temporary files
+    relative to the working directory.
+    """
+    (tmp_path / "temp_data").mkdir()
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
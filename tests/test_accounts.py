@@ -0,0 +1,53 @@
+import pytest
+from helpers.accounts import shard_archetypes
+from helpers.projects_registry import register_project, REFURB_VARIANTS
+
+
+def register_archetype(archetype_name: str, account: str) -> None:
+    # Register the 5 projects of an archetype as create_elca_projects does
+    for number, variant in enumerate(REFURB_VARIANTS):
+        register_project(archetype_name, variant, f"{archetype_name}-{number}", "1", "hash", account)
+
+
+def test_archetypes_are_balanced_over_the_accounts(workdir):
+    accounts = [{"User name": "a"}, {"User name": "b"}]
+    shards = shard_archetypes(["A", "B", "C", "D"], accounts)
+    assert shards == {"a": ["A", "C"], "b": ["B", "D"]}
+
+
+def test_project_limits_are_respected(workdir):
+    accounts = [{"User name": "a", "Project limit": 5}, {"User name": "b", "Project limit": 15}]
+    shards = shard_archetypes(["A", "B", "C", "D"], accounts)
+    assert shards == {"a": ["A"], "b": ["B", "C", "D"]}
+
+
+def test_exceeded_project_limits_raise(workdir):
+    accounts = [{"User name": "a", "Project limit": 5}, {"User name": "b", "Project limit": 5}]
+    with pytest.raises(ValueError):
+        shard_archetypes(["A", "B", "C"], accounts)
+
+
+def test_registered_and_assigned_archetypes_keep_their_account(workdir):
+    register_archetype("A", "b")
+    accounts = [{"User name": "a"}, {"User name": "b"}]
+    shards = shard_archetypes(["A", "B", "C"], accounts, assigned={"B": "b"})
+    assert shards == {"a": ["C"], "b": ["A", "B"]}
+
+
+def test_projects_of_other_districts_count_against_the_limit(workdir):
+    register_archetype("Other", "a")
+    accounts = [{"User name": "a", "Project limit": 5}, {"User name": "b"}]
+    assert shard_archetypes(["A"], accounts) == {"b": ["A"]}
+
+
+def test_projects_without_account_belong_to_the_first_account(workdir):
+    # Registries created before several accounts were supported have no account
+    register_archetype("A", "")
+    accounts = [{"User name": "a"}, {"User name": "b"}]
+    assert shard_archetypes(["A", "B"], accounts) == {"a": ["A"], "b": ["B"]}
+
+
+def test_projects_without_account_count_against_the_limit_of_the_first_account(workdir):
+    register_archetype("Other", "")
+    accounts = [{"User name": "a", "Project limit": 5}, {"User name": "b"}]
+    assert shard_archetypes(["A"], accounts) == {"b": ["A"]}
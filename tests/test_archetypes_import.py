@@ -0,0 +1,84 @@
+import pandas as pd
+from creation.archetypes_import import read_archetypes_file, resolve_archetypes
+
+STOCK_TEMPLATES = [
+    {'template_name': 'Wall', 'CG_DIN_276': 330, 'UUID': 'wall-1'},
+    {'template_name': 'Window', 'CG_DIN_276': 334, 'UUID': 'window-1'},
+    {'template_name': 'Roof', 'CG_DIN_276': 360, 'UUID': 'roof-1'},
+    # The same name in another cost group does not make the name ambiguous
+    {'template_name': 'Roof', 'CG_DIN_276': 330, 'UUID': 'wall-2'},
+    # Two templates of a cost group with the same name
+    {'template_name': 'Double', 'CG_DIN_276': 330, 'UUID': 'wall-3'},
+    {'template_name': 'Double', 'CG_DIN_276': 330, 'UUID': 'wall-4'},
+]
+ENERGY_SOURCES = {'Erdgas H': '10', 'Heizöl EL': '11'}
+AGE_CLASSES = ['1958-1968', '1969-1978']
+
+
+def row(**changes) -> dict:
+    # Archetype as read from a file, all values as text
+    return {'archetype name': 'A', 'GFA in m²': '1000', 'NFA in m²': '800',
+            'final energy heating in kWh/m²a': '150', 'final energy hot water in kWh/m²a': '20',
+            'exterior walls area in m²': '600', 'roof area in m²': '300', 'number of windows': '40',
+            'energy carrier template': 'Erdgas H', 'exterior walls template': 'Wall',
+            'window template': 'Window', 'roof template': 'Roof', 'building age class': '1958-1968', **changes}
+
+
+def resolve(*rows: dict) -> tuple[pd.DataFrame, list[str]]:
+    return resolve_archetypes(pd.DataFrame(rows), STOCK_TEMPLATES, ENERGY_SOURCES, AGE_CLASSES)
+
+
+def test_names_are_resolved_to_ids():
+    df, problems = resolve(row(**{'exterior walls template': 'wall', 'energy carrier template': 'heizöl el'}))
+    assert problems == []
+    record = df.iloc[0]
+    assert (record['exterior walls ID'], record['window ID'], record['roof ID']) == ('wall-1', 'window-1', 'roof-1')
+    # The names are written as in the templates and energy sources
+    assert record['exterior walls template'] == 'Wall'
+    assert (record['energy carrier template'], record['energy carrier ID']) == ('Heizöl EL', '11')
+    assert record['number of heating supply systems'] == 1
+
+
+def test_decimal_commas_are_converted():
+    df, problems = resolve(row(**{'GFA in m²': '1000,5', 'final energy heating in kWh/m²a': '150.25'}))
+    assert problems == []
+    assert df.iloc[0]['GFA in m²'] == 1000.5
+    assert df.iloc[0]['final energy heating in kWh/m²a'] == 150.25
+
+
+def test_invalid_numbers_are_reported():
+    _, problems = resolve(row(**{'NFA in m²': 'n/a', 'number of windows': '4,5'}))
+    assert len(problems) == 2
+    assert any('NFA in m²' in problem for problem in problems)
+    assert any('ganze Zahl' in problem for problem in problems)
+
+
+def test_ambiguous_template_names_need_an_id():
+    _, problems = resolve(row(**{'exterior walls template': 'Double'}))
+    assert len(problems) == 1 and 'mehrdeutig' in problems[0]
+    df, problems = resolve(row(**{'exterior walls template': 'Double', 'exterior walls ID': 'wall-4'}))
+    assert problems == [] and df.iloc[0]['exterior walls ID'] == 'wall-4'
+
+
+def test_templates_are_looked_up_in_the_cost_group_of_the_component():
+    df, problems = resolve(row(**{'exterior walls template': 'Roof'}))
+    assert problems == [] and df.iloc[0]['exterior walls ID'] == 'wall-2'
+    _, problems = resolve(row(**{'window template': 'Wall'}))
+    assert len(problems) == 1 and 'window template' in problems[0]
+
+
+def test_unknown_names_and_missing_columns_are_reported():
+    _, problems = resolve(row(**{'energy carrier template': 'Holz', 'building age class': '1800'}))
+    assert len(problems) == 2
+    _, problems = resolve_archetypes(pd.DataFrame([row()]).drop(columns=['roof template']), STOCK_TEMPLATES,
+                                     ENERGY_SOURCES, AGE_CLASSES)
+    assert len(problems) == 1 and 'roof template' in problems[0]
+
+
+def test_csv_files_with_semicolons_and_decimal_commas_are_read(tmp_path):
+    archetypes_file = tmp_path / "district.csv"
+    columns, values = zip(*row(**{'GFA in m²': '1000,5'}).items())
+    archetypes_file.write_text(f"{';'.join(columns)}\n{';'.join(values)}\n;;;;;;;;;;;;\n", encoding="utf-8")
+    df, problems = resolve_archetypes(read_archetypes_file(archetypes_file), STOCK_TEMPLATES, ENERGY_SOURCES,
+                                      AGE_CLASSES)
+    assert problems == [] and len(df) == 1 and df.iloc[0]['GFA in m²'] == 1000.5
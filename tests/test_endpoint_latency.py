@@ -0,0 +1,70 @@
+import importlib
+import json
+import pytest
+
+endpoint_latency_module = importlib.import_module("helpers.endpoint_latency")
+from helpers.endpoint_latency import MAX_SAVED_COUNT, endpoint_name, record_latency, endpoint_latency, \
+    save_endpoint_latency
+
+
+@pytest.fixture(autouse=True)
+def measurements(monkeypatch):
+    # Every test starts without measurements of the current execution
+    monkeypatch.setattr(endpoint_latency_module, "_measurements", {})
+
+
+def save_latency(folder, latency: dict) -> None:
+    with open(folder / "endpoint_latency.json", "w", encoding="utf-8") as file:
+        json.dump(latency, file)
+
+
+def load_latency(folder) -> dict:
+    with open(folder / "endpoint_latency.json", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def test_ids_and_query_strings_are_removed_from_the_endpoint():
+    assert endpoint_name("GET", "/project-elements/123/?tab=general") == "GET /project-elements/{id}/"
+
+
+def test_measurements_are_merged_with_the_saved_latencies(tmp_path):
+    save_latency(tmp_path, {"GET /projects/": {"mean": 1.0, "count": 2}})
+    record_latency("GET", "/projects/", 2.0)
+    record_latency("GET", "/projects/", 4.0)
+    record_latency("POST", "/project-csv/preview/", 4.0)
+    assert endpoint_latency(str(tmp_path)) == {"GET /projects/": 2.0, "POST /project-csv/preview/": 4.0}
+
+
+def test_saved_latencies_have_a_limited_weight(tmp_path):
+    save_latency(tmp_path, {"GET /projects/": {"mean": 1.0, "count": 10 * MAX_SAVED_COUNT}})
+    for _ in range(MAX_SAVED_COUNT):
+        record_latency("GET", "/projects/", 3.0)
+    assert endpoint_latency(str(tmp_path)) == {"GET /projects/": 2.0}
+
+
+def test_saving_merges_and_resets_the_measurements(tmp_path):
+    save_latency(tmp_path, {"GET /projects/": {"mean": 1.0, "count": 2}, "GET /other/": {"mean": 5.0, "count": 1}})
+    record_latency("GET", "/projects/", 4.0)
+    save_endpoint_latency(str(tmp_path))
+    assert load_latency(tmp_path) == {"GET /projects/": {"mean": 2.0, "count": 3},
+                                      "GET /other/": {"mean": 5.0, "count": 1}}
+    # The measurements are not merged a second time
+    save_endpoint_latency(str(tmp_path))
+    assert load_latency(tmp_path)["GET /projects/"] == {"mean": 2.0, "count": 3}
+
+
+def test_requests_recorded_during_the_saving_are_kept(tmp_path, monkeypatch):
+    record_latency("GET", "/projects/", 1.0)
+    load_saved_latency = endpoint_latency_module._load_saved_latency
+
+    def load_while_recording(folder):
+        # Another thread records its first request to an endpoint while the file is read
+        record_latency("GET", "/new/1", 2.0)
+        return load_saved_latency(folder)
+
+    monkeypatch.setattr(endpoint_latency_module, "_load_saved_latency", load_while_recording)
+    save_endpoint_latency(str(tmp_path))
+    assert load_latency(tmp_path) == {"GET /projects/": {"mean": 1.0, "count": 1}}
+    monkeypatch.setattr(endpoint_latency_module, "_load_saved_latency", load_saved_latency)
+    save_endpoint_latency(str(tmp_path))
+    assert load_latency(tmp_path)["GET /new/{id}"] == {"mean": 2.0, "count": 1}
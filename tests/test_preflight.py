@@ -0,0 +1,63 @@
+import pandas as pd
+from creation.preflight import validate_archetypes, OUT_OF_SCOPE
+
+REFURB_ALTERNATIVES = {"wall-1": "wall-1-refurb", "window-1": "window-1-refurb", "roof-1": "roof-1-refurb"}
+SAVINGS = pd.DataFrame({"Baualtersklasse": ["1958-1968", "1958-1968"], "Energieträger": ["Gas", "Öl"]})
+
+
+def archetype(**changes) -> dict:
+    # Valid archetype as written by the buildings GUI
+    return {'archetype name': 'A', 'GFA in m²': 1000.0, 'NFA in m²': 800.0,
+            'final energy heating in kWh/m²a': 150.0, 'final energy hot water in kWh/m²a': 20.0,
+            'exterior walls area in m²': 600.0, 'roof area in m²': 300.0, 'number of windows': 40,
+            'energy carrier template': 'Erdgas H', 'energy carrier ID': '10',
+            'exterior walls template': 'Wall', 'window template': 'Window', 'roof template': 'Roof',
+            'exterior walls ID': 'wall-1', 'window ID': 'window-1', 'roof ID': 'roof-1',
+            'building age class': '1958-1968', **changes}
+
+
+def validate(*archetypes: dict) -> list[str]:
+    return validate_archetypes(pd.DataFrame(archetypes), REFURB_ALTERNATIVES, SAVINGS)
+
+
+def test_valid_archetypes_have_no_problems():
+    assert validate(archetype(), archetype(**{'archetype name': 'B', 'energy carrier template': 'Heizöl EL'})) == []
+
+
+def test_missing_columns_are_reported_at_once():
+    archetypes = pd.DataFrame([archetype()]).drop(columns=['roof ID', 'NFA in m²'])
+    problems = validate_archetypes(archetypes, REFURB_ALTERNATIVES, SAVINGS)
+    assert len(problems) == 1
+    assert 'NFA in m²' in problems[0] and 'roof ID' in problems[0]
+
+
+def test_empty_and_duplicate_names_are_reported():
+    problems = validate(archetype(), archetype(), archetype(**{'archetype name': ' '}))
+    assert any('mehrfach' in problem for problem in problems)
+    assert any('leer' in problem for problem in problems)
+
+
+def test_quantities_must_be_positive_numbers():
+    problems = validate(archetype(**{'GFA in m²': 0, 'roof area in m²': 'viel'}))
+    assert len(problems) == 2
+    assert any('GFA in m²' in problem for problem in problems)
+    assert any('roof area in m²' in problem for problem in problems)
+
+
+def test_components_need_a_refurbishment_alternative():
+    problems = validate(archetype(**{'window ID': 'window-2'}))
+    assert len(problems) == 1 and 'window template' in problems[0]
+
+
+def test_components_outside_the_scope_need_no_refurbishment_alternative():
+    assert validate(archetype(**{'roof template': OUT_OF_SCOPE, 'roof ID': ''})) == []
+
+
+def test_age_class_and_energy_carrier_need_savings():
+    problems = validate(archetype(**{'building age class': '2020-2030'}))
+    assert len(problems) == 1 and 'Baualtersklasse' in problems[0]
+    # Energy carriers without own savings are assessed with the savings of gas
+    assert validate(archetype(**{'energy carrier template': 'Strom'})) == []
+    problems = validate_archetypes(pd.DataFrame([archetype(**{'energy carrier template': 'Strom'})]),
+                                   REFURB_ALTERNATIVES, SAVINGS[SAVINGS['Energieträger'] == 'Öl'])
+    assert len(problems) == 1 and 'Energieträger' in problems[0]
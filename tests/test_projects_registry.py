@@ -0,0 +1,87 @@
+import json
+from helpers.projects_registry import project_input_hash, register_project, registered_project, \
+    registered_archetype_projects, registered_projects, unregister_project, reconcile_projects_registry, \
+    cache_harvest, harvested_data, quarantine_project, release_project, quarantined_projects, clear_dead_letters
+
+
+class ProjectsClient:
+    # Client that only lists the projects of an account
+    def __init__(self, projects: dict[str, str]):
+        self.projects = projects
+
+    def list_projects(self) -> dict[str, str]:
+        return self.projects
+
+
+def test_input_hash_changes_with_the_project_data(tmp_path):
+    csv_file = tmp_path / "project.csv"
+    csv_file.write_text("KG DIN 276;eLCA BT ID\n330;wall-1\n", encoding="utf-8")
+    project_data = {'projectname': 'A Bestand', 'net_floor_area': 800}
+    input_hash = project_input_hash(project_data, csv_file)
+    # The order of the keys does not matter, the data and the CSV file do
+    assert project_input_hash({'net_floor_area': 800, 'projectname': 'A Bestand'}, csv_file) == input_hash
+    assert project_input_hash({**project_data, 'net_floor_area': 801}, csv_file) != input_hash
+    csv_file.write_text("KG DIN 276;eLCA BT ID\n330;wall-2\n", encoding="utf-8")
+    assert project_input_hash(project_data, csv_file) != input_hash
+
+
+def test_registered_projects_are_replaced(tmp_path):
+    folder = str(tmp_path)
+    assert registered_project("A", "Bestand", folder) is None
+    register_project("A", "Bestand", "1", "", "", "a", folder)
+    register_project("A", "Bestand", "2", "20", "hash", "a", folder)
+    entry = registered_project("A", "Bestand", folder)
+    assert (entry["project_id"], entry["variant_id"], entry["input_hash"]) == ("2", "20", "hash")
+    assert registered_archetype_projects("A", folder) == {"Bestand": "2"}
+
+
+def test_unregistered_projects_lose_their_harvest_cache(tmp_path):
+    folder = str(tmp_path)
+    register_project("A", "Bestand", "1", "10", "hash", "a", folder)
+    cache_harvest("lci", "1", {"GWP": 1.5}, folder)
+    unregister_project("1", folder)
+    assert registered_projects(folder) == []
+    assert harvested_data("lci", "1", folder) is None
+
+
+def test_reconcile_removes_projects_deleted_in_elca(tmp_path, monkeypatch):
+    monkeypatch.setenv("ELCA_CREDENTIALS", json.dumps([{"User name": "a", "Password": ""},
+                                                       {"User name": "b", "Password": ""}]))
+    monkeypatch.delenv("ELCA_CREDENTIALS_FILE", raising=False)
+    folder = str(tmp_path)
+    register_project("A", "Bestand", "1", "10", "hash", "a", folder)
+    register_project("A", "Dachsanierung", "2", "20", "hash", "a", folder)
+    # Registered before several accounts were supported, belongs to the first account
+    register_project("B", "Bestand", "3", "30", "hash", "", folder)
+    register_project("C", "Bestand", "4", "40", "hash", "b", folder)
+    unregistered = reconcile_projects_registry(ProjectsClient({"1": "A Bestand", "3": "B Bestand", "9": "Manual"}),
+                                               "a", folder)
+    assert unregistered == {"9": "Manual"}
+    # Projects of other accounts are not compared
+    assert {project["project_id"] for project in registered_projects(folder)} == {"1", "3", "4"}
+
+
+def test_failed_projects_are_quarantined_until_they_are_released(tmp_path):
+    folder = str(tmp_path)
+    quarantine_project("creation", "A", "Bestand", ValueError("first"), folder)
+    quarantine_project("creation", "A", "Bestand", ValueError("second"), folder)
+    quarantine_project("lci", "B", "Dachsanierung", KeyError("GWP"), folder)
+    failed = quarantined_projects("creation", folder)
+    assert len(failed) == 1
+    assert (failed[0]["archetype"], failed[0]["attempts"], failed[0]["error"]) == ("A", 2, "ValueError('second')")
+    assert len(quarantined_projects(folder=folder)) == 2
+    # Releasing a project of another stage does not release it in the stage where it failed
+    release_project("lci", "A", "Bestand", folder)
+    release_project("creation", "A", "Bestand", folder)
+    assert quarantined_projects("creation", folder) == []
+    clear_dead_letters(folder)
+    assert quarantined_projects(folder=folder) == []
+
+
+def test_unregistered_projects_leave_the_dead_letter_queue(tmp_path):
+    folder = str(tmp_path)
+    register_project("A", "Bestand", "1", "10", "hash", "a", folder)
+    quarantine_project("lcia", "A", "Bestand", ValueError("timeout"), folder)
+    quarantine_project("lcia", "A", "Dachsanierung", ValueError("timeout"), folder)
+    unregister_project("1", folder)
+    assert [project["variant"] for project in quarantined_projects(folder=folder)] == ["Dachsanierung"]
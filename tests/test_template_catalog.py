@@ -0,0 +1,61 @@
+from helpers.template_catalog import TemplateCatalog
+
+STOCK_TEMPLATES = [
+    {'template_name': 'Außenwand Mauerwerk 1950', 'CG_DIN_276': 330, 'UUID': 'w1'},
+    {'template_name': 'Außenwand Beton', 'CG_DIN_276': 330, 'UUID': 'w2'},
+    {'template_name': 'Mauerwerk Innenwand', 'CG_DIN_276': 330, 'UUID': 'w3'},
+    {'template_name': 'Holzfenster', 'CG_DIN_276': 334, 'UUID': 'f1'},
+    {'template_name': 'Flachdach Beton', 'CG_DIN_276': 360, 'UUID': 'r1'},
+]
+
+
+def names(templates: list[dict]) -> list[str]:
+    return [template['template_name'] for template in templates]
+
+
+def test_names_containing_the_text_come_first():
+    catalog = TemplateCatalog(STOCK_TEMPLATES)
+    found = names(catalog.search('außenwand', '330'))
+    assert set(found[:2]) == {'Außenwand Mauerwerk 1950', 'Außenwand Beton'}
+    # Names that contain the text are ordered by their similarity to the text
+    assert names(catalog.search('mauerwerk', '330')) == ['Mauerwerk Innenwand', 'Außenwand Mauerwerk 1950']
+
+
+def test_search_is_limited_to_the_cost_group():
+    catalog = TemplateCatalog(STOCK_TEMPLATES)
+    assert names(catalog.search('beton', '360')) == ['Flachdach Beton']
+    assert set(names(catalog.search('beton'))) == {'Außenwand Beton', 'Flachdach Beton'}
+
+
+def test_typing_mistakes_and_word_order_are_tolerated():
+    catalog = TemplateCatalog(STOCK_TEMPLATES)
+    assert names(catalog.search('Mauerwek Außenwand', '330'))[0] == 'Außenwand Mauerwerk 1950'
+    assert names(catalog.search('holzfenstr', '334')) == ['Holzfenster']
+
+
+def test_unrelated_text_finds_nothing():
+    catalog = TemplateCatalog(STOCK_TEMPLATES)
+    assert catalog.search('xyz', '330') == []
+
+
+def test_empty_and_short_texts():
+    catalog = TemplateCatalog(STOCK_TEMPLATES)
+    # Without text all templates of the cost group are returned in the order of the template list
+    assert names(catalog.search('  ', '330')) == ['Außenwand Mauerwerk 1950', 'Außenwand Beton', 'Mauerwerk Innenwand']
+    # Texts shorter than a trigram are searched in all names
+    assert names(catalog.search('be', '330')) == ['Außenwand Beton']
+
+
+def test_limit():
+    catalog = TemplateCatalog(STOCK_TEMPLATES)
+    assert len(catalog.search('wand', '330')) == 3
+    assert catalog.search('wand', '330', limit=2) == catalog.search('wand', '330')[:2]
+
+
+def test_lookups_by_uuid_and_name():
+    catalog = TemplateCatalog(STOCK_TEMPLATES, [{'template_name': 'Holzfenster Sanierung', 'UUID': 'f2'}],
+                              {'f1': 'f2'})
+    assert catalog.template('f1')['template_name'] == 'Holzfenster'
+    assert catalog.refurbishment('f1')['UUID'] == 'f2'
+    assert names(catalog.find('holzfenster', '334')) == ['Holzfenster']
+    assert catalog.find('Holzfenster', '330') == []